@@ -0,0 +1,40 @@
+from .base import Command, console
+from rich.table import Table
+from ai_dev_toolkit.utils.ai.docs_index import DocsIndex
+
+# Characters of each matching section shown in the results
+PREVIEW_CHARS = 160
+
+
+class DocsSearchCommand(Command):
+    def __init__(self):
+        super().__init__(
+            name="docs-search",
+            help="Search the project documentation by keywords"
+        )
+
+    def execute(self, query: str = None):
+        if not query:
+            console.print("[bold red]Error:[/] Provide words to search for")
+            return
+
+        index = DocsIndex()
+        try:
+            index.update()
+            hits = index.search(query, limit=10)
+        finally:
+            index.close()
+        if not hits:
+            console.print(f"[yellow]No documentation matching '{query}'[/]")
+            return
+
+        table = Table(title=f"Documentation matching '{query}'")
+        table.add_column("Location", style="green")
+        table.add_column("Section", style="blue")
+        table.add_column("Text")
+        for hit in hits:
+            preview = " ".join(hit.text.split())
+            if len(preview) > PREVIEW_CHARS:
+                preview = preview[:PREVIEW_CHARS] + "..."
+            table.add_row(f"{hit.path}:{hit.line}", hit.heading, preview)
+        console.print(table)
@@ -0,0 +1,41 @@
+from .base import Command, console
+from rich.table import Table
+from ai_dev_toolkit.utils.code.symbols import SymbolIndex
+
+
+class SearchSymbolCommand(Command):
+    def __init__(self):
+        super().__init__(
+            name="search-symbol",
+            help="Find where Python symbols are defined and used"
+        )
+
+    def execute(self, query: str = None):
+        if not query:
+            console.print("[bold red]Error:[/] Provide a symbol name or glob pattern")
+            return
+
+        index = SymbolIndex()
+        try:
+            index.update()
+            matches = index.search(query)
+            if not matches:
+                console.print(f"[yellow]No symbols matching '{query}'[/]")
+                return
+
+            table = Table(title=f"Symbols matching '{query}'")
+            table.add_column("Symbol", style="green")
+            table.add_column("Kind", style="blue")
+            table.add_column("Location")
+            table.add_column("References", justify="right")
+            for symbol in matches:
+                callers = index.callers(symbol.name)
+                table.add_row(
+                    symbol.qualname,
+                    symbol.kind,
+                    f"{symbol.path}:{symbol.line}",
+                    str(sum(len(lines) for lines in callers.values())),
+                )
+            console.print(table)
+        finally:
+            index.close()
@@ -2,8 +2,10 @@ from .base import Command, console
 import typer
 from rich.prompt import Confirm
 from rich.panel import Panel
-from pydantic_ai import Agent
 from pydantic import BaseModel
+from ai_dev_toolkit.utils.ai.agents import models_for, run_sync
+from ai_dev_toolkit.utils.ai.routing import agent_call, route
+from ai_dev_toolkit.utils.ai.semantic_cache import DEFAULT_THRESHOLD, SemanticCache
 from ai_dev_toolkit.utils.misc.utils import get_operational_system
 import os
 
@@ -26,14 +28,43 @@ class TerminalBuilderCommand(Command):
             help="Build and execute terminal commands using AI"
             
         )
-        self.agent = Agent(
-        'groq:llama3-8b-8192', result_type=CliResultType, system_prompt=system_prompt)
-    
+        self.models = models_for(self.name)
+        # Latency matters more than cost here: race a fallback model when the
+        # first one is slower than usual
+        self.hedge = True
+        self.cache_threshold = float(
+            os.environ.get("AITK_SEMANTIC_CACHE_THRESHOLD", DEFAULT_THRESHOLD)
+        )
+        self._cache = None
+
+    @property
+    def cache(self) -> SemanticCache:
+        # Loaded on first use so listing commands doesn't read the index
+        if self._cache is None:
+            self._cache = SemanticCache(self.name, self.cache_threshold)
+        return self._cache
+
+    def generate(self, request: str) -> str:
+        """Returns a command for the request, from the cache when possible"""
+        cached = self.cache.lookup(request)
+        if cached is not None:
+            return cached
+
+        _, result = run_sync(
+            route(
+                request,
+                self.models,
+                agent_call(system_prompt, CliResultType, self.name),
+                hedge=self.hedge and len(self.models) > 1,
+                validate=lambda result: bool(result.command.strip()),
+            )
+        )
+        return result.command
+
     def execute(self, request: str):
         try:
-            result = self.agent.run_sync(request)
-            command = result.data.command
-            
+            command = self.generate(request)
+
             console.print(Panel(
                 f"[bold blue]Generated Command:[/]\n[green]{command}[/]",
                 title="AI Command Builder",
@@ -41,6 +72,8 @@ class TerminalBuilderCommand(Command):
             ))
             
             if Confirm.ask("Do you want to execute this command?"):
+                # Only commands the user accepted are worth answering again
+                self.cache.store(request, command)
                 console.print("\n[bold yellow]Executing command...[/]")
                 os.system(command)
         except Exception as e:
@@ -0,0 +1,24 @@
+from .base import Command, console
+from ai_dev_toolkit.utils.misc.watch import InotifyWatcher, make_watcher, watch
+
+
+class WatchCommand(Command):
+    def __init__(self):
+        super().__init__(
+            name="watch",
+            help="Keep file, version and diff state warm for other commands"
+        )
+
+    def execute(self, root: str = None):
+        root = root or "."
+        watcher = make_watcher(root)
+        mode = "inotify" if isinstance(watcher, InotifyWatcher) else "polling"
+        console.print(f"[bold green]Watching[/] {root} ({mode}), Ctrl+C to stop")
+
+        def report(changed):
+            console.print(f"[dim]Updated state for {len(changed)} changed paths[/]")
+
+        try:
+            watch(root, watcher=watcher, on_update=report)
+        except KeyboardInterrupt:
+            console.print("[yellow]Stopped watching[/]")
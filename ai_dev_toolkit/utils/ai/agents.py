@@ -0,0 +1,115 @@
+import asyncio
+import importlib.util
+import os
+from typing import Any, Awaitable, Dict, List, Tuple, TypeVar
+
+DEFAULT_MODEL = "groq:llama3-8b-8192"
+
+# One connection pool for every agent and provider
+HTTP_TIMEOUT = 600
+CONNECT_TIMEOUT = 5
+MAX_CONNECTIONS = 20
+KEEPALIVE_EXPIRY = 120
+
+T = TypeVar("T")
+
+_agents: Dict[Tuple[str, str, Any], Any] = {}
+_http_client: Any = None
+
+
+def models_for(command: str, default: str = DEFAULT_MODEL) -> List[str]:
+    """Returns the models configured for a command, in fallback order
+
+    AITK_<COMMAND>_MODEL (e.g. AITK_CLI_COMMAND_MODEL for "cli-command") wins
+    over AITK_MODEL, which wins over the default. Either may list several
+    comma-separated models.
+    """
+    variable = "AITK_" + command.upper().replace("-", "_") + "_MODEL"
+    value = os.environ.get(variable) or os.environ.get("AITK_MODEL") or default
+    return [model.strip() for model in value.split(",") if model.strip()]
+
+
+def model_for(command: str, default: str = DEFAULT_MODEL) -> str:
+    """Returns the first model configured for a command"""
+    return models_for(command, default)[0]
+
+
+def get_http_client() -> Any:
+    """Returns the shared keep-alive HTTP client, using HTTP/2 if h2 is installed"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        import httpx
+
+        _http_client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            timeout=httpx.Timeout(HTTP_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+        )
+    return _http_client
+
+
+def _build_model(model: str) -> Any:
+    """Creates a provider model on the shared client, or returns the name"""
+    provider, _, name = model.partition(":")
+    if provider == "groq":
+        from pydantic_ai.models.groq import GroqModel
+
+        return GroqModel(name, http_client=get_http_client())
+    if provider == "openai":
+        from pydantic_ai.models.openai import OpenAIModel
+
+        return OpenAIModel(name, http_client=get_http_client())
+    if model.startswith("gemini"):
+        from pydantic_ai.models.gemini import GeminiModel
+
+        return GeminiModel(model, http_client=get_http_client())
+    # Other providers (and "test") are resolved by pydantic_ai itself
+    return model
+
+
+def get_agent(model: str, system_prompt: str, result_type: Any = None) -> Any:
+    """Returns a pydantic_ai agent for a model and prompt, creating it once
+
+    Agents are built on first use, so commands that never call a model don't
+    import pydantic_ai or need API keys, and every agent shares one HTTP
+    connection pool.
+    """
+    key = (model, system_prompt, result_type)
+    if key not in _agents:
+        # Imported lazily so commands that never call a model don't pay for it
+        from pydantic_ai import Agent
+
+        options = {"system_prompt": system_prompt}
+        if result_type is not None:
+            options["result_type"] = result_type
+        _agents[key] = Agent(_build_model(model), **options)
+    return _agents[key]
+
+
+def run_sync(coroutine: Awaitable[T]) -> T:
+    """Runs a coroutine on the thread's event loop, like Agent.run_sync
+
+    Reusing one loop keeps pooled connections usable between calls; a loop
+    per call (asyncio.run) would strand them.
+    """
+    try:
+        loop = asyncio.get_event_loop()
+    except RuntimeError:
+        loop = None
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    return loop.run_until_complete(coroutine)
+
+
+async def close_agents() -> None:
+    """Drops cached agents and closes the shared HTTP client"""
+    global _http_client
+    _agents.clear()
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
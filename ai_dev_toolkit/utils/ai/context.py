@@ -0,0 +1,245 @@
+import hashlib
+import json
+import os
+import re
+import subprocess
+import time
+from typing import Dict, Iterable, List, Optional
+from ai_dev_toolkit.utils.ai.tokens import count_tokens, truncate_to_tokens
+from ai_dev_toolkit.utils.misc.files import atomic_write
+from ai_dev_toolkit.utils.misc.utils import get_cache_dir
+
+INDEX_VERSION = 1
+# Larger files are listed but their symbols aren't extracted
+MAX_SCAN_BYTES = 1024 * 1024
+DEFAULT_CONTEXT_TOKENS = 2000
+# How many of the best ranked files are included with their contents
+CONTENT_FILES = 3
+
+SYMBOL_PATTERNS = {
+    ".py": re.compile(r"^\s*(?:async\s+def|def|class)\s+(\w+)", re.M),
+    ".js": re.compile(
+        r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?"
+        r"(?:function\*?|class|const|let)\s+(\w+)",
+        re.M,
+    ),
+    ".go": re.compile(r"^(?:func(?:\s+\([^)]*\))?|type)\s+(\w+)", re.M),
+    ".rs": re.compile(
+        r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:fn|struct|enum|trait|mod)\s+(\w+)", re.M
+    ),
+    ".java": re.compile(
+        r"^\s*(?:public|private|protected)?\s*(?:static\s+)?(?:final\s+)?"
+        r"(?:class|interface|enum|record)\s+(\w+)",
+        re.M,
+    ),
+}
+SYMBOL_PATTERNS[".ts"] = SYMBOL_PATTERNS[".tsx"] = SYMBOL_PATTERNS[".js"]
+SYMBOL_PATTERNS[".jsx"] = SYMBOL_PATTERNS[".js"]
+
+WORD = re.compile(r"[A-Za-z0-9]+")
+
+
+def list_repo_files(root: str = ".") -> List[str]:
+    """Lists tracked and untracked files, skipping what .gitignore excludes
+
+    Outside a git repository every file is listed, except hidden ones.
+    """
+    try:
+        result = subprocess.run(
+            ["git", "ls-files", "-z", "-co", "--exclude-standard"],
+            cwd=root,
+            capture_output=True,
+            text=True,
+            errors="surrogateescape",
+            check=True,
+        )
+        return [path for path in result.stdout.split("\0") if path]
+    except (subprocess.CalledProcessError, OSError):
+        pass
+
+    files = []
+    for directory, dirs, names in os.walk(root):
+        dirs[:] = [name for name in dirs if not name.startswith(".")]
+        for name in names:
+            if not name.startswith("."):
+                files.append(os.path.relpath(os.path.join(directory, name), root))
+    return files
+
+
+def extract_symbols(path: str, data: bytes) -> List[str]:
+    """Returns the names of classes and functions defined in a source file"""
+    pattern = SYMBOL_PATTERNS.get(os.path.splitext(path)[1])
+    if pattern is None or b"\0" in data[:8192]:
+        return []
+    text = data.decode("utf-8", "replace")
+    return list(dict.fromkeys(pattern.findall(text)))
+
+
+def _terms(text: str) -> List[str]:
+    """Splits paths and identifiers into lowercase words (camelCase too)"""
+    spaced = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text)
+    return [word.lower() for word in WORD.findall(spaced)]
+
+
+class ContextIndex:
+    """On-disk index of a repository's files, sizes and symbols
+
+    The index is kept in the toolkit cache, one JSON file per repository.
+    update() only re-reads files whose size or mtime changed, so refreshing
+    it is one stat per file; bundle() ranks files against a query and
+    returns a size-bounded context string for prompts.
+    """
+
+    def __init__(self, root: str = ".", cache_path: Optional[str] = None):
+        self.root = os.path.abspath(root)
+        if cache_path is None:
+            digest = hashlib.sha1(self.root.encode()).hexdigest()[:16]
+            cache_path = str(get_cache_dir("context") / f"{digest}.json")
+        self.cache_path = cache_path
+        self.files: Dict[str, Dict] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.cache_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == INDEX_VERSION and data.get("root") == self.root:
+            self.files = data["files"]
+
+    def save(self) -> None:
+        data = {"version": INDEX_VERSION, "root": self.root, "files": self.files}
+        with atomic_write(self.cache_path) as out:
+            out.write(json.dumps(data).encode())
+
+    def update(self, paths: Optional[Iterable[str]] = None) -> int:
+        """Refreshes the index and returns how many files were (re)scanned
+
+        Given paths that no longer exist are dropped from the index.
+        """
+        listed = list_repo_files(self.root) if paths is None else list(paths)
+        files: Dict[str, Dict] = {}
+        scanned = removed = 0
+        for path in listed:
+            full = os.path.join(self.root, path)
+            try:
+                stat = os.stat(full)
+            except OSError:
+                if self.files.pop(path, None) is not None:
+                    removed += 1
+                continue
+
+            entry = self.files.get(path)
+            if (
+                entry is not None
+                and entry["size"] == stat.st_size
+                and entry["mtime"] == stat.st_mtime
+            ):
+                files[path] = entry
+                continue
+
+            symbols: List[str] = []
+            lines = 0
+            if stat.st_size <= MAX_SCAN_BYTES:
+                try:
+                    with open(full, "rb") as f:
+                        data = f.read()
+                    symbols = extract_symbols(path, data)
+                    lines = data.count(b"\n")
+                except OSError:
+                    if self.files.pop(path, None) is not None:
+                        removed += 1
+                    continue
+            files[path] = {
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "lines": lines,
+                "symbols": symbols,
+            }
+            scanned += 1
+
+        if paths is not None:
+            self.files.update(files)
+        else:
+            self.files = files
+        if scanned or removed or paths is None:
+            self.save()
+        return scanned
+
+    def rank(self, query: str = "", focus: Optional[List[str]] = None) -> List[str]:
+        """Returns indexed paths, most relevant first
+
+        Files named in `focus` (e.g. the files of a diff) come first. The
+        rest score by query words found in their path and symbols, with a
+        bonus for recently modified files.
+        """
+        wanted = set(_terms(query))
+        focus = [path for path in focus or [] if path in self.files]
+        now = time.time()
+
+        def score(path: str) -> float:
+            entry = self.files[path]
+            path_terms = set(_terms(path))
+            symbol_terms = set()
+            for symbol in entry["symbols"]:
+                symbol_terms.update(_terms(symbol))
+            days = max(now - entry["mtime"], 0) / 86400
+            return (
+                3 * len(wanted & path_terms)
+                + 2 * len(wanted & symbol_terms)
+                + 1 / (1 + days)
+            )
+
+        others = [path for path in self.files if path not in focus]
+        others.sort(key=score, reverse=True)
+        return focus + others
+
+    def bundle(
+        self,
+        query: str = "",
+        focus: Optional[List[str]] = None,
+        max_tokens: int = DEFAULT_CONTEXT_TOKENS,
+        content_files: int = CONTENT_FILES,
+    ) -> str:
+        """Returns an outline of the best ranked files, within max_tokens
+
+        The first `content_files` files also bring their (truncated)
+        contents, sharing half of the budget.
+        """
+        lines = ["Repository files:"]
+        used = count_tokens(lines[0])
+        ranked = self.rank(query, focus)
+        outline_budget = max_tokens // 2 if content_files else max_tokens
+
+        for path in ranked:
+            entry = self.files[path]
+            line = f"{path} ({entry['lines']} lines)"
+            if entry["symbols"]:
+                line += ": " + ", ".join(entry["symbols"][:12])
+            cost = count_tokens(line) + 1
+            if used + cost > outline_budget:
+                lines.append(f"... and {len(ranked) - len(lines) + 1} more files")
+                used += count_tokens(lines[-1]) + 1
+                break
+            lines.append(line)
+            used += cost
+
+        remaining = max_tokens - used
+        chosen = ranked[:content_files]
+        for index, path in enumerate(chosen):
+            share = remaining // (len(chosen) - index)
+            try:
+                with open(
+                    os.path.join(self.root, path), encoding="utf-8", errors="replace"
+                ) as f:
+                    text = f.read(MAX_SCAN_BYTES)
+            except OSError:
+                continue
+            block = truncate_to_tokens(f"\n--- {path}\n{text}", share)
+            if not block:
+                continue
+            lines.append(block)
+            remaining -= count_tokens(block) + 1
+
+        return "\n".join(lines)
@@ -0,0 +1,352 @@
+import hashlib
+import os
+import re
+import sqlite3
+from dataclasses import dataclass
+from itertools import groupby
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+from ai_dev_toolkit.utils.ai.tokens import count_tokens, truncate_to_tokens
+from ai_dev_toolkit.utils.misc.utils import get_cache_dir
+
+SCHEMA_VERSION = "1"
+DOC_EXTENSIONS = {".md", ".markdown", ".rst"}
+# Searched when no directories are given, relative to the index root
+DEFAULT_DOC_DIRS = ["docs", "conteudo_auxiliar"]
+# Sections longer than this are split at paragraph breaks
+MAX_CHUNK_TOKENS = 400
+DEFAULT_CONTEXT_TOKENS = 1500
+# bm25 weights of the (path, heading, body) columns
+RANK_WEIGHTS = (0.0, 4.0, 1.0)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, size INTEGER, mtime REAL, hash TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(
+    path UNINDEXED, heading, body, line UNINDEXED,
+    tokenize = 'porter unicode61'
+);
+"""
+
+MARKDOWN_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+# Explicit heading ids, as in "## Setup {#setup}"
+HEADING_ID = re.compile(r"\s*\{#[^}]*\}$")
+FENCE = re.compile(r"^\s*(```|~~~)")
+# An RST title underline (or overline): one punctuation character repeated
+RST_ADORNMENT = re.compile(r"^([=\-`:'\"~^_*+#<>.])\1{2,}\s*$")
+WORD = re.compile(r"\w+")
+
+
+@dataclass
+class Chunk:
+    """A section of a document, under its heading path"""
+
+    heading: str
+    text: str
+    line: int
+
+
+@dataclass
+class DocHit:
+    """A chunk returned by a docs search"""
+
+    path: str
+    heading: str
+    line: int
+    text: str
+    score: float
+
+
+def _split_long(heading: str, lines: List[str], start: int) -> List[Chunk]:
+    """Packs a section's paragraphs into chunks of at most MAX_CHUNK_TOKENS
+
+    Lines are numbered from `start`; each chunk starts at its first line.
+    A single paragraph longer than the limit stays whole.
+    """
+    chunks: List[Chunk] = []
+    current: List[str] = []
+    current_start = start
+    used = 0
+    paragraphs = groupby(enumerate(lines), key=lambda item: bool(item[1].strip()))
+    for has_text, group in paragraphs:
+        if not has_text:
+            continue
+        group = list(group)
+        text = "\n".join(line for _, line in group)
+        cost = count_tokens(text)
+        if current and used + cost > MAX_CHUNK_TOKENS:
+            chunks.append(Chunk(heading, "\n\n".join(current), current_start))
+            current, used = [], 0
+        if not current:
+            current_start = start + group[0][0]
+        current.append(text)
+        used += cost
+    if current:
+        chunks.append(Chunk(heading, "\n\n".join(current), current_start))
+    return chunks
+
+
+def _sections(
+    lines: List[str], headings: List[Tuple[int, int, str, int]]
+) -> List[Chunk]:
+    """Turns (line index, level, title, heading lines) into chunks
+
+    Each chunk's heading is the path of titles above it ("Guide > Setup"),
+    and the first chunk of a section starts at its title.
+    """
+    chunks: List[Chunk] = []
+    path: List[Tuple[int, str]] = []
+    bounds = headings + [(len(lines), 0, "", 0)]
+    if bounds[0][0] > 0:
+        chunks += _split_long("", lines[: bounds[0][0]], 1)
+    for (index, level, title, size), (end, _, _, _) in zip(bounds, bounds[1:]):
+        path = [entry for entry in path if entry[0] < level] + [(level, title)]
+        heading = " > ".join(title for _, title in path)
+        body = lines[index + size : end]
+        section = _split_long(heading, body, index + size + 1) or [
+            Chunk(heading, "", 0)
+        ]
+        section[0].line = index + 1
+        chunks += section
+    return [chunk for chunk in chunks if chunk.text or chunk.heading]
+
+
+def chunk_markdown(text: str) -> List[Chunk]:
+    """Splits Markdown at its ATX headings, ignoring fenced code blocks"""
+    lines = text.splitlines()
+    headings = []
+    fence = None
+    for index, line in enumerate(lines):
+        match = FENCE.match(line)
+        if match:
+            if fence is None:
+                fence = match.group(1)
+            elif match.group(1) == fence:
+                fence = None
+            continue
+        if fence is None:
+            match = MARKDOWN_HEADING.match(line)
+            if match:
+                title = HEADING_ID.sub("", match.group(2))
+                headings.append((index, len(match.group(1)), title, 1))
+    return _sections(lines, headings)
+
+
+def chunk_rst(text: str) -> List[Chunk]:
+    """Splits reStructuredText at its section titles
+
+    Title levels follow the order in which adornment styles first appear,
+    as in docutils.
+    """
+    lines = text.splitlines()
+    headings = []
+    styles: List[Tuple[str, bool]] = []
+    index = 0
+    while index < len(lines) - 1:
+        line, below = lines[index], lines[index + 1]
+        overline = RST_ADORNMENT.match(line)
+        if (
+            overline
+            and index + 2 < len(lines)
+            and lines[index + 1].strip()
+            and lines[index + 2].strip() == line.strip()
+        ):
+            style, title, size = (line.strip()[0], True), lines[index + 1].strip(), 3
+        elif (
+            line.strip()
+            and not overline
+            and RST_ADORNMENT.match(below)
+            and len(below.strip()) >= len(line.strip())
+        ):
+            style, title, size = (below.strip()[0], False), line.strip(), 2
+        else:
+            index += 1
+            continue
+        if style not in styles:
+            styles.append(style)
+        headings.append((index, styles.index(style) + 1, title, size))
+        index += size
+    return _sections(lines, headings)
+
+
+def chunk_document(path: str, text: str) -> List[Chunk]:
+    if path.endswith(".rst"):
+        return chunk_rst(text)
+    return chunk_markdown(text)
+
+
+def _fts_query(query: str) -> str:
+    """Turns free text into an FTS5 query matching any of its words"""
+    return " OR ".join(f'"{word}"' for word in WORD.findall(query))
+
+
+class DocsIndex:
+    """Full-text index of documentation, chunked by heading
+
+    Chunks live in a SQLite FTS5 table in the toolkit cache, one database
+    per root. update() re-chunks only files whose content hash changed (the
+    size and mtime are checked first so unchanged files aren't read) and
+    drops files that are gone.
+    """
+
+    def __init__(self, root: str = ".", db_path: Optional[str] = None):
+        self.root = os.path.abspath(root)
+        if db_path is None:
+            digest = hashlib.sha1(self.root.encode()).hexdigest()[:16]
+            db_path = str(get_cache_dir("docs") / f"{digest}.sqlite")
+        self.db = sqlite3.connect(db_path)
+        self.db.executescript(SCHEMA)
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'version'")
+        if (row.fetchone() or [None])[0] != SCHEMA_VERSION:
+            self.db.executescript("DELETE FROM files; DELETE FROM chunks;")
+            self.db.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('version', ?)", (SCHEMA_VERSION,)
+            )
+            self.db.commit()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def _relative(self, path: str) -> str:
+        relative = os.path.relpath(path, self.root)
+        if relative.startswith(".."):
+            return os.path.abspath(path)
+        return relative.replace(os.sep, "/")
+
+    def _prefix(self, directory: str) -> str:
+        """Returns the start of the stored paths under a directory ("" for all)
+
+        Both sides are resolved, so "." and "docs/.." name the root.
+        """
+        full = Path(self.root, directory)
+        try:
+            relative = full.resolve().relative_to(Path(self.root).resolve())
+        except ValueError:
+            return self._relative(str(full)).rstrip("/") + "/"
+        relative_path = relative.as_posix()
+        return "" if relative_path == "." else relative_path + "/"
+
+    def _documents(self, directories: Iterable[str]) -> List[str]:
+        found = []
+        for directory in directories:
+            directory = os.path.join(self.root, directory)
+            if os.path.isfile(directory):
+                found.append(directory)
+                continue
+            for current, dirs, names in os.walk(directory):
+                dirs[:] = sorted(name for name in dirs if not name.startswith("."))
+                found += [
+                    os.path.join(current, name)
+                    for name in sorted(names)
+                    if os.path.splitext(name)[1] in DOC_EXTENSIONS
+                ]
+        return found
+
+    def update(self, directories: Optional[Iterable[str]] = None) -> Tuple[int, int]:
+        """Indexes the docs under directories and returns (changed, removed)
+
+        Directories are relative to the root (or absolute, e.g. for docs
+        fetched by download_docs) and default to DEFAULT_DOC_DIRS. Indexed
+        files under them that no longer exist are removed.
+        """
+        directories = list(directories or DEFAULT_DOC_DIRS)
+        documents = self._documents(directories)
+        seen = set()
+        changed = 0
+        with self.db:
+            for full in documents:
+                path = self._relative(full)
+                seen.add(path)
+                try:
+                    stat = os.stat(full)
+                    row = self.db.execute(
+                        "SELECT size, mtime, hash FROM files WHERE path = ?", (path,)
+                    ).fetchone()
+                    if row and row[:2] == (stat.st_size, stat.st_mtime):
+                        continue
+                    with open(full, "rb") as f:
+                        data = f.read()
+                except OSError:
+                    continue
+
+                digest = hashlib.sha1(data).hexdigest()
+                self.db.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                    (path, stat.st_size, stat.st_mtime, digest),
+                )
+                if row and row[2] == digest:
+                    continue
+                self.db.execute("DELETE FROM chunks WHERE path = ?", (path,))
+                text = data.decode("utf-8", "replace")
+                self.db.executemany(
+                    "INSERT INTO chunks VALUES (?, ?, ?, ?)",
+                    [
+                        (path, chunk.heading, chunk.text, chunk.line)
+                        for chunk in chunk_document(path, text)
+                    ],
+                )
+                changed += 1
+
+            prefixes = tuple(self._prefix(directory) for directory in directories)
+            stale = [
+                path
+                for (path,) in self.db.execute("SELECT path FROM files")
+                if path not in seen and (path + "/").startswith(prefixes)
+            ]
+            for path in stale:
+                self.db.execute("DELETE FROM files WHERE path = ?", (path,))
+                self.db.execute("DELETE FROM chunks WHERE path = ?", (path,))
+        return changed, len(stale)
+
+    def search(self, query: str, limit: int = 5) -> List[DocHit]:
+        """Returns the chunks that best match a query, best first"""
+        match = _fts_query(query)
+        if not match:
+            return []
+        rows = self.db.execute(
+            "SELECT path, heading, line, body, bm25(chunks, ?, ?, ?) AS score "
+            "FROM chunks WHERE chunks MATCH ? ORDER BY score LIMIT ?",
+            (*RANK_WEIGHTS, match, limit),
+        )
+        return [
+            DocHit(path, heading, int(line), body, -score)
+            for path, heading, line, body, score in rows
+        ]
+
+    def context(
+        self, query: str, max_tokens: int = DEFAULT_CONTEXT_TOKENS, limit: int = 8
+    ) -> str:
+        """Returns the best matching chunks as prompt context within max_tokens"""
+        blocks: List[str] = []
+        remaining = max_tokens
+        for hit in self.search(query, limit):
+            title = f" ({hit.heading})" if hit.heading else ""
+            block = truncate_to_tokens(
+                f"--- {hit.path}:{hit.line}{title}\n{hit.text}", remaining
+            )
+            if not block:
+                break
+            blocks.append(block)
+            remaining -= count_tokens(block) + 1
+        return "\n".join(blocks)
+
+
+def retrieve_docs(
+    query: str,
+    max_tokens: int = DEFAULT_CONTEXT_TOKENS,
+    directories: Optional[Iterable[str]] = None,
+    root: str = ".",
+) -> str:
+    """Refreshes the docs index of root and returns context for a query
+
+    Meant for agents: it can be registered as a tool, or its result added to
+    a prompt.
+    """
+    index = DocsIndex(root)
+    try:
+        index.update(directories)
+        return index.context(query, max_tokens)
+    finally:
+        index.close()
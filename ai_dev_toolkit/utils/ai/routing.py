@@ -0,0 +1,154 @@
+import asyncio
+import json
+import time
+from bisect import bisect_left
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from ai_dev_toolkit.utils.ai.agents import get_agent
+from ai_dev_toolkit.utils.ai.tokens import run_tracked
+from ai_dev_toolkit.utils.misc.files import atomic_write
+from ai_dev_toolkit.utils.misc.utils import get_cache_dir
+
+# Seconds a single model may take before the next one is tried
+ATTEMPT_TIMEOUT = 30.0
+# Hedge after the primary model's p95 latency, or this delay until it is known
+DEFAULT_HEDGE_DELAY = 2.0
+HEDGE_QUANTILE = 0.95
+MIN_SAMPLES = 20
+# Upper bounds in seconds of the latency histogram buckets; the last is open
+BUCKETS = [0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 5, 8, 13, 21, 34, 55]
+
+ModelCall = Callable[[str, str], Awaitable[Any]]
+
+
+class LatencyStats:
+    """Per-model latency histograms, persisted as JSON in the cache directory"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or str(get_cache_dir("latency") / "histograms.json")
+        try:
+            with open(self.path) as f:
+                self.histograms: Dict[str, List[int]] = json.load(f)
+        except (OSError, ValueError):
+            self.histograms = {}
+
+    def record(self, model: str, seconds: float) -> None:
+        counts = self.histograms.setdefault(model, [0] * (len(BUCKETS) + 1))
+        counts[bisect_left(BUCKETS, seconds)] += 1
+
+    def count(self, model: str) -> int:
+        return sum(self.histograms.get(model, []))
+
+    def quantile(self, model: str, q: float) -> Optional[float]:
+        """Returns the upper bound of the bucket holding quantile q, if known"""
+        counts = self.histograms.get(model)
+        if not counts or not sum(counts):
+            return None
+
+        wanted = q * sum(counts)
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= wanted:
+                return BUCKETS[min(index, len(BUCKETS) - 1)]
+        return BUCKETS[-1]
+
+    def hedge_delay(self, model: str) -> float:
+        if self.count(model) < MIN_SAMPLES:
+            return DEFAULT_HEDGE_DELAY
+        return self.quantile(model, HEDGE_QUANTILE) or DEFAULT_HEDGE_DELAY
+
+    def save(self) -> None:
+        with atomic_write(self.path) as out:
+            out.write(json.dumps(self.histograms).encode())
+
+
+async def route(
+    prompt: str,
+    models: List[str],
+    call: ModelCall,
+    timeout: float = ATTEMPT_TIMEOUT,
+    hedge: bool = False,
+    validate: Optional[Callable[[Any], bool]] = None,
+    stats: Optional[LatencyStats] = None,
+) -> Tuple[str, Any]:
+    """Asks models in order and returns (model, result) of the first valid one
+
+    A model that raises, times out or returns a result `validate` rejects
+    falls back to the next one. With `hedge`, the next model is also started
+    when the running ones take longer than the primary's p95 latency, and
+    whichever valid result arrives first wins; the others are cancelled and
+    awaited, so their connections are released before this returns.
+    `call(model, prompt)` does the actual request, so fakes can stand in for
+    real providers. Raises RuntimeError when every model fails.
+    """
+    if not models:
+        raise ValueError("No models to route to")
+
+    stats = stats if stats is not None else LatencyStats()
+    delay = stats.hedge_delay(models[0])
+    errors: List[str] = []
+    pending: Dict[asyncio.Task, Tuple[str, float]] = {}
+    queue = list(models)
+
+    async def attempt(model: str) -> Any:
+        return await asyncio.wait_for(call(model, prompt), timeout)
+
+    def launch() -> None:
+        model = queue.pop(0)
+        pending[asyncio.ensure_future(attempt(model))] = (model, time.perf_counter())
+
+    launch()
+    try:
+        while pending:
+            wait_for = delay if hedge and queue else None
+            done, _ = await asyncio.wait(
+                pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                launch()
+                continue
+
+            for task in done:
+                model, started = pending.pop(task)
+                elapsed = time.perf_counter() - started
+                try:
+                    result = task.result()
+                except asyncio.TimeoutError:
+                    stats.record(model, elapsed)
+                    errors.append(f"{model}: timed out after {timeout}s")
+                    continue
+                except Exception as e:
+                    errors.append(f"{model}: {e}")
+                    continue
+
+                stats.record(model, elapsed)
+                if validate is not None and not validate(result):
+                    errors.append(f"{model}: invalid result")
+                    continue
+                return model, result
+
+            if not pending and queue:
+                launch()
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        try:
+            stats.save()
+        except OSError:
+            pass
+
+    raise RuntimeError("All models failed: " + "; ".join(errors))
+
+
+def agent_call(
+    system_prompt: str, result_type: Any = None, command: str = ""
+) -> ModelCall:
+    """Returns a route() call that runs the shared agent for each model"""
+
+    async def call(model: str, prompt: str) -> Any:
+        agent = get_agent(model, system_prompt, result_type)
+        result = await run_tracked(agent, prompt, model, command, system_prompt)
+        return result.data
+
+    return call
@@ -0,0 +1,167 @@
+import json
+import re
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+from ai_dev_toolkit.utils.misc.files import atomic_write
+from ai_dev_toolkit.utils.misc.utils import get_cache_dir
+
+DIMENSIONS = 1024
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_MAX_ENTRIES = 1000
+NGRAM = 3
+
+WORD = re.compile(r"[a-z0-9]+")
+# Tokens that must match exactly: numbers, paths, globs, flags, names
+LITERAL = re.compile(r"\S*[\d/.*~=_-]\S*")
+# Words that change little about what a command request asks for
+STOP_WORDS = {"a", "an", "the", "all", "me", "my", "please", "in", "of", "to"}
+# Common ways of asking for the same thing in command requests
+SYNONYMS = {
+    "show": "list",
+    "display": "list",
+    "print": "list",
+    "big": "large",
+    "bigger": "large",
+    "biggest": "large",
+    "larger": "large",
+    "largest": "large",
+    "huge": "large",
+    "remove": "delete",
+    "erase": "delete",
+    "folder": "directory",
+    "folders": "directories",
+    "dir": "directory",
+    "locate": "find",
+    "search": "find",
+}
+
+
+def normalize(text: str) -> str:
+    words = WORD.findall(text.lower())
+    return " ".join(
+        SYNONYMS.get(word, word) for word in words if word not in STOP_WORDS
+    )
+
+
+def literals(text: str) -> List[str]:
+    """Returns the tokens two requests must share to get the same answer"""
+    return sorted(
+        token.rstrip(".,;:!?") for token in LITERAL.findall(text.lower())
+    )
+
+
+def embed(text: str, dimensions: int = DIMENSIONS) -> np.ndarray:
+    """Embeds text as a unit vector of hashed words and character n-grams
+
+    Character n-grams make related word forms ("big", "biggest") overlap;
+    whole words weigh more so unrelated requests stay apart. Needs no model.
+    """
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for word in normalize(text).split():
+        features = [f"w:{word}"] * 2
+        padded = f" {word} "
+        features += [padded[i : i + NGRAM] for i in range(len(padded) - NGRAM + 1)]
+        for feature in features:
+            digest = zlib.crc32(feature.encode())
+            # The top bit picks a sign so hash collisions tend to cancel out
+            sign = 1.0 if digest & 0x80000000 else -1.0
+            vector[digest % dimensions] += sign
+
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticCache:
+    """Answers for natural-language requests, matched by similarity
+
+    Entries live in <cache dir>/semantic/<name>.json with their vectors in a
+    matching .npy file. Lookups are one matrix-vector product over all
+    vectors; a match must also share every literal (numbers, paths, flags)
+    with the request. The least recently used entries are evicted past
+    `max_entries`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        threshold: float = DEFAULT_THRESHOLD,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        directory: Optional[str] = None,
+    ):
+        base = Path(directory) if directory else get_cache_dir("semantic")
+        self.entries_path = base / f"{name}.json"
+        self.vectors_path = base / f"{name}.npy"
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.entries: List[Dict] = []
+        self.vectors = np.zeros((0, DIMENSIONS), dtype=np.float32)
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.entries_path) as f:
+                entries = json.load(f)
+            vectors = np.load(self.vectors_path)
+        except (OSError, ValueError):
+            return
+        if len(entries) == len(vectors) and vectors.shape[1:] == (DIMENSIONS,):
+            self.entries, self.vectors = entries, vectors
+
+    def lookup(self, text: str) -> Optional[str]:
+        """Returns the answer of the most similar request above the threshold"""
+        if not self.entries:
+            return None
+
+        key = normalize(text)
+        for index, entry in enumerate(self.entries):
+            if entry["key"] == key:
+                return self._hit(index)
+
+        scores = self.vectors @ embed(text)
+        wanted = literals(text)
+        for index in np.argsort(scores)[::-1]:
+            if scores[index] < self.threshold:
+                break
+            # "kill port 8080" must never be answered with the 3000 command
+            if literals(self.entries[index]["text"]) == wanted:
+                return self._hit(int(index))
+        return None
+
+    def _hit(self, index: int) -> str:
+        entry = self.entries[index]
+        entry["hits"] += 1
+        entry["used"] = time.time()
+        return entry["answer"]
+
+    def store(self, text: str, answer: str) -> None:
+        """Adds or replaces the answer for a request, then saves the cache"""
+        key = normalize(text)
+        now = time.time()
+        for entry in self.entries:
+            if entry["key"] == key:
+                entry.update(answer=answer, used=now)
+                self.save()
+                return
+
+        self.entries.append(
+            {"key": key, "text": text, "answer": answer, "hits": 0, "used": now}
+        )
+        self.vectors = np.vstack([self.vectors, embed(text)[np.newaxis, :]])
+        if len(self.entries) > self.max_entries:
+            by_use = sorted(
+                range(len(self.entries)), key=lambda i: self.entries[i]["used"]
+            )
+            keep = sorted(by_use[len(self.entries) - self.max_entries :])
+            self.entries = [self.entries[i] for i in keep]
+            self.vectors = self.vectors[keep]
+        self.save()
+
+    def save(self) -> None:
+        self.entries_path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_write(str(self.vectors_path)) as out:
+            np.save(out, self.vectors)
+        with atomic_write(str(self.entries_path)) as out:
+            out.write(json.dumps(self.entries).encode())
@@ -0,0 +1,258 @@
+import json
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from ai_dev_toolkit.utils.misc.utils import get_cache_dir
+
+# Pre-tokenization close to the one BPE tokenizers use: words, digit groups,
+# symbol runs and whitespace, the first three optionally led by one space
+TOKEN_PATTERN = re.compile(r"( ?[^\W\d_]+)|( ?\d{1,3})|( ?[^\s\w]+|_+)|(\s+)")
+# Common words are single tokens; longer ones split into pieces of about this
+WORD_CHARS_PER_TOKEN = 6
+# Punctuation and operators merge less often than letters
+SYMBOL_CHARS_PER_TOKEN = 2
+
+# Context windows in tokens, matched by "provider:model" prefix
+MODEL_CONTEXT_LIMITS = {
+    "groq:llama3-8b-8192": 8192,
+    "groq:llama3-70b-8192": 8192,
+    "groq:llama-3.1": 131072,
+    "groq:llama-3.3": 131072,
+    "groq:mixtral-8x7b-32768": 32768,
+    "openai:gpt-4o": 128000,
+    "openai:gpt-4-turbo": 128000,
+    "openai:gpt-4": 8192,
+    "openai:gpt-3.5-turbo": 16385,
+    "gemini-1.5": 1048576,
+    "google-gla:gemini-1.5": 1048576,
+    "anthropic:claude-3": 200000,
+}
+DEFAULT_CONTEXT_LIMIT = 8192
+# Tokens kept free for the model's answer
+DEFAULT_RESERVED_OUTPUT = 1024
+TRUNCATED_NOTE = "... [truncated]"
+
+
+def count_tokens(text: str) -> int:
+    """Approximates the number of tokens in text without a tokenizer download
+
+    Text is split the way BPE tokenizers pre-tokenize it and each piece is
+    costed by kind: words by length, digits in groups of three, symbols in
+    pairs and any whitespace run (such as indentation) as one token. Non-ASCII
+    text is measured in UTF-8 bytes, so it costs more per character, as it
+    does in real tokenizers.
+    """
+    if not text:
+        return 0
+
+    ascii_only = text.isascii()
+    tokens = 0
+    for word, digits, symbols, space in TOKEN_PATTERN.findall(text):
+        if space or digits:
+            tokens += 1
+            continue
+        piece = (word or symbols).lstrip(" ") or " "
+        size = len(piece) if ascii_only else len(piece.encode("utf-8"))
+        per_token = WORD_CHARS_PER_TOKEN if word else SYMBOL_CHARS_PER_TOKEN
+        tokens += (size + per_token - 1) // per_token
+    return tokens
+
+
+def context_limit(model: str) -> int:
+    """Returns the context window of a model, by longest matching prefix"""
+    matches = [name for name in MODEL_CONTEXT_LIMITS if model.startswith(name)]
+    if not matches:
+        return DEFAULT_CONTEXT_LIMIT
+    return MODEL_CONTEXT_LIMITS[max(matches, key=len)]
+
+
+def prompt_budget(
+    model: str, system_prompt: str = "", reserved_output: int = DEFAULT_RESERVED_OUTPUT
+) -> int:
+    """Returns how many prompt tokens fit next to the system prompt and answer"""
+    return max(context_limit(model) - count_tokens(system_prompt) - reserved_output, 0)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cuts text at a line boundary so it fits max_tokens, noting the cut"""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    limit = max_tokens - count_tokens(TRUNCATED_NOTE) - 1
+    if limit <= 0:
+        return ""
+    kept: List[str] = []
+    used = 0
+    for line in text.splitlines():
+        cost = count_tokens(line) + 1
+        if used + cost > limit:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept + [TRUNCATED_NOTE])
+
+
+def fit_to_budget(parts: List[Tuple[str, int]], max_tokens: int) -> List[str]:
+    """Shrinks prompt parts to a token budget, lowest priority first
+
+    `parts` are (text, priority) pairs. Lower priority parts are truncated,
+    or dropped to "", until the total fits; the texts come back in their
+    original order.
+    """
+    texts = [text for text, _ in parts]
+    costs = [count_tokens(text) for text in texts]
+    over = sum(costs) - max_tokens
+    for index in sorted(range(len(parts)), key=lambda i: parts[i][1]):
+        if over <= 0:
+            break
+        keep = max(costs[index] - over, 0)
+        texts[index] = truncate_to_tokens(texts[index], keep)
+        new_cost = count_tokens(texts[index])
+        over -= costs[index] - new_cost
+        costs[index] = new_cost
+    return texts
+
+
+def check_context(
+    model: str,
+    prompt: str,
+    system_prompt: str = "",
+    reserved_output: int = DEFAULT_RESERVED_OUTPUT,
+) -> int:
+    """Returns the prompt's token count, or raises ValueError if it can't fit"""
+    tokens = count_tokens(prompt)
+    budget = prompt_budget(model, system_prompt, reserved_output)
+    if tokens > budget:
+        raise ValueError(
+            f"Prompt of ~{tokens} tokens exceeds the {budget} tokens available "
+            f"for {model} (context {context_limit(model)})"
+        )
+    return tokens
+
+
+def _usage_log():
+    return get_cache_dir("usage") / "calls.jsonl"
+
+
+def record_usage(
+    model: str,
+    command: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    latency: float,
+    ok: bool = True,
+) -> Dict:
+    """Appends one model call to the usage log and returns the entry"""
+    entry = {
+        "time": time.time(),
+        "model": model,
+        "command": command,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "latency": round(latency, 4),
+        "ok": ok,
+    }
+    with open(_usage_log(), "a") as f:
+        f.write(json.dumps(entry) + "\n")
+    return entry
+
+
+def _result_tokens(result: Any) -> Tuple[Optional[int], Optional[int]]:
+    """Returns the (request, response) tokens a provider reported, if any"""
+    try:
+        usage = result.usage()
+        request, response = usage.request_tokens, usage.response_tokens
+    except Exception:
+        return None, None
+    if not isinstance(request, int) or not isinstance(response, int):
+        return None, None
+    return request, response
+
+
+def _record_result(
+    result: Any, model: str, command: str, prompt_tokens: int, start: float
+) -> None:
+    request, response = _result_tokens(result)
+    record_usage(
+        model,
+        command,
+        request if request is not None else prompt_tokens,
+        response if response is not None else count_tokens(str(result.data)),
+        time.perf_counter() - start,
+    )
+
+
+async def run_tracked(
+    agent: Any,
+    prompt: str,
+    model: str,
+    command: str = "",
+    system_prompt: str = "",
+) -> Any:
+    """Runs an agent after checking the context limit, recording the call"""
+    prompt_tokens = check_context(model, prompt, system_prompt)
+    start = time.perf_counter()
+    try:
+        result = await agent.run(prompt)
+    except Exception:
+        elapsed = time.perf_counter() - start
+        record_usage(model, command, prompt_tokens, 0, elapsed, ok=False)
+        raise
+    _record_result(result, model, command, prompt_tokens, start)
+    return result
+
+
+def run_tracked_sync(
+    agent: Any,
+    prompt: str,
+    model: str,
+    command: str = "",
+    system_prompt: str = "",
+) -> Any:
+    """Synchronous counterpart of run_tracked"""
+    prompt_tokens = check_context(model, prompt, system_prompt)
+    start = time.perf_counter()
+    try:
+        result = agent.run_sync(prompt)
+    except Exception:
+        elapsed = time.perf_counter() - start
+        record_usage(model, command, prompt_tokens, 0, elapsed, ok=False)
+        raise
+    _record_result(result, model, command, prompt_tokens, start)
+    return result
+
+
+def usage_report(since: float = 0) -> Dict[str, Dict]:
+    """Aggregates logged calls per model: counts, tokens and latency"""
+    report: Dict[str, Dict] = {}
+    latencies: Dict[str, List[float]] = {}
+    log = _usage_log()
+    if not log.exists():
+        return report
+
+    with open(log) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get("time", 0) < since:
+                continue
+            model = entry["model"]
+            stats = report.setdefault(
+                model,
+                {"calls": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0},
+            )
+            stats["calls"] += 1
+            stats["errors"] += 0 if entry.get("ok", True) else 1
+            stats["prompt_tokens"] += entry["prompt_tokens"]
+            stats["completion_tokens"] += entry["completion_tokens"]
+            latencies.setdefault(model, []).append(entry["latency"])
+
+    for model, values in latencies.items():
+        values.sort()
+        report[model]["mean_latency"] = sum(values) / len(values)
+        p95 = min(int(len(values) * 0.95), len(values) - 1)
+        report[model]["p95_latency"] = values[p95]
+        report[model]["max_latency"] = values[-1]
+    return report
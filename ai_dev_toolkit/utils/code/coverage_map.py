@@ -0,0 +1,290 @@
+import bisect
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from ai_dev_toolkit.utils.git.patch import FilePatch
+from ai_dev_toolkit.utils.misc.utils import get_cache_dir
+
+SCHEMA_VERSION = "2"
+# pytest-cov's --cov-context=test appends the test phase to each context
+PHASES = ("|setup", "|run", "|teardown")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS tests (id INTEGER PRIMARY KEY, name TEXT UNIQUE);
+CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE);
+CREATE TABLE IF NOT EXISTS lines (
+    file_id INTEGER, test_id INTEGER, numbits BLOB,
+    PRIMARY KEY (file_id, test_id)
+);
+CREATE INDEX IF NOT EXISTS lines_test ON lines (test_id);
+CREATE TABLE IF NOT EXISTS static (file_id INTEGER PRIMARY KEY, numbits BLOB);
+"""
+
+
+def nums_to_numbits(nums: Iterable[int]) -> bytes:
+    """Packs line numbers into a bitmap, in coverage.py's numbits format"""
+    nums = list(nums)
+    if not nums:
+        return b""
+    bits = bytearray(max(nums) // 8 + 1)
+    for num in nums:
+        bits[num // 8] |= 1 << (num % 8)
+    return bytes(bits)
+
+
+def numbits_to_nums(numbits: bytes) -> List[int]:
+    nums = []
+    for index, byte in enumerate(numbits):
+        for bit in range(8):
+            if byte & (1 << bit):
+                nums.append(index * 8 + bit)
+    return nums
+
+
+def context_test(context: str) -> str:
+    """Returns the pytest node id of a coverage context ("" if none)"""
+    for phase in PHASES:
+        if context.endswith(phase):
+            return context[: -len(phase)]
+    return context
+
+
+def changed_lines(patch: FilePatch) -> Tuple[Set[int], Set[int]]:
+    """Returns (old lines a diff modifies, old positions where it inserts)
+
+    An insertion at position n goes between old lines n - 1 and n. Added
+    lines that directly follow removed ones replace them and are not
+    insertions.
+    """
+    modified: Set[int] = set()
+    inserted: Set[int] = set()
+    for hunk in patch.hunks:
+        line = hunk.old_start if hunk.old_count else hunk.old_start + 1
+        replacing = False
+        for text in hunk.lines:
+            prefix = text[:1]
+            if prefix == "-":
+                modified.add(line)
+                line += 1
+                replacing = True
+            elif prefix == "+":
+                if not replacing:
+                    inserted.add(line)
+            elif prefix in (" ", ""):
+                line += 1
+                replacing = False
+    return modified, inserted
+
+
+def _read_sqlite(path: str) -> Dict[str, Dict[str, Set[int]]]:
+    """Reads {file: {context: lines}} from a coverage.py data file"""
+    data: Dict[str, Dict[str, Set[int]]] = {}
+    db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        tables = {row[0] for row in db.execute("SELECT name FROM sqlite_master")}
+        if "line_bits" in tables:
+            rows = db.execute(
+                "SELECT file.path, context.context, line_bits.numbits "
+                "FROM line_bits JOIN file ON file.id = line_bits.file_id "
+                "JOIN context ON context.id = line_bits.context_id"
+            )
+            for file, context, numbits in rows:
+                lines = data.setdefault(file, {}).setdefault(context, set())
+                lines.update(numbits_to_nums(numbits))
+        if "arc" in tables:
+            # Branch coverage stores arcs; both ends of an arc were executed
+            rows = db.execute(
+                "SELECT file.path, context.context, arc.fromno, arc.tono "
+                "FROM arc JOIN file ON file.id = arc.file_id "
+                "JOIN context ON context.id = arc.context_id"
+            )
+            for file, context, start, end in rows:
+                lines = data.setdefault(file, {}).setdefault(context, set())
+                lines.update(line for line in (start, end) if line > 0)
+    finally:
+        db.close()
+    return data
+
+
+def _read_json(path: str) -> Dict[str, Dict[str, Set[int]]]:
+    """Reads {file: {context: lines}} from `coverage json --show-contexts`"""
+    with open(path) as f:
+        report = json.load(f)
+    data: Dict[str, Dict[str, Set[int]]] = {}
+    for file, entry in report.get("files", {}).items():
+        contexts = entry.get("contexts")
+        if contexts is None:
+            raise ValueError(f"{path}: no contexts; run coverage json --show-contexts")
+        for line, names in contexts.items():
+            for context in names:
+                data.setdefault(file, {}).setdefault(context, set()).add(int(line))
+    return data
+
+
+class CoverageMap:
+    """Maps source lines to the tests that execute them
+
+    Built from coverage.py data recorded with per-test contexts (pytest
+    --cov-context=test), either the .coverage SQLite file or a JSON report.
+    Each (file, test) pair is stored as one numbits bitmap in a SQLite
+    database in the toolkit cache. load() only replaces the tests present
+    in the new data, so a partial test run updates the map in place.
+
+    Lines run outside any test, at import or collection time (def lines,
+    decorators, module constants), are kept per file too. Changing one of
+    them could affect any test, so it selects every test of that file.
+    """
+
+    def __init__(self, root: str = ".", db_path: Optional[str] = None):
+        self.root = os.path.abspath(root)
+        if db_path is None:
+            digest = hashlib.sha1(self.root.encode()).hexdigest()[:16]
+            db_path = str(get_cache_dir("coverage") / f"{digest}.sqlite")
+        self.db = sqlite3.connect(db_path)
+        self.db.executescript(SCHEMA)
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'version'")
+        if (row.fetchone() or [None])[0] != SCHEMA_VERSION:
+            self.db.executescript(
+                "DELETE FROM tests; DELETE FROM files; DELETE FROM lines;"
+                "DELETE FROM static;"
+            )
+            self.db.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('version', ?)", (SCHEMA_VERSION,)
+            )
+            self.db.commit()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def _relative(self, path: str) -> str:
+        if os.path.isabs(path):
+            path = os.path.relpath(path, self.root)
+        return path.replace(os.sep, "/")
+
+    def _id(self, table: str, column: str, value: str) -> int:
+        row = self.db.execute(
+            f"SELECT id FROM {table} WHERE {column} = ?", (value,)
+        ).fetchone()
+        if row:
+            return row[0]
+        return self.db.execute(
+            f"INSERT INTO {table} ({column}) VALUES (?)", (value,)
+        ).lastrowid
+
+    def load(self, coverage_path: str) -> int:
+        """Merges coverage data into the map and returns how many tests it had
+
+        Files ending in .json are read as JSON reports, anything else as a
+        coverage.py data file. Raises ValueError if the data has no per-test
+        contexts.
+        """
+        if coverage_path.endswith(".json"):
+            data = _read_json(coverage_path)
+        else:
+            data = _read_sqlite(coverage_path)
+
+        by_pair: Dict[Tuple[str, str], Set[int]] = {}
+        static: Dict[str, Set[int]] = {}
+        for file, contexts in data.items():
+            path = self._relative(file)
+            if path.startswith("../"):
+                continue
+            for context, lines in contexts.items():
+                name = context_test(context)
+                if name:
+                    by_pair.setdefault((path, name), set()).update(lines)
+                else:
+                    static.setdefault(path, set()).update(lines)
+        tests = {name for _, name in by_pair}
+        if data and not tests:
+            raise ValueError(
+                f"{coverage_path}: no test contexts; run pytest --cov-context=test"
+            )
+
+        with self.db:
+            test_ids = {name: self._id("tests", "name", name) for name in tests}
+            self.db.executemany(
+                "DELETE FROM lines WHERE test_id = ?",
+                [(test_id,) for test_id in test_ids.values()],
+            )
+            file_ids: Dict[str, int] = {}
+            for path in {path for path, _ in by_pair} | set(static):
+                file_ids[path] = self._id("files", "path", path)
+            rows = [
+                (file_ids[path], test_ids[name], nums_to_numbits(lines))
+                for (path, name), lines in by_pair.items()
+            ]
+            self.db.executemany("INSERT INTO lines VALUES (?, ?, ?)", rows)
+            self.db.executemany(
+                "INSERT OR REPLACE INTO static VALUES (?, ?)",
+                [
+                    (file_ids[path], nums_to_numbits(lines))
+                    for path, lines in static.items()
+                ],
+            )
+        return len(tests)
+
+    def tests(self) -> List[str]:
+        rows = self.db.execute(
+            "SELECT name FROM tests WHERE id IN (SELECT test_id FROM lines) "
+            "ORDER BY name"
+        )
+        return [row[0] for row in rows]
+
+    def coverage(self, path: str) -> Dict[str, Set[int]]:
+        """Returns {test: lines} for one source file"""
+        rows = self.db.execute(
+            "SELECT tests.name, lines.numbits FROM lines "
+            "JOIN files ON files.id = lines.file_id "
+            "JOIN tests ON tests.id = lines.test_id WHERE files.path = ?",
+            (self._relative(path),),
+        )
+        return {name: set(numbits_to_nums(numbits)) for name, numbits in rows}
+
+    def static_lines(self, path: str) -> Set[int]:
+        """Returns the lines of a file that ran outside any test"""
+        row = self.db.execute(
+            "SELECT static.numbits FROM static "
+            "JOIN files ON files.id = static.file_id WHERE files.path = ?",
+            (self._relative(path),),
+        ).fetchone()
+        return set(numbits_to_nums(row[0])) if row else set()
+
+    def tests_for(
+        self, path: str, lines: Iterable[int], inserted: Iterable[int] = ()
+    ) -> Set[str]:
+        """Returns the tests that execute any of the given lines of a file
+
+        For insertions, the closest executed lines before and after the
+        insertion point stand in for the new code. Touching a line that ran
+        outside any test selects every test of the file.
+        """
+        by_test = self.coverage(path)
+        static = self.static_lines(path)
+        wanted = set(lines)
+        inserted = list(inserted)
+        if inserted:
+            executed = sorted(static.union(*by_test.values()))
+            for position in inserted:
+                index = bisect.bisect_left(executed, position)
+                wanted.update(executed[max(index - 1, 0) : index + 1])
+        if wanted & static:
+            return set(by_test)
+        return {test for test, covered in by_test.items() if covered & wanted}
+
+    def tests_for_patches(
+        self, patches: Iterable[FilePatch]
+    ) -> Tuple[List[str], List[str]]:
+        """Returns (tests to run, changed files the map knows nothing about)"""
+        selected: Set[str] = set()
+        unmapped: List[str] = []
+        for patch in patches:
+            if not self.coverage(patch.old_path or patch.path):
+                unmapped.append(patch.path)
+                continue
+            modified, inserted = changed_lines(patch)
+            selected |= self.tests_for(patch.old_path or patch.path, modified, inserted)
+        return sorted(selected), unmapped
@@ -0,0 +1,348 @@
+import hashlib
+import importlib
+import importlib.util
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from ai_dev_toolkit.utils.git.patch import FilePatch
+
+# Parsed trees kept in memory, keyed by content hash
+MAX_TREES = 256
+
+# Grammar module, its language function and a definitions query per language.
+# Captures: @name is the symbol name, @definition.<kind> the whole node.
+LANGUAGES = {
+    "python": (
+        "tree_sitter_python",
+        "language",
+        """
+        (function_definition name: (identifier) @name) @definition.function
+        (class_definition name: (identifier) @name) @definition.class
+        """,
+    ),
+    "javascript": (
+        "tree_sitter_javascript",
+        "language",
+        """
+        (function_declaration name: (identifier) @name) @definition.function
+        (class_declaration name: (identifier) @name) @definition.class
+        (method_definition name: (property_identifier) @name) @definition.method
+        """,
+    ),
+    "typescript": (
+        "tree_sitter_typescript",
+        "language_typescript",
+        """
+        (function_declaration name: (identifier) @name) @definition.function
+        (class_declaration name: (type_identifier) @name) @definition.class
+        (method_definition name: (property_identifier) @name) @definition.method
+        (interface_declaration name: (type_identifier) @name) @definition.interface
+        """,
+    ),
+    "go": (
+        "tree_sitter_go",
+        "language",
+        """
+        (function_declaration name: (identifier) @name) @definition.function
+        (method_declaration name: (field_identifier) @name) @definition.method
+        (type_spec name: (type_identifier) @name) @definition.type
+        """,
+    ),
+    "rust": (
+        "tree_sitter_rust",
+        "language",
+        """
+        (function_item name: (identifier) @name) @definition.function
+        (struct_item name: (type_identifier) @name) @definition.struct
+        (enum_item name: (type_identifier) @name) @definition.enum
+        (trait_item name: (type_identifier) @name) @definition.trait
+        """,
+    ),
+}
+EXTENSIONS = {
+    ".py": "python",
+    ".js": "javascript",
+    ".jsx": "javascript",
+    ".mjs": "javascript",
+    ".ts": "typescript",
+    ".go": "go",
+    ".rs": "rust",
+}
+
+
+@dataclass
+class Definition:
+    """A named definition found by a language's definitions query"""
+
+    name: str
+    kind: str
+    start_line: int
+    end_line: int
+
+
+def available() -> bool:
+    """Returns True when the tree_sitter package is installed"""
+    return importlib.util.find_spec("tree_sitter") is not None
+
+
+def language_for(path: str) -> Optional[str]:
+    return EXTENSIONS.get(os.path.splitext(path)[1])
+
+
+def _line_offsets(source: bytes) -> List[int]:
+    """Returns the byte offset of every line start, plus the end of source"""
+    offsets = [0]
+    position = source.find(b"\n")
+    while position >= 0:
+        offsets.append(position + 1)
+        position = source.find(b"\n", position + 1)
+    if offsets[-1] != len(source):
+        offsets.append(len(source))
+    return offsets
+
+
+def _point(source: bytes, offset: int) -> Tuple[int, int]:
+    row = source.count(b"\n", 0, offset)
+    return row, offset - (source.rfind(b"\n", 0, offset) + 1)
+
+
+def _end_point(start_row: int, text: bytes) -> Tuple[int, int]:
+    """Returns where text ends when it is inserted at the start of a row"""
+    return start_row + text.count(b"\n"), len(text) - (text.rfind(b"\n") + 1)
+
+
+def _single_edit(old: bytes, new: bytes) -> Optional[Tuple[int, int, int]]:
+    """Returns (start, old_end, new_end) of the one region that changed"""
+    if old == new:
+        return None
+    limit = min(len(old), len(new))
+    start = 0
+    while start < limit and old[start] == new[start]:
+        start += 1
+    suffix = 0
+    while (
+        suffix < limit - start
+        and old[len(old) - 1 - suffix] == new[len(new) - 1 - suffix]
+    ):
+        suffix += 1
+    return start, len(old) - suffix, len(new) - suffix
+
+
+def patch_edits(source: bytes, patch: FilePatch) -> Tuple[bytes, List[Tuple]]:
+    """Applies a file patch at its header positions, returning the edits
+
+    Edits are (start_line, old_line_count, new_lines) in descending order, so
+    each one can be passed to Tree.edit without shifting the ones after it.
+    Raises ValueError if a hunk's old lines are not where its header says.
+    """
+    lines = source.splitlines(keepends=True)
+    edits = []
+    for hunk in reversed(patch.hunks):
+        old: List[bytes] = []
+        new: List[bytes] = []
+        for line in hunk.lines:
+            prefix, text = line[:1], line[1:].encode("utf-8", "surrogateescape")
+            if prefix == "\\":
+                # The previous line has no newline at end of file
+                for side in (old, new):
+                    if side and side[-1].endswith(b"\n"):
+                        side[-1] = side[-1][:-1]
+                continue
+            if prefix in (" ", "", "-"):
+                old.append(text + b"\n")
+            if prefix in (" ", "", "+"):
+                new.append(text + b"\n")
+
+        start = hunk.old_start - 1 if hunk.old_count else hunk.old_start
+        current = lines[start : start + len(old)]
+        if [line.rstrip(b"\r\n") for line in current] != [
+            line.rstrip(b"\n") for line in old
+        ]:
+            raise ValueError(f"{patch.path}: hunk {hunk.header()} does not match")
+        if current and not current[-1].endswith(b"\n") and new:
+            new[-1] = new[-1].rstrip(b"\n")
+        lines[start : start + len(old)] = new
+        edits.append((start, len(old), new))
+    return b"".join(lines), edits
+
+
+def _digest(language: Optional[str], source: bytes) -> str:
+    return hashlib.sha1(f"{language}\0".encode() + source).hexdigest()
+
+
+class ParseService:
+    """Caches tree-sitter syntax trees and re-parses them incrementally
+
+    Trees are cached per content hash (so unchanged files are never parsed
+    twice) and per path (so a changed file is re-parsed from its previous
+    tree, with edits from a diff or from comparing the two versions).
+    Requires the optional tree_sitter package and the grammar packages of
+    the languages used.
+    """
+
+    def __init__(self, max_trees: int = MAX_TREES):
+        self.max_trees = max_trees
+        self._trees: "OrderedDict[str, Any]" = OrderedDict()
+        self._files: Dict[str, Tuple[str, bytes, Any]] = {}
+        self._parsers: Dict[str, Any] = {}
+        self._queries: Dict[str, Any] = {}
+        self.parses = 0
+
+    def _parser(self, language: str) -> Any:
+        if language not in self._parsers:
+            import tree_sitter
+
+            module_name, function, definitions = LANGUAGES[language]
+            grammar = importlib.import_module(module_name)
+            lang = tree_sitter.Language(getattr(grammar, function)())
+            self._parsers[language] = tree_sitter.Parser(lang)
+            self._queries[language] = tree_sitter.Query(lang, definitions)
+        return self._parsers[language]
+
+    def _remember(self, path: str, digest: str, source: bytes, tree: Any) -> Any:
+        self._trees[digest] = tree
+        self._trees.move_to_end(digest)
+        while len(self._trees) > self.max_trees:
+            self._trees.popitem(last=False)
+        self._files[path] = (digest, source, tree)
+        return tree
+
+    def parse(self, path: str, source: Optional[bytes] = None) -> Any:
+        """Returns the syntax tree of a file, reading it if source is None"""
+        language = language_for(path)
+        if language is None:
+            raise ValueError(f"{path}: no tree-sitter grammar for this file type")
+        if source is None:
+            with open(path, "rb") as f:
+                source = f.read()
+
+        digest = _digest(language, source)
+        if digest in self._trees:
+            return self._remember(path, digest, source, self._trees[digest])
+
+        parser = self._parser(language)
+        previous = self._files.get(path)
+        old_tree = None
+        if previous is not None:
+            _, old_source, cached = previous
+            edit = _single_edit(old_source, source)
+            if edit is None:
+                return self._remember(path, digest, source, cached)
+            old_tree = cached.copy()
+            start, old_end, new_end = edit
+            old_tree.edit(
+                start,
+                old_end,
+                new_end,
+                _point(old_source, start),
+                _point(old_source, old_end),
+                _point(source, new_end),
+            )
+
+        self.parses += 1
+        tree = parser.parse(source, old_tree) if old_tree else parser.parse(source)
+        return self._remember(path, digest, source, tree)
+
+    def apply_patch(self, path: str, patch: FilePatch) -> Any:
+        """Re-parses a cached file after a diff, using the hunks as edits
+
+        Falls back to a full parse of the file on disk when the file is not
+        cached or the diff does not match the cached version.
+        """
+        previous = self._files.get(path)
+        if previous is None:
+            return self.parse(path)
+
+        _, old_source, cached = previous
+        try:
+            source, edits = patch_edits(old_source, patch)
+        except ValueError:
+            return self.parse(path)
+
+        digest = _digest(language_for(path), source)
+        if digest in self._trees:
+            return self._remember(path, digest, source, self._trees[digest])
+
+        offsets = _line_offsets(old_source)
+        tree = cached.copy()
+        for start, old_count, new_lines in edits:
+            start_byte = offsets[min(start, len(offsets) - 1)]
+            old_end = offsets[min(start + old_count, len(offsets) - 1)]
+            inserted = b"".join(new_lines)
+            tree.edit(
+                start_byte,
+                old_end,
+                start_byte + len(inserted),
+                _point(old_source, start_byte),
+                _point(old_source, old_end),
+                _end_point(start, inserted),
+            )
+
+        self.parses += 1
+        tree = self._parser(language_for(path)).parse(source, tree)
+        return self._remember(path, digest, source, tree)
+
+    def query(self, path: str, query: str, source: Optional[bytes] = None) -> Dict:
+        """Runs a tree-sitter query on a file, returning captures by name"""
+        import tree_sitter
+
+        tree = self.parse(path, source)
+        compiled = tree_sitter.Query(tree.language, query)
+        return tree_sitter.QueryCursor(compiled).captures(tree.root_node)
+
+    def definitions(
+        self, path: str, source: Optional[bytes] = None
+    ) -> List[Definition]:
+        """Returns the functions, classes and other definitions in a file"""
+        import tree_sitter
+
+        tree = self.parse(path, source)
+        language = language_for(path)
+        self._parser(language)
+        query = self._queries[language]
+        found = []
+        for _, captures in tree_sitter.QueryCursor(query).matches(tree.root_node):
+            name = captures["name"][0]
+            kind, node = next(
+                (key.split(".", 1)[1], nodes[0])
+                for key, nodes in captures.items()
+                if key.startswith("definition.")
+            )
+            found.append(
+                Definition(
+                    name.text.decode("utf-8", "replace"),
+                    kind,
+                    node.start_point[0] + 1,
+                    node.end_point[0] + 1,
+                )
+            )
+        found.sort(key=lambda definition: definition.start_line)
+        return found
+
+    def changed_definitions(self, path: str, patch: FilePatch) -> List[Definition]:
+        """Returns the definitions of the new version that a diff touches"""
+        self.apply_patch(path, patch)
+        changed = set()
+        for hunk in patch.hunks:
+            # An empty new side starts after the line its header names
+            line = hunk.new_start if hunk.new_count else hunk.new_start + 1
+            for text in hunk.lines:
+                prefix = text[:1]
+                if prefix == "+":
+                    changed.add(line)
+                elif prefix == "-":
+                    # A removed line sat between these two, and either may
+                    # belong to the definition that lost it
+                    changed.update((line - 1, line))
+                if prefix in (" ", "+", ""):
+                    line += 1
+
+        return [
+            definition
+            for definition in self.definitions(path, self._files[path][1])
+            if any(
+                definition.start_line <= line <= definition.end_line
+                for line in changed
+            )
+        ]
@@ -0,0 +1,287 @@
+import ast
+import hashlib
+import os
+import sqlite3
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from ai_dev_toolkit.utils.ai.context import list_repo_files
+from ai_dev_toolkit.utils.misc.utils import get_cache_dir
+
+SCHEMA_VERSION = "1"
+# Below this many files, starting worker processes costs more than it saves
+PARALLEL_THRESHOLD = 64
+PARALLEL_CHUNK_SIZE = 16
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, size INTEGER, mtime REAL, dirty INTEGER
+);
+CREATE TABLE IF NOT EXISTS definitions (
+    name TEXT, qualname TEXT, kind TEXT, path TEXT, line INTEGER, end_line INTEGER
+);
+CREATE TABLE IF NOT EXISTS refs (name TEXT, path TEXT, line INTEGER);
+CREATE INDEX IF NOT EXISTS definitions_name ON definitions (name);
+CREATE INDEX IF NOT EXISTS definitions_path ON definitions (path);
+CREATE INDEX IF NOT EXISTS refs_name ON refs (name);
+CREATE INDEX IF NOT EXISTS refs_path ON refs (path);
+"""
+
+
+@dataclass
+class Symbol:
+    """A definition of, or reference to, a name at a file location"""
+
+    name: str
+    path: str
+    line: int
+    kind: str = "reference"
+    qualname: str = ""
+    end_line: int = 0
+
+
+def extract_python_symbols(
+    source: bytes,
+) -> Tuple[List[Tuple[str, str, str, int, int]], List[Tuple[str, int]]]:
+    """Returns (definitions, references) of Python source
+
+    Definitions are (name, qualname, kind, line, end_line) for classes,
+    functions and methods; references are (name, line) for every name that
+    is loaded, called, imported or accessed as an attribute. Files that don't parse
+    yield nothing.
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return [], []
+
+    definitions: List[Tuple[str, str, str, int, int]] = []
+    references: List[Tuple[str, int]] = []
+
+    def visit(node: ast.AST, scope: List[str], in_class: bool) -> None:
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                kind = "method" if in_class else "function"
+            elif isinstance(child, ast.ClassDef):
+                kind = "class"
+            else:
+                if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Load):
+                    references.append((child.id, child.lineno))
+                elif isinstance(child, ast.Attribute):
+                    references.append((child.attr, child.lineno))
+                elif isinstance(child, ast.alias):
+                    name = child.name.rsplit(".", 1)[-1]
+                    references.append((name, getattr(child, "lineno", node.lineno)))
+                visit(child, scope, in_class)
+                continue
+
+            qualname = ".".join(scope + [child.name])
+            end_line = getattr(child, "end_lineno", None) or child.lineno
+            definitions.append((child.name, qualname, kind, child.lineno, end_line))
+            visit(child, scope + [child.name], kind == "class")
+
+    visit(tree, [], False)
+    return definitions, references
+
+
+def _scan(item: Tuple[str, str]) -> Tuple[str, List, List]:
+    """Reads and parses one file; runs in worker processes"""
+    root, path = item
+    try:
+        with open(os.path.join(root, path), "rb") as f:
+            source = f.read()
+    except OSError:
+        return path, [], []
+    definitions, references = extract_python_symbols(source)
+    return path, definitions, references
+
+
+def _git(root: str, *args: str) -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", *args],
+            cwd=root,
+            capture_output=True,
+            text=True,
+            errors="surrogateescape",
+            check=True,
+        ).stdout
+    except (subprocess.CalledProcessError, OSError):
+        return None
+
+
+class SymbolIndex:
+    """Persistent index of Python definitions and references in a repository
+
+    Stored as SQLite in the toolkit cache, one database per repository. The
+    first update() parses every Python file, in a process pool for large
+    trees; later ones only look at files `git diff --name-only` reports
+    since the last indexed commit, plus untracked and previously dirty
+    files.
+    """
+
+    def __init__(self, root: str = ".", db_path: Optional[str] = None):
+        self.root = os.path.abspath(root)
+        if db_path is None:
+            digest = hashlib.sha1(self.root.encode()).hexdigest()[:16]
+            db_path = str(get_cache_dir("symbols") / f"{digest}.sqlite")
+        self.db = sqlite3.connect(db_path)
+        self.db.executescript(SCHEMA)
+        if self._meta("version") != SCHEMA_VERSION:
+            self.db.executescript(
+                "DELETE FROM files; DELETE FROM definitions; DELETE FROM refs;"
+            )
+            self._set_meta("version", SCHEMA_VERSION)
+            self._set_meta("head", "")
+            self.db.commit()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def _meta(self, key: str) -> Optional[str]:
+        query = "SELECT value FROM meta WHERE key = ?"
+        row = self.db.execute(query, (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def _changed(self, *args: str) -> Optional[Set[str]]:
+        output = _git(self.root, *args, "-z")
+        if output is None:
+            return None
+        return {path for path in output.split("\0") if path}
+
+    def _candidates(self) -> Tuple[Optional[Set[str]], Set[str]]:
+        """Returns (paths to check, or None for all; paths differing from HEAD)"""
+        head = (_git(self.root, "rev-parse", "HEAD") or "").strip()
+        indexed = self._meta("head")
+        untracked = self._changed("ls-files", "-o", "--exclude-standard")
+        dirty = (self._changed("diff", "--name-only", "HEAD") or set()) | (
+            untracked or set()
+        )
+        if not head or not indexed or untracked is None:
+            return None, dirty
+
+        changed = self._changed("diff", "--name-only", indexed)
+        if changed is None:
+            # The indexed commit is gone (e.g. after a rebase); rescan
+            return None, dirty
+        candidates = changed | dirty
+        candidates.update(
+            row[0] for row in self.db.execute("SELECT path FROM files WHERE dirty")
+        )
+        return candidates, dirty
+
+    def update(self, max_workers: Optional[int] = None) -> int:
+        """Brings the index up to date and returns how many files were parsed"""
+        candidates, dirty = self._candidates()
+        if candidates is None:
+            paths = [
+                path for path in list_repo_files(self.root) if path.endswith(".py")
+            ]
+            known = {row[0] for row in self.db.execute("SELECT path FROM files")}
+            candidates = set(paths) | known
+
+        stale: List[str] = []
+        removed: List[str] = []
+        unchanged: List[Tuple[int, str]] = []
+        for path in sorted(candidates):
+            if not path.endswith(".py"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.root, path))
+            except OSError:
+                removed.append(path)
+                continue
+            row = self.db.execute(
+                "SELECT size, mtime FROM files WHERE path = ?", (path,)
+            ).fetchone()
+            if row != (stat.st_size, stat.st_mtime):
+                stale.append(path)
+            else:
+                unchanged.append((int(path in dirty), path))
+
+        items = [(self.root, path) for path in stale]
+        if len(items) >= PARALLEL_THRESHOLD:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                results = list(pool.map(_scan, items, chunksize=PARALLEL_CHUNK_SIZE))
+        else:
+            results = [_scan(item) for item in items]
+
+        with self.db:
+            self.db.executemany("UPDATE files SET dirty = ? WHERE path = ?", unchanged)
+            for path in removed + stale:
+                self._forget(path)
+            for path, definitions, references in results:
+                stat = os.stat(os.path.join(self.root, path))
+                self.db.execute(
+                    "INSERT INTO files VALUES (?, ?, ?, ?)",
+                    (path, stat.st_size, stat.st_mtime, int(path in dirty)),
+                )
+                self.db.executemany(
+                    "INSERT INTO definitions VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (name, qualname, kind, path, line, end_line)
+                        for name, qualname, kind, line, end_line in definitions
+                    ],
+                )
+                self.db.executemany(
+                    "INSERT INTO refs VALUES (?, ?, ?)",
+                    [(name, path, line) for name, line in references],
+                )
+            head = (_git(self.root, "rev-parse", "HEAD") or "").strip()
+            self._set_meta("head", head)
+        return len(stale)
+
+    def _forget(self, path: str) -> None:
+        for table in ("files", "definitions", "refs"):
+            self.db.execute(f"DELETE FROM {table} WHERE path = ?", (path,))
+
+    def definitions(self, name: str) -> List[Symbol]:
+        """Returns where a name (or a dotted qualname) is defined"""
+        column = "qualname" if "." in name else "name"
+        rows = self.db.execute(
+            "SELECT name, path, line, kind, qualname, end_line FROM definitions "
+            f"WHERE {column} = ? ORDER BY path, line",
+            (name,),
+        )
+        return [Symbol(*row) for row in rows]
+
+    def references(self, name: str) -> List[Symbol]:
+        """Returns every place a name is used"""
+        rows = self.db.execute(
+            "SELECT name, path, line FROM refs WHERE name = ? ORDER BY path, line",
+            (name.rsplit(".", 1)[-1],),
+        )
+        return [Symbol(*row) for row in rows]
+
+    def search(self, pattern: str, limit: int = 50) -> List[Symbol]:
+        """Returns definitions whose name matches a glob (case-sensitive)"""
+        if not any(char in pattern for char in "*?["):
+            pattern = f"*{pattern}*"
+        rows = self.db.execute(
+            "SELECT name, path, line, kind, qualname, end_line FROM definitions "
+            "WHERE name GLOB ? ORDER BY length(name), name, path LIMIT ?",
+            (pattern, limit),
+        )
+        return [Symbol(*row) for row in rows]
+
+    def callers(self, name: str, exclude: Iterable[str] = ()) -> Dict[str, List[int]]:
+        """Returns the lines that use a name, grouped by file
+
+        Lines where the name is defined are left out, as are files in
+        `exclude`.
+        """
+        defined = {(symbol.path, symbol.line) for symbol in self.definitions(name)}
+        skip = set(exclude)
+        found: Dict[str, List[int]] = {}
+        for symbol in self.references(name):
+            if symbol.path in skip or (symbol.path, symbol.line) in defined:
+                continue
+            lines = found.setdefault(symbol.path, [])
+            if symbol.line not in lines:
+                lines.append(symbol.line)
+        return found
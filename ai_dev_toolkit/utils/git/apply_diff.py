@@ -0,0 +1,277 @@
+import subprocess
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from ai_dev_toolkit.utils.git.patch import FilePatch, Hunk, parse_diff
+from ai_dev_toolkit.utils.misc.files import atomic_write
+
+# How far (in lines) a hunk may be found from the position its header claims
+MAX_OFFSET = 1000
+# How many leading/trailing context lines may be ignored, like patch --fuzz
+FUZZ = 2
+
+ENCODING = "utf-8"
+ERRORS = "surrogateescape"
+
+
+def _exact(line: str) -> str:
+    return line.rstrip("\r\n")
+
+
+def _loose(line: str) -> str:
+    # Model output often gets indentation or trailing whitespace slightly wrong
+    return " ".join(line.split())
+
+
+def _body(hunk: Hunk) -> List[Tuple[str, str, bool]]:
+    """Returns hunk lines as (prefix, text, ends_with_newline)"""
+    body: List[Tuple[str, str, bool]] = []
+    for line in hunk.lines:
+        if line.startswith("\\"):
+            if body:
+                prefix, text, _ = body[-1]
+                body[-1] = (prefix, text, False)
+            continue
+        body.append((line[:1] or " ", line[1:], True))
+    return body
+
+
+def _fuzz_steps(body: List[Tuple[str, str, bool]], fuzz: int) -> List[Tuple[int, int]]:
+    """Returns (leading, trailing) context line counts to ignore, in order
+
+    Like GNU patch, fuzz never ignores every context line of a hunk that has
+    some, so at least one of them must still match where it is applied.
+    """
+    leading = next((i for i, item in enumerate(body) if item[0] != " "), len(body))
+    trailing = next(
+        (i for i, item in enumerate(reversed(body)) if item[0] != " "), len(body)
+    )
+    steps = [(0, 0)]
+    for step in range(1, fuzz + 1):
+        trim = (min(step, leading), min(step, trailing))
+        trims = [trim]
+        if sum(trim) >= leading + trailing:
+            # Keep the innermost context line on one side or the other
+            trims = [(trim[0], trim[1] - 1), (trim[0] - 1, trim[1])]
+        for trim in trims:
+            if min(trim) >= 0 and trim not in steps:
+                steps.append(trim)
+    return steps
+
+
+def _find(
+    lines: List[str],
+    old: List[str],
+    start: int,
+    target: int,
+    max_offset: int,
+    normalize: Callable[[str], str],
+    cache: Dict,
+) -> int:
+    """Returns where old lines occur at or after start, nearest target, or -1"""
+    if not old:
+        return min(max(target, start), len(lines))
+
+    if normalize not in cache:
+        normalized = [normalize(line) for line in lines]
+        index: Dict[str, List[int]] = {}
+        for position, line in enumerate(normalized):
+            index.setdefault(line, []).append(position)
+        cache[normalize] = (normalized, index)
+    normalized, index = cache[normalize]
+
+    wanted = [normalize(line) for line in old]
+    positions = index.get(wanted[0], [])
+    low = max(start, target - max_offset)
+    high = min(len(lines) - len(old), target + max_offset)
+    candidates = positions[bisect_left(positions, low) : bisect_right(positions, high)]
+
+    for position in sorted(candidates, key=lambda p: abs(p - target)):
+        if normalized[position : position + len(wanted)] == wanted:
+            return position
+    return -1
+
+
+def patch_text(
+    content: str, patch: FilePatch, max_offset: int = MAX_OFFSET, fuzz: int = FUZZ
+) -> str:
+    """Applies the hunks of a file patch to text and returns the result
+
+    Each hunk is searched for near the line its header names, shifted by the
+    drift of the hunks before it: first exactly, then ignoring whitespace
+    differences, then ignoring up to `fuzz` lines of outer context. Raises
+    ValueError when a hunk cannot be placed.
+    """
+    lines = content.splitlines(keepends=True)
+    newline = "\r\n" if lines and lines[0].endswith("\r\n") else "\n"
+    output: List[str] = []
+    cache: Dict = {}
+    pos = drift = 0
+
+    for hunk in patch.hunks:
+        body = _body(hunk)
+        found = None
+        for leading, trailing in _fuzz_steps(body, fuzz):
+            part = body[leading : len(body) - trailing]
+            old = [text for prefix, text, _ in part if prefix != "+"]
+            expected = hunk.old_start - 1 + leading
+            if hunk.old_count == 0:
+                expected = hunk.old_start
+            for normalize in (_exact, _loose):
+                at = _find(
+                    lines, old, pos, expected + drift, max_offset, normalize, cache
+                )
+                if at >= 0:
+                    found = (at, part, expected)
+                    break
+            if found:
+                break
+
+        if found is None:
+            raise ValueError(f"{patch.path}: hunk {hunk.header()} does not apply")
+
+        at, part, expected = found
+        output.extend(lines[pos:at])
+        position = at
+        for prefix, text, ends_with_newline in part:
+            if prefix == " ":
+                output.append(lines[position])
+                position += 1
+            elif prefix == "-":
+                position += 1
+            else:
+                if output and not output[-1].endswith(("\n", "\r")):
+                    output[-1] += newline
+                output.append(text + (newline if ends_with_newline else ""))
+        pos = position
+        drift = at - expected
+
+    output.extend(lines[pos:])
+    return "".join(output)
+
+
+def _read(path: Path) -> Optional[str]:
+    if not path.exists():
+        return None
+    with open(path, "r", encoding=ENCODING, errors=ERRORS, newline="") as f:
+        return f.read()
+
+
+def _write(path: Path, content: Optional[str]) -> None:
+    if content is None:
+        if path.exists():
+            path.unlink()
+        return
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_write(str(path)) as out:
+        out.write(content.encode(ENCODING, ERRORS))
+
+
+def _plan(
+    patches: List[FilePatch], root: Path, max_offset: int, fuzz: int
+) -> List[Tuple[Path, Optional[str], Optional[str]]]:
+    """Patches every file in memory, returning (path, original, new) triples
+
+    Sections for a path already patched (a diff may split one file into
+    several sections) apply on top of the earlier result, not the disk.
+    """
+    # Each touched path's content on disk and after the patches so far
+    originals: Dict[Path, Optional[str]] = {}
+    contents: Dict[Path, Optional[str]] = {}
+
+    def current(path: Path) -> Optional[str]:
+        if path not in contents:
+            originals[path] = contents[path] = _read(path)
+        return contents[path]
+
+    for patch in patches:
+        source = root / patch.old_path if patch.old_path else None
+        original = current(source) if source else ""
+        if original is None:
+            raise ValueError(f"{patch.old_path}: file not found")
+        target = root / patch.new_path if patch.new_path else None
+        if source is None and current(target) is not None:
+            raise ValueError(f"{patch.new_path}: file already exists")
+
+        content = patch_text(original, patch, max_offset, fuzz)
+        if source is not None and source != target:
+            contents[source] = None
+        if target is not None:
+            current(target)
+            contents[target] = content
+
+    return [
+        (path, originals[path], content)
+        for path, content in contents.items()
+        if content != originals[path]
+    ]
+
+
+def _git_apply(diff: str, root: str) -> Tuple[bool, str]:
+    """Applies a diff with git, which is all-or-nothing by default"""
+    try:
+        result = subprocess.run(
+            ["git", "apply", "--recount", "--whitespace=nowarn", "-"],
+            input=diff,
+            cwd=root,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return True, result.stdout
+    except subprocess.CalledProcessError as e:
+        return False, e.stderr
+    except OSError as e:
+        return False, str(e)
+
+
+def apply_diff(
+    diff: str,
+    root: str = ".",
+    max_offset: int = MAX_OFFSET,
+    fuzz: int = FUZZ,
+    fallback: bool = True,
+) -> Tuple[bool, str]:
+    """Applies a unified diff to files under root without spawning processes
+
+    Every file is patched in memory before anything is written, and writes
+    are rolled back if one of them fails, so a multi-file patch applies
+    completely or not at all. Binary patches, and patches that cannot be
+    placed in-process, are handed to `git apply` when `fallback` is set.
+    """
+    patches = parse_diff(diff)
+    if not patches:
+        return False, "No file patches found in diff"
+
+    if any(patch.binary for patch in patches):
+        if fallback:
+            return _git_apply(diff, root)
+        return False, "Binary patches require git apply"
+
+    base = Path(root)
+    try:
+        changes = _plan(patches, base, max_offset, fuzz)
+    except (ValueError, OSError) as e:
+        if not fallback:
+            return False, str(e)
+        applied, message = _git_apply(diff, root)
+        if applied:
+            return True, message
+        return False, f"{e}\n{message}".strip()
+
+    written: List[Tuple[Path, Optional[str], Optional[str]]] = []
+    try:
+        for change in changes:
+            path, _, content = change
+            _write(path, content)
+            written.append(change)
+    except OSError as e:
+        for path, original, _ in reversed(written):
+            try:
+                _write(path, original)
+            except OSError:
+                pass
+        return False, str(e)
+
+    return True, f"Applied changes to {len(changes)} file(s)"
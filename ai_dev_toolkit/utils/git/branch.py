@@ -1,5 +1,47 @@
 import subprocess
-from typing import List, Tuple, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from ai_dev_toolkit.utils.git.status import get_status
+
+# Branches passed to one git branch -d, well under any command line limit
+DELETE_BATCH = 1000
+# Never removed by prune_branches
+PROTECTED_BRANCHES = ("main", "master", "develop")
+
+# Fields of one for-each-ref line, separated by NULs (ref names can't hold
+# NULs or newlines)
+REF_FIELDS = [
+    "%(refname)",
+    "%(objectname)",
+    "%(upstream:short)",
+    "%(upstream:track,nobracket)",
+    "%(committerdate:unix)",
+    "%(authorname)",
+    "%(HEAD)",
+    "%(symref)",
+]
+
+
+@dataclass
+class BranchInfo:
+    """A branch and its metadata, as listed by get_branches"""
+
+    name: str
+    commit: str
+    upstream: Optional[str]
+    # Commits ahead of and behind the upstream
+    ahead: int
+    behind: int
+    # The upstream branch was deleted on the remote
+    gone: bool
+    # Unix time and author of the last commit
+    date: int
+    author: str
+    # Reachable from the base given to get_branches
+    merged: bool
+    current: bool
 
 
 def create_branch(name: str, base: Optional[str] = None) -> bool:
@@ -23,8 +65,20 @@ def switch_branch(name: str) -> bool:
         return False
 
 
-def merge_branch(source: str, target: Optional[str] = None) -> Tuple[bool, str]:
-    """Merges source branch into target"""
+def merge_branch(
+    source: str, target: Optional[str] = None, preflight: bool = False
+) -> Tuple[bool, str]:
+    """Merges source branch into target
+
+    With preflight, the merge is first done in memory with preview_merge,
+    and nothing is checked out or merged if it would conflict.
+    """
+    if preflight:
+        preview = preview_merge(source, target or "HEAD")
+        if preview.error:
+            return False, preview.error
+        if not preview.clean:
+            return False, "Merge would conflict in: " + ", ".join(preview.conflicts)
     try:
         if target:
             subprocess.run(["git", "checkout", target], check=True)
@@ -37,6 +91,101 @@ def merge_branch(source: str, target: Optional[str] = None) -> Tuple[bool, str]:
         return False, e.stderr
 
 
+def get_current_branch(refresh: bool = False) -> Optional[str]:
+    """Returns the checked out branch, None if HEAD is detached"""
+    status = get_status(refresh=refresh)
+    return status.branch if status else None
+
+
+def get_tracking_status(refresh: bool = False) -> Tuple[Optional[str], int, int]:
+    """Returns the upstream of the current branch and (ahead, behind) counts"""
+    status = get_status(refresh=refresh)
+    if status is None:
+        return None, 0, 0
+    return status.upstream, status.ahead, status.behind
+
+
+@dataclass
+class MergePreview:
+    """The predicted outcome of merging source into target"""
+
+    source: str
+    target: str
+    clean: bool
+    # The tree the merge would produce, conflict markers included
+    tree: Optional[str] = None
+    conflicts: List[str] = field(default_factory=list)
+    # Set when git couldn't merge at all, e.g. for an unknown branch
+    error: Optional[str] = None
+
+
+def preview_merge(source: str, target: str = "HEAD") -> MergePreview:
+    """Predicts whether merging source into target conflicts
+
+    git merge-tree --write-tree merges in memory, writing only objects, so
+    neither the working tree, the index nor any branch is touched.
+    """
+    result = subprocess.run(
+        [
+            "git",
+            "merge-tree",
+            "--write-tree",
+            "--name-only",
+            "--no-messages",
+            "-z",
+            target,
+            source,
+        ],
+        capture_output=True,
+        text=True,
+        errors="surrogateescape",
+    )
+    records = result.stdout.split("\0")
+    # Exit status 1 means conflicts, but git also uses it for some errors;
+    # only a merge that ran prints the tree
+    if result.returncode not in (0, 1) or not records[0]:
+        error = result.stderr.strip() or f"git merge-tree exited {result.returncode}"
+        return MergePreview(source, target, False, error=error)
+    conflicts = list(dict.fromkeys(path for path in records[1:] if path))
+    return MergePreview(
+        source, target, result.returncode == 0, records[0], conflicts
+    )
+
+
+def preview_merges(
+    sources: Iterable[str], target: str = "HEAD", max_workers: Optional[int] = None
+) -> Dict[str, MergePreview]:
+    """Predicts the merge of each source into target, concurrently
+
+    The target is resolved to a commit first, so every source is checked
+    against the same commit even if the target branch moves meanwhile.
+    """
+    sources = list(dict.fromkeys(sources))
+    if not sources:
+        return {}
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--verify", "--quiet", f"{target}^{{commit}}"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except subprocess.CalledProcessError:
+        error = f"Unknown merge target: {target}"
+        return {
+            source: MergePreview(source, target, False, error=error)
+            for source in sources
+        }
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        previews = pool.map(lambda source: preview_merge(source, commit), sources)
+        results = {}
+        for source, preview in zip(sources, previews):
+            preview.target = target
+            results[source] = preview
+    return results
+
+
 def list_branches(remote: bool = False) -> List[str]:
     """Lists all branches"""
     try:
@@ -52,6 +201,151 @@ def list_branches(remote: bool = False) -> List[str]:
         return []
 
 
+def _parse_track(track: str) -> Tuple[int, int, bool]:
+    """Parses "ahead 2, behind 3" or "gone" into (ahead, behind, gone)"""
+    if track == "gone":
+        return 0, 0, True
+    counts = {"ahead": 0, "behind": 0}
+    for part in track.split(", "):
+        if " " in part:
+            key, number = part.split(" ", 1)
+            counts[key] = int(number)
+    return counts["ahead"], counts["behind"], False
+
+
+def _for_each_ref(args: List[str]) -> str:
+    return subprocess.run(
+        ["git", "for-each-ref", *args],
+        capture_output=True,
+        text=True,
+        errors="surrogateescape",
+        check=True,
+    ).stdout
+
+
+def get_branches(remote: bool = False, base: str = "HEAD") -> List[BranchInfo]:
+    """Lists branches with their upstream, last commit and merged status
+
+    Everything but the merged status comes from one for-each-ref call; a
+    second one lists the branches merged into `base`. The cost doesn't grow
+    with the number of branches the way a call per branch does.
+    """
+    prefix = "refs/remotes/" if remote else "refs/heads/"
+    try:
+        output = _for_each_ref(["--format=" + "%00".join(REF_FIELDS), prefix])
+        merged = set(
+            _for_each_ref(
+                ["--format=%(refname)", f"--merged={base}", prefix]
+            ).splitlines()
+        )
+    except subprocess.CalledProcessError:
+        return []
+
+    branches = []
+    for line in output.splitlines():
+        fields = line.split("\0")
+        if len(fields) != len(REF_FIELDS):
+            continue
+        ref, commit, upstream, track, date, author, head, symref = fields
+        if symref:
+            # e.g. origin/HEAD, an alias of another remote branch
+            continue
+        ahead, behind, gone = _parse_track(track)
+        branches.append(
+            BranchInfo(
+                name=ref[len(prefix) :],
+                commit=commit,
+                upstream=upstream or None,
+                ahead=ahead,
+                behind=behind,
+                gone=gone,
+                date=int(date or 0),
+                author=author,
+                merged=ref in merged,
+                current=head == "*",
+            )
+        )
+    return branches
+
+
+def _local_branches() -> Set[str]:
+    return set(
+        _for_each_ref(["--format=%(refname:strip=2)", "refs/heads/"]).splitlines()
+    )
+
+
+def delete_branches(
+    names: Iterable[str], force: bool = False
+) -> Tuple[List[str], List[str]]:
+    """Deletes many branches with one git branch call per DELETE_BATCH names
+
+    git keeps going past branches it refuses to delete (unmerged ones
+    without force, the current branch), so what was deleted is found by
+    comparing the branches before and after. Returns (deleted, failed);
+    names of branches that don't exist count as failed.
+    """
+    names = list(dict.fromkeys(names))
+    if not names:
+        return [], []
+    try:
+        existing = _local_branches()
+    except subprocess.CalledProcessError:
+        return [], names
+
+    flag = "-D" if force else "-d"
+    present = [name for name in names if name in existing]
+    for start in range(0, len(present), DELETE_BATCH):
+        batch = present[start : start + DELETE_BATCH]
+        subprocess.run(
+            ["git", "branch", flag, "--", *batch], capture_output=True, text=True
+        )
+
+    try:
+        left = _local_branches()
+    except subprocess.CalledProcessError:
+        return [], names
+    deleted = [name for name in present if name not in left]
+    failed = [name for name in names if name in left or name not in existing]
+    return deleted, failed
+
+
+def prune_branches(
+    merged: bool = True,
+    older_than_days: Optional[float] = None,
+    base: str = "HEAD",
+    keep: Iterable[str] = PROTECTED_BRANCHES,
+    dry_run: bool = False,
+) -> List[str]:
+    """Deletes the local branches that are merged into base and/or stale
+
+    With merged, only branches merged into `base` qualify; with
+    older_than_days, only branches whose last commit is older. Without
+    merged, stale branches are deleted even when unmerged. The current
+    branch and `keep` are never deleted. Returns the names deleted, or that
+    would be with dry_run.
+    """
+    if not merged and older_than_days is None:
+        raise ValueError("Nothing selects branches to prune")
+
+    keep = set(keep)
+    cutoff = None
+    if older_than_days is not None:
+        cutoff = time.time() - older_than_days * 86400
+    selected = [
+        branch.name
+        for branch in get_branches(base=base)
+        if not branch.current
+        and branch.name not in keep
+        and (branch.merged or not merged)
+        and (cutoff is None or branch.date < cutoff)
+    ]
+    if dry_run:
+        return selected
+    # git branch -d only accepts branches merged into HEAD (or their
+    # upstream); merging into another base was checked above
+    return delete_branches(selected, force=not merged or base != "HEAD")[0]
+
+
 def delete_branch(name: str, force: bool = False) -> bool:
     """Deletes a branch"""
     try:
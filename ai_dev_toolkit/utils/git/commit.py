@@ -1,20 +1,167 @@
 from typing import Optional
+import hashlib
 import subprocess
 from pathlib import Path
+from ai_dev_toolkit.utils.ai.agents import get_agent, model_for, run_sync
+from ai_dev_toolkit.utils.ai.tokens import prompt_budget, run_tracked, run_tracked_sync
+from ai_dev_toolkit.utils.git.summarize import (
+    DEFAULT_TOKEN_BUDGET,
+    estimate_tokens,
+    map_reduce_diff,
+    summarize_diff,
+)
+from ai_dev_toolkit.utils.misc.utils import get_cache_dir
 
+COMMIT_MODEL = model_for("commit")
+# Diffs larger than this many token budgets are summarized in chunks first
+MAP_REDUCE_FACTOR = 4
 
-def generate_smart_commit_message(diff: str) -> str:
-    """Analyzes the changes and generates a descriptive commit message"""
-    # TODO: Implement AI-based analysis of the diff
-    # For now, return a basic message
-    if not diff:
-        return "Empty commit"
+commit_system_prompt = """
+You are a commit message assistant.
+Given a summary of staged changes (per-file stats followed by the changed lines
+of each file), write a git commit message following Conventional Commits:
+a "<type>(<optional scope>): <description>" subject of at most 72 characters,
+then a blank line and a short body explaining what changed and why.
+Files marked [generated, skipped] or [binary] only appear in the stats.
+Reply with the commit message only.
+"""
+
+chunk_system_prompt = """
+You summarize one part of a larger set of staged changes.
+Given part of a diff, or summaries of several parts, describe in at most four
+short bullet points what changed and, when it is apparent, why.
+Reply with the bullet points only.
+"""
+
+
+def _commit_agent(model: str, system_prompt: str = commit_system_prompt):
+    """Returns the commit message agent for a model"""
+    return get_agent(model, system_prompt)
 
+
+def _basic_commit_message(diff: str) -> str:
     lines = diff.splitlines()
     files_changed = sum(1 for line in lines if line.startswith("+++"))
     return f"Update {files_changed} files"
 
 
+async def generate_large_commit_message(
+    diff: str,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    model: Optional[str] = None,
+    max_concurrency: int = 4,
+) -> str:
+    """Generates a commit message for a diff too large for one model call
+
+    Chunks are summarized concurrently and the summaries reduced into one
+    message (see map_reduce_diff); chunk summaries are cached per model.
+    """
+    model = model or COMMIT_MODEL
+
+    async def summarize_chunk(text: str) -> str:
+        agent = _commit_agent(model, chunk_system_prompt)
+        result = await run_tracked(agent, text, model, "commit", chunk_system_prompt)
+        return str(result.data)
+
+    async def combine(summaries: str) -> str:
+        stats = summarize_diff(diff, token_budget, include_hunks=False)
+        prompt = f"{stats}\n\nSummaries of the changes:\n{summaries}"
+        agent = _commit_agent(model)
+        result = await run_tracked(agent, prompt, model, "commit", commit_system_prompt)
+        return str(result.data)
+
+    return await map_reduce_diff(
+        diff,
+        summarize_chunk,
+        combine,
+        token_budget,
+        max_concurrency,
+        cache_key=f"commit:{model}",
+    )
+
+
+def _ai_commit_message(diff: str, token_budget: int, model: str) -> Optional[str]:
+    """Asks the model for a message from a budgeted diff summary, if possible"""
+    token_budget = min(token_budget, prompt_budget(model, commit_system_prompt))
+    try:
+        if estimate_tokens(diff) > token_budget * MAP_REDUCE_FACTOR:
+            message = run_sync(generate_large_commit_message(diff, token_budget, model))
+            return message or None
+
+        summary = summarize_diff(diff, token_budget)
+        if not summary:
+            return None
+
+        result = run_tracked_sync(
+            _commit_agent(model), summary, model, "commit", commit_system_prompt
+        )
+        message = str(result.data).strip()
+        return message or None
+    except Exception:
+        return None
+
+
+def generate_smart_commit_message(
+    diff: str,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    model: Optional[str] = None,
+    use_ai: bool = True,
+) -> str:
+    """Analyzes the changes and generates a descriptive commit message
+
+    The diff is compressed to fit `token_budget` before one model call, or
+    map-reduced when it is more than MAP_REDUCE_FACTOR budgets large. When the
+    model is unavailable, a basic file-count message is returned.
+    """
+    if not diff:
+        return "Empty commit"
+
+    if use_ai:
+        message = _ai_commit_message(diff, token_budget, model or COMMIT_MODEL)
+        if message:
+            return message
+    return _basic_commit_message(diff)
+
+
+def generate_staged_commit_message(
+    token_budget: int = DEFAULT_TOKEN_BUDGET, model: Optional[str] = None
+) -> str:
+    """Generates a commit message for the staged changes, cached by tree SHA
+
+    `git write-tree` names the exact staged content, so asking again for the
+    same index (e.g. after an aborted commit) returns the cached message.
+    """
+    model = model or COMMIT_MODEL
+    try:
+        tree = subprocess.run(
+            ["git", "write-tree"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        diff = subprocess.run(
+            ["git", "diff", "--cached", "--no-color", "--no-ext-diff"],
+            capture_output=True,
+            text=True,
+            errors="surrogateescape",
+            check=True,
+        ).stdout
+    except subprocess.CalledProcessError:
+        return ""
+
+    if not diff:
+        return "Empty commit"
+
+    key = hashlib.sha1(f"{tree}:{model}:{token_budget}".encode()).hexdigest()
+    cache_file = get_cache_dir("commit-messages") / f"{key}.txt"
+    if cache_file.exists():
+        return cache_file.read_text()
+
+    message = _ai_commit_message(diff, token_budget, model)
+    if not message:
+        return _basic_commit_message(diff)
+
+    cache_file.write_text(message)
+    return message
+
+
 def commit_changes(message: str, files: list[str]) -> bool:
     """Creates a commit with the given message and files"""
     try:
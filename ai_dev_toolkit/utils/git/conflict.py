@@ -1,63 +1,280 @@
 import subprocess
-from typing import List
-import re
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from ai_dev_toolkit.utils.git.status import get_status
+from ai_dev_toolkit.utils.misc.files import atomic_write, copy_range, map_file
 
+CONFLICT_START = "<<<<<<<"
+CONFLICT_BASE = "|||||||"
+CONFLICT_SEPARATOR = "======="
+CONFLICT_END = ">>>>>>>"
 
-def get_conflicts() -> List[str]:
+RESOLUTIONS = ("ours", "theirs", "union", "base")
+
+# Decoding with surrogateescape lets non UTF-8 bytes round-trip unchanged
+ENCODING = "utf-8"
+ERRORS = "surrogateescape"
+
+
+def get_conflicts(refresh: bool = False) -> List[str]:
     """Returns list of files with conflicts"""
-    try:
-        result = subprocess.run(
-            ["git", "diff", "--name-only", "--diff-filter=U"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        return [file for file in result.stdout.splitlines() if file]
-    except subprocess.CalledProcessError:
-        return []
+    status = get_status(refresh=refresh)
+    return list(status.conflicted) if status else []
 
 
-def resolve_conflict(file: str, resolution: str) -> bool:
-    """Resolves a conflict in a file"""
-    try:
-        with open(file, "r") as f:
-            content = f.read()
+def _marker(line: str) -> str:
+    """Returns the conflict marker a line starts with, or an empty string"""
+    if not line or line[0] not in "<|=>":
+        return ""
 
-        # Find conflict markers
-        conflict_pattern = r"<<<<<<< .*?\n(.*?)\n=======\n(.*?)>>>>>>> .*?\n"
-        conflicts = list(re.finditer(conflict_pattern, content, re.DOTALL))
+    head = line[:7]
+    rest = line[7:]
+    if head == CONFLICT_SEPARATOR:
+        return head if not rest.strip("\r\n") else ""
+    if head in (CONFLICT_START, CONFLICT_BASE, CONFLICT_END):
+        return head if not rest or rest[0] in " \r\n" else ""
+    return ""
 
-        if not conflicts:
-            return False
 
-        # Apply resolution
-        new_content = content
-        for match in reversed(conflicts):
-            ours = match.group(1).rstrip()
-            theirs = match.group(2).rstrip()
+def scan_conflicts(lines: Iterable[str]) -> Iterator[Union[str, Dict]]:
+    """Walks lines once, yielding plain lines and conflict hunks
 
-            if resolution == "ours":
-                replacement = ours + "\n"
-            elif resolution == "theirs":
-                replacement = theirs + "\n"
+    Lines must keep their line endings. Each conflict is yielded as a dict with
+    "ours", "base" (None unless the file uses diff3 markers) and "theirs" line
+    lists plus the 1-based "line" of its opening marker. Conflicts nested inside
+    a hunk are kept verbatim in the enclosing side.
+    """
+    hunk = None
+    section = None
+    depth = 0
+
+    for number, line in enumerate(lines, 1):
+        marker = _marker(line)
+
+        if hunk is None:
+            if marker == CONFLICT_START:
+                hunk = {"ours": [], "base": None, "theirs": [], "line": number}
+                section = hunk["ours"]
+                depth = 1
             else:
-                return False
+                yield line
+            continue
 
-            new_content = (
-                new_content[: match.start()] + replacement + new_content[match.end() :]
-            )
+        if marker == CONFLICT_START:
+            depth += 1
+        elif depth > 1:
+            if marker == CONFLICT_END:
+                depth -= 1
+        elif marker == CONFLICT_BASE and section is hunk["ours"]:
+            hunk["base"] = []
+            section = hunk["base"]
+            continue
+        elif marker == CONFLICT_SEPARATOR and section is not hunk["theirs"]:
+            section = hunk["theirs"]
+            continue
+        elif marker == CONFLICT_END and section is hunk["theirs"]:
+            yield hunk
+            hunk = section = None
+            depth = 0
+            continue
+
+        section.append(line)
+
+    if hunk is not None:
+        raise ValueError(f"Unterminated conflict starting at line {hunk['line']}")
+
+
+def _pick(hunk: Dict, resolution: str) -> List[str]:
+    """Returns the lines that replace a conflict hunk"""
+    if resolution == "ours":
+        return hunk["ours"]
+    if resolution == "theirs":
+        return hunk["theirs"]
+    if resolution == "union":
+        return hunk["ours"] + hunk["theirs"]
+    if hunk["base"] is None:
+        raise ValueError(f"Conflict at line {hunk['line']} has no base section")
+    return hunk["base"]
+
+
+def _strategy_for(resolution: Union[str, Sequence[str]], index: int) -> str:
+    """Returns the strategy for the conflict at the given 0-based index"""
+    if isinstance(resolution, str):
+        return resolution
+    if index >= len(resolution):
+        raise ValueError(f"No resolution given for conflict {index + 1}")
+    return resolution[index]
+
+
+def _resolve_hunk(hunk: Dict, strategy: str) -> List[str]:
+    """Returns the resolved lines of a hunk"""
+    # Nested conflicts follow the strategy chosen for their enclosing hunk
+    return resolve_lines(_pick(hunk, strategy), strategy)[0]
+
+
+def resolve_lines(
+    lines: Iterable[str], resolution: Union[str, Sequence[str]]
+) -> Tuple[List[str], int]:
+    """Resolves every conflict in lines, returning the output and conflict count
+
+    `resolution` is a single strategy or one strategy per hunk, in file order.
+    """
+    output: List[str] = []
+    count = 0
+
+    for item in scan_conflicts(lines):
+        if isinstance(item, str):
+            output.append(item)
+            continue
+
+        output.extend(_resolve_hunk(item, _strategy_for(resolution, count)))
+        count += 1
+
+    if not isinstance(resolution, str) and count != len(resolution):
+        raise ValueError(f"Expected {len(resolution)} conflicts, found {count}")
+
+    return output, count
+
+
+def _find_conflict(data: bytes, pos: int) -> int:
+    """Returns the offset of the next conflict start marker line, or -1"""
+    marker = CONFLICT_START.encode()
+    while True:
+        if pos == 0 and data[:7] == marker:
+            candidate = 0
+        else:
+            found = data.find(b"\n" + marker, max(pos - 1, 0))
+            if found < 0:
+                return -1
+            candidate = found + 1
+
+        if data[candidate + 7 : candidate + 8] in (b"", b" ", b"\n", b"\r"):
+            return candidate
+        pos = candidate + 1
 
-        # Write resolved content
-        with open(file, "w") as f:
-            f.write(new_content)
+
+def _mapped_lines(data, start: int) -> Iterator[str]:
+    """Lazily yields decoded lines of a mapped file from an offset"""
+    data.seek(start)
+    for line in iter(data.readline, b""):
+        yield line.decode(ENCODING, ERRORS)
+
+
+def _resolve_file(file: str, resolution: Union[str, Sequence[str]]) -> bool:
+    """Rewrites a file with its conflicts resolved, without staging it
+
+    The file is memory-mapped and clean regions between conflicts are located
+    with byte-level searches and copied in chunks, so only one conflict hunk is
+    held in memory at a time. Output goes through a temporary file that is
+    atomically renamed over the original.
+    """
+    strategies = [resolution] if isinstance(resolution, str) else resolution
+    if not all(strategy in RESOLUTIONS for strategy in strategies):
+        return False
+
+    with map_file(file) as data:
+        start = _find_conflict(data, 0)
+        if start < 0:
+            return False
+
+        with atomic_write(file) as out:
+            pos = count = 0
+            while start >= 0:
+                copy_range(data, out, pos, start)
+
+                # The scanner yields the hunk as soon as its end marker is read,
+                # so the map position is then right after the conflict
+                hunk = next(scan_conflicts(_mapped_lines(data, start)))
+                pos = data.tell()
+
+                strategy = _strategy_for(resolution, count)
+                for line in _resolve_hunk(hunk, strategy):
+                    out.write(line.encode(ENCODING, ERRORS))
+                count += 1
+                start = _find_conflict(data, pos)
+
+            if not isinstance(resolution, str) and count != len(resolution):
+                raise ValueError(
+                    f"Expected {len(resolution)} conflicts, found {count}"
+                )
+            copy_range(data, out, pos, len(data))
+
+    return True
+
+
+def resolve_conflict(file: str, resolution: Union[str, Sequence[str]]) -> bool:
+    """Resolves a conflict in a file
+
+    `resolution` is one of "ours", "theirs", "union" or "base", or a sequence
+    with one of those per conflict hunk, in file order.
+    """
+    try:
+        if not _resolve_file(file, resolution):
+            return False
 
         # Stage the resolved file
         subprocess.run(["git", "add", file], check=True)
         return True
-    except (subprocess.CalledProcessError, IOError):
+    except (subprocess.CalledProcessError, IOError, ValueError):
         return False
 
 
+def resolve_all_conflicts(
+    strategy: str,
+    paths: Optional[List[str]] = None,
+    rules: Optional[Dict[str, str]] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Dict]:
+    """Resolves conflicted files concurrently and stages them in one git call
+
+    `rules` maps glob patterns to strategies (e.g. {"*.lock": "theirs"}); the
+    first matching pattern wins and other files use `strategy`. Defaults to
+    every file reported by get_conflicts(). Returns per-file results.
+    """
+    if paths is None:
+        paths = get_conflicts()
+
+    def pick_strategy(path: str) -> str:
+        for pattern, rule_strategy in (rules or {}).items():
+            if fnmatch(path, pattern):
+                return rule_strategy
+        return strategy
+
+    def resolve(path: str) -> Dict:
+        chosen = pick_strategy(path)
+        try:
+            resolved = _resolve_file(path, chosen)
+        except (IOError, ValueError):
+            resolved = False
+        return {"strategy": chosen, "resolved": resolved, "staged": False}
+
+    results: Dict[str, Dict] = {}
+    if not paths:
+        return results
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for path, result in zip(paths, pool.map(resolve, paths)):
+            results[path] = result
+
+    resolved_paths = [path for path, result in results.items() if result["resolved"]]
+    if resolved_paths:
+        try:
+            # Paths go through stdin so hundreds of files don't hit ARG_MAX
+            subprocess.run(
+                ["git", "add", "--pathspec-from-file=-", "--pathspec-file-nul"],
+                input="\0".join(resolved_paths),
+                text=True,
+                check=True,
+            )
+            for path in resolved_paths:
+                results[path]["staged"] = True
+        except subprocess.CalledProcessError:
+            pass
+
+    return results
+
+
 def abort_merge() -> bool:
     """Aborts current merge operation"""
     try:
@@ -0,0 +1,251 @@
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@(.*)$")
+NO_NEWLINE = "\\ No newline at end of file"
+
+
+@dataclass
+class Hunk:
+    """A single @@ section of a unified diff
+
+    `lines` keep their " ", "+", "-" or "\\" prefix but not their line ending.
+    `id` depends only on the file path and the hunk body, so it stays stable
+    while other hunks of the same file are staged or edited.
+    """
+
+    old_start: int
+    old_count: int
+    new_start: int
+    new_count: int
+    section: str = ""
+    lines: List[str] = field(default_factory=list)
+    id: str = ""
+
+    def header(self) -> str:
+        return (
+            f"@@ -{self.old_start},{self.old_count} "
+            f"+{self.new_start},{self.new_count} @@{self.section}"
+        )
+
+    def select(self, indexes: Optional[Iterable[int]] = None) -> Optional["Hunk"]:
+        """Returns a hunk keeping only the changed lines at the given indexes
+
+        Unselected additions are dropped and unselected removals become
+        context, which is how `git add -p` splits hunks. Counts are recomputed;
+        the new start still has to be shifted by render_patch. Returns None
+        when nothing changes.
+        """
+        if indexes is None:
+            return self
+
+        wanted = set(indexes)
+        lines: List[str] = []
+        dropped = False
+        for index, line in enumerate(self.lines):
+            prefix = line[:1]
+            if prefix == "\\":
+                if not dropped:
+                    lines.append(line)
+                continue
+
+            dropped = False
+            if index in wanted or prefix == " ":
+                lines.append(line)
+            elif prefix == "-":
+                lines.append(" " + line[1:])
+            else:
+                dropped = True
+
+        if not any(line[:1] in "+-" for line in lines):
+            return None
+
+        old_count = sum(1 for line in lines if line[:1] in " -")
+        new_count = sum(1 for line in lines if line[:1] in " +")
+        return Hunk(
+            self.old_start,
+            old_count,
+            self.new_start,
+            new_count,
+            self.section,
+            lines,
+            self.id,
+        )
+
+
+@dataclass
+class FilePatch:
+    """All hunks of one file, plus the header lines that precede them"""
+
+    old_path: Optional[str]
+    new_path: Optional[str]
+    headers: List[str] = field(default_factory=list)
+    hunks: List[Hunk] = field(default_factory=list)
+    binary: bool = False
+
+    @property
+    def path(self) -> str:
+        return self.new_path or self.old_path or ""
+
+    def hunk(self, hunk_id: str) -> Hunk:
+        for hunk in self.hunks:
+            if hunk.id == hunk_id:
+                return hunk
+        raise KeyError(f"{self.path}: no hunk with id {hunk_id}")
+
+
+def _unquote(path: str) -> str:
+    """Undoes git's C-style quoting of unusual paths"""
+    if len(path) >= 2 and path[0] == path[-1] == '"':
+        raw = path[1:-1].encode("latin-1", "backslashreplace")
+        return raw.decode("unicode_escape").encode("latin-1").decode("utf-8")
+    return path
+
+
+def _header_path(value: str) -> Optional[str]:
+    """Returns the path of a ---/+++ header without its a/ or b/ prefix"""
+    value = _unquote(value.split("\t")[0].rstrip())
+    if value == "/dev/null":
+        return None
+    if value[:2] in ("a/", "b/"):
+        return value[2:]
+    return value
+
+
+def _hunk_id(path: str, lines: List[str], seen: Dict[str, int]) -> str:
+    digest = hashlib.sha1(path.encode())
+    for line in lines:
+        digest.update(line.encode("utf-8", "surrogateescape"))
+        digest.update(b"\n")
+    hunk_id = digest.hexdigest()[:12]
+
+    # Identical hunks in one file are told apart by their occurrence
+    seen[hunk_id] = seen.get(hunk_id, 0) + 1
+    if seen[hunk_id] > 1:
+        hunk_id = f"{hunk_id}-{seen[hunk_id]}"
+    return hunk_id
+
+
+def parse_diff(diff: str) -> List[FilePatch]:
+    """Parses a unified or git diff into file patches in a single pass
+
+    Hunk bodies are delimited by the counts in their @@ header, so removed
+    lines that start with "--" are not mistaken for file headers.
+    """
+    patches: List[FilePatch] = []
+    current: Optional[FilePatch] = None
+    hunk: Optional[Hunk] = None
+    old_left = new_left = 0
+    seen: Dict[str, int] = {}
+
+    def finish_hunk() -> None:
+        nonlocal hunk
+        if hunk is not None:
+            hunk.id = _hunk_id(current.path, hunk.lines, seen)
+            current.hunks.append(hunk)
+            hunk = None
+
+    for line in diff.splitlines():
+        if hunk is not None:
+            if line.startswith("\\"):
+                hunk.lines.append(line)
+                continue
+            if old_left > 0 or new_left > 0:
+                prefix = line[:1]
+                # Some tools strip the single space of blank context lines
+                if not line:
+                    line, prefix = " ", " "
+                if prefix in " -":
+                    old_left -= 1
+                if prefix in " +":
+                    new_left -= 1
+                hunk.lines.append(line)
+                continue
+            finish_hunk()
+
+        match = HUNK_HEADER.match(line)
+        if match and current is not None:
+            old_start, old_count, new_start, new_count, section = match.groups()
+            hunk = Hunk(
+                int(old_start),
+                1 if old_count is None else int(old_count),
+                int(new_start),
+                1 if new_count is None else int(new_count),
+                section,
+            )
+            old_left, new_left = hunk.old_count, hunk.new_count
+            continue
+
+        if line.startswith("diff --git ") or (
+            line.startswith("--- ") and (current is None or current.hunks)
+        ):
+            current = FilePatch(None, None)
+            seen = {}
+            patches.append(current)
+            if line.startswith("diff --git "):
+                parts = line[len("diff --git ") :].split(" b/")
+                current.old_path = _header_path(parts[0])
+                current.new_path = current.old_path
+                if len(parts) == 2:
+                    current.new_path = _header_path("b/" + parts[1])
+
+        if current is None:
+            continue
+
+        current.headers.append(line)
+        if line.startswith("--- "):
+            current.old_path = _header_path(line[4:])
+        elif line.startswith("+++ "):
+            current.new_path = _header_path(line[4:])
+        elif line.startswith(("Binary files ", "GIT binary patch")):
+            current.binary = True
+
+    finish_hunk()
+    return patches
+
+
+def render_patch(
+    patch: FilePatch, selections: Optional[Dict[str, Optional[Iterable[int]]]] = None
+) -> str:
+    """Renders a file patch, optionally keeping only some hunks or lines
+
+    `selections` maps hunk ids to the changed line indexes to keep, or None for
+    the whole hunk. New-side start lines are recalculated so the result applies
+    cleanly to the old side. Returns "" when nothing is selected.
+    """
+    output: List[str] = []
+    offset = 0
+
+    for hunk in patch.hunks:
+        if selections is None:
+            chosen = hunk
+        elif hunk.id in selections:
+            chosen = hunk.select(selections[hunk.id])
+        else:
+            chosen = None
+        if chosen is None:
+            continue
+
+        new_start = chosen.old_start + offset
+        if chosen.old_count == 0:
+            new_start += 1
+        if chosen.new_count == 0:
+            new_start -= 1
+        offset += chosen.new_count - chosen.old_count
+
+        output.append(
+            Hunk(
+                chosen.old_start,
+                chosen.old_count,
+                new_start,
+                chosen.new_count,
+                chosen.section,
+            ).header()
+        )
+        output.extend(chosen.lines)
+
+    if not output:
+        return ""
+    return "\n".join(patch.headers + output) + "\n"
@@ -1,31 +1,61 @@
+import os
 import subprocess
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import re
 from pathlib import Path
+from ai_dev_toolkit.utils.misc.files import atomic_write, copy_range, map_file
+from ai_dev_toolkit.utils.misc.state import read_state
+
+# Searched in this order; the first one holding a version number is bumped
+VERSION_FILES = ["setup.py", "package.json", "VERSION", "__init__.py"]
+VERSION_PATTERN = re.compile(rb"(\d+)\.(\d+)\.(\d+)")
+
+
+def read_version(file: str) -> Optional[str]:
+    """Returns the first version number in a file, None if it has none"""
+    with map_file(file) as data:
+        match = VERSION_PATTERN.search(data)
+        return match.group(0).decode() if match else None
+
+
+def find_version(root: str = ".") -> Optional[Tuple[str, str]]:
+    """Returns (file, version) of the version file bump_version would change
+
+    While `aitk watch` runs on root, its state says which file that is, so
+    the other candidates aren't opened.
+    """
+    versions = read_state(root, "versions")
+    if versions is not None:
+        for file in VERSION_FILES:
+            if file in versions:
+                path = os.path.join(root, file)
+                # Read anyway: the file may have changed since the update
+                version = read_version(path)
+                if version:
+                    return path, version
+                break
+
+    for file in VERSION_FILES:
+        path = os.path.join(root, file)
+        if Path(path).exists():
+            version = read_version(path)
+            if version:
+                return path, version
+    return None
 
 
 def bump_version(version_type: str) -> str:
-    """Bumps version according to semver"""
+    """Bumps version according to semver
+
+    Version files are memory-mapped and scanned as bytes, and the rewritten
+    file is streamed to a temporary file that is atomically renamed into place,
+    so peak memory does not grow with the file size.
+    """
     try:
-        # Try to find version in common files
-        version_files = ["setup.py", "package.json", "VERSION", "__init__.py"]
-
-        version_pattern = r"(\d+)\.(\d+)\.(\d+)"
-        current_version = None
-        version_file = None
-
-        for file in version_files:
-            if Path(file).exists():
-                with open(file, "r") as f:
-                    content = f.read()
-                    match = re.search(version_pattern, content)
-                    if match:
-                        current_version = match.group(0)
-                        version_file = file
-                        break
-
-        if not current_version:
+        found = find_version()
+        if not found:
             return ""
+        version_file, current_version = found
 
         # Parse version
         major, minor, patch = map(int, current_version.split("."))
@@ -43,13 +73,13 @@ def bump_version(version_type: str) -> str:
         new_version = f"{major}.{minor}.{patch}"
 
         # Update version in file
-        with open(version_file, "r") as f:
-            content = f.read()
-
-        new_content = re.sub(version_pattern, new_version, content)
-
-        with open(version_file, "w") as f:
-            f.write(new_content)
+        with map_file(version_file) as data, atomic_write(version_file) as out:
+            pos = 0
+            for match in VERSION_PATTERN.finditer(data):
+                copy_range(data, out, pos, match.start())
+                out.write(new_version.encode())
+                pos = match.end()
+            copy_range(data, out, pos, len(data))
 
         return new_version
     except (IOError, subprocess.CalledProcessError):
@@ -1,7 +1,35 @@
+import os
 import subprocess
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 import re
 from pathlib import Path
+from ai_dev_toolkit.utils.ai.agents import get_agent, model_for, run_sync
+from ai_dev_toolkit.utils.ai.context import ContextIndex
+from ai_dev_toolkit.utils.ai.tokens import prompt_budget, run_tracked
+from ai_dev_toolkit.utils.code.parsing import Definition, ParseService, available
+from ai_dev_toolkit.utils.git.patch import parse_diff
+from ai_dev_toolkit.utils.git.summarize import (
+    DEFAULT_TOKEN_BUDGET,
+    estimate_tokens,
+    map_reduce_diff,
+    summarize_diff,
+)
+
+REVIEW_MODEL = model_for("review")
+
+review_system_prompt = """
+You are a code review assistant.
+Given statistics about a change and a description of what changed, write a
+short review summary for a human reviewer: what the change does, the areas
+that deserve the closest look, and any risks such as leftover debug code.
+"""
+
+review_chunk_prompt = """
+You review one part of a larger change.
+Given part of a diff, or summaries of several parts, list in at most four
+short bullet points what changed and anything a reviewer should check.
+Reply with the bullet points only.
+"""
 
 
 def analyze_changes(diff: str) -> Dict:
@@ -77,8 +105,63 @@ def suggest_reviewers(diff: str) -> List[str]:
         return []
 
 
-def impact_analysis(diff: str) -> Dict:
-    """Analyzes impact of changes"""
+def _qualname(definition: Definition, definitions: List[Definition]) -> str:
+    """Returns a definition's name prefixed with those of its enclosing ones"""
+    enclosing = [
+        other.name
+        for other in definitions
+        if other != definition
+        and other.start_line <= definition.start_line
+        and other.end_line >= definition.end_line
+    ]
+    return ".".join(enclosing + [definition.name])
+
+
+def _changed_symbols(diff: str, root: str = ".") -> List[Tuple[str, str]]:
+    """Returns (path, qualified name) of the Python definitions a diff changes
+
+    Definitions are read from the new version of each file under root with
+    ParseService.changed_definitions, so this needs the parsing extra;
+    without it, and for deleted files, nothing is found. Only the innermost
+    changed definitions count, so a changed method stands for its class.
+    """
+    if not available():
+        return []
+    service = ParseService()
+    symbols: List[Tuple[str, str]] = []
+    for patch in parse_diff(diff):
+        if not patch.new_path or not patch.path.endswith(".py"):
+            continue
+        path = os.path.join(root, patch.path)
+        try:
+            changed = service.changed_definitions(path, patch)
+            definitions = service.definitions(path)
+        except (OSError, ValueError, ImportError):
+            continue
+        for definition in changed:
+            if any(
+                other != definition
+                and definition.start_line <= other.start_line
+                and other.end_line <= definition.end_line
+                for other in changed
+            ):
+                continue
+            symbol = (patch.path, _qualname(definition, definitions))
+            if symbol not in symbols:
+                symbols.append(symbol)
+    return symbols
+
+
+def impact_analysis(diff: str, symbol_index=None, coverage_map=None) -> Dict:
+    """Analyzes impact of changes
+
+    With a SymbolIndex, the result also maps the path and qualified name of
+    each changed Python function or class to the "path:line" locations
+    that use it outside its own file ({path: {qualname: locations}}).
+    With a CoverageMap, test_coverage also lists the tests that execute the
+    changed lines ("tests_to_run") and the changed files the map has no
+    data for ("unmapped_files").
+    """
     impact = {
         "scope": {"files": [], "directories": set()},
         "dependencies": {"added": [], "removed": []},
@@ -129,4 +212,103 @@ def impact_analysis(diff: str) -> Dict:
                 impact["test_coverage"]["needs_tests"].append(current_file)
 
     impact["scope"]["directories"] = list(impact["scope"]["directories"])
+
+    if symbol_index is not None:
+        impact["callers"] = {}
+        for path, qualname in _changed_symbols(diff, symbol_index.root):
+            callers = symbol_index.callers(qualname, exclude=[path])
+            impact["callers"].setdefault(path, {})[qualname] = [
+                f"{caller}:{line}"
+                for caller, lines in callers.items()
+                for line in lines
+            ]
+
+    if coverage_map is not None:
+        tests, unmapped = coverage_map.tests_for_patches(parse_diff(diff))
+        impact["test_coverage"]["tests_to_run"] = tests
+        impact["test_coverage"]["unmapped_files"] = unmapped
     return impact
+
+
+def _review_header(diff: str) -> str:
+    analysis = analyze_changes(diff)
+    lines = [
+        f"{analysis['files_changed']} files changed, "
+        f"+{analysis['insertions']} -{analysis['deletions']}"
+    ]
+    for pattern in analysis["complexity"]["risky_patterns"]:
+        lines.append(f"Risky pattern: {pattern}")
+    for file in analysis["complexity"]["high_impact_files"]:
+        lines.append(f"High impact file: {file}")
+    return "\n".join(lines)
+
+
+async def summarize_review_async(
+    diff: str,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    model: Optional[str] = None,
+    max_concurrency: int = 4,
+    context_tokens: int = 0,
+) -> str:
+    """Writes a review summary, map-reducing diffs too large for one call
+
+    With `context_tokens`, an outline of the repository ranked around the
+    changed files (see ContextIndex) is added to the final prompt.
+    """
+    model = model or REVIEW_MODEL
+    token_budget = min(token_budget, prompt_budget(model, review_system_prompt))
+    header = _review_header(diff)
+    if context_tokens > 0:
+        index = ContextIndex()
+        index.update()
+        focus = [patch.path for patch in parse_diff(diff)]
+        header += "\n\n" + index.bundle(focus=focus, max_tokens=context_tokens)
+        token_budget = max(token_budget - context_tokens, 0)
+    reviewer = get_agent(model, review_system_prompt)
+
+    async def review(prompt: str) -> str:
+        result = await run_tracked(
+            reviewer, prompt, model, "review", review_system_prompt
+        )
+        return str(result.data)
+
+    if estimate_tokens(diff) <= token_budget:
+        summary = summarize_diff(diff, token_budget)
+        return (await review(f"{header}\n\n{summary}")).strip()
+
+    async def summarize_chunk(text: str) -> str:
+        agent = get_agent(model, review_chunk_prompt)
+        result = await run_tracked(agent, text, model, "review", review_chunk_prompt)
+        return str(result.data)
+
+    async def combine(summaries: str) -> str:
+        return await review(f"{header}\n\nChanges:\n{summaries}")
+
+    return await map_reduce_diff(
+        diff,
+        summarize_chunk,
+        combine,
+        token_budget,
+        max_concurrency,
+        cache_key=f"review:{model}",
+    )
+
+
+def summarize_review(
+    diff: str,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    model: Optional[str] = None,
+    max_concurrency: int = 4,
+    context_tokens: int = 0,
+) -> str:
+    """Summarizes changes for code review; returns "" if the model fails"""
+    if not diff:
+        return ""
+    try:
+        return run_sync(
+            summarize_review_async(
+                diff, token_budget, model, max_concurrency, context_tokens
+            )
+        )
+    except Exception:
+        return ""
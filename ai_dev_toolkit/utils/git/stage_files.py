@@ -1,6 +1,9 @@
 import subprocess
-from typing import List
+from typing import Dict, Iterable, List, Optional, Union
 from pathlib import Path
+from ai_dev_toolkit.utils.git.patch import FilePatch, parse_diff, render_patch
+from ai_dev_toolkit.utils.git.status import get_status
+from ai_dev_toolkit.utils.misc.state import read_state
 
 
 def stage_files(files: List[str]) -> bool:
@@ -25,6 +28,66 @@ def unstage_files(files: List[str]) -> bool:
         return False
 
 
+def get_staged_files(refresh: bool = False) -> List[str]:
+    """Returns the files with staged changes"""
+    status = get_status(refresh=refresh)
+    return list(status.staged) if status else []
+
+
+def get_unstaged_files(untracked: bool = False, refresh: bool = True) -> List[str]:
+    """Returns the files with unstaged changes, optionally with untracked ones
+
+    Edits to the working tree don't invalidate the status snapshot, so this
+    runs git status afresh unless refresh=False, which is only safe straight
+    after a get_status(refresh=True).
+    """
+    status = get_status(refresh=refresh)
+    if status is None:
+        return []
+    return status.unstaged + (status.untracked if untracked else [])
+
+
+def diff_stats(
+    root: str = ".", paths: Optional[Iterable[str]] = None
+) -> Dict[str, List[Optional[int]]]:
+    """Returns {path: [added, deleted]} of the working tree against HEAD
+
+    Binary files count as [None, None]. Outside a repository, or without
+    commits, there are no stats.
+    """
+    cmd = ["git", "diff", "--numstat", "-z", "--no-renames", "HEAD", "--"]
+    try:
+        result = subprocess.run(
+            cmd + list(paths or []),
+            cwd=root,
+            capture_output=True,
+            text=True,
+            errors="surrogateescape",
+            check=True,
+        )
+    except (subprocess.CalledProcessError, OSError):
+        return {}
+
+    stats = {}
+    for record in result.stdout.split("\0"):
+        if record.count("\t") < 2:
+            continue
+        added, deleted, path = record.split("\t", 2)
+        stats[path] = [
+            int(added) if added != "-" else None,
+            int(deleted) if deleted != "-" else None,
+        ]
+    return stats
+
+
+def get_diff_stats(root: str = ".") -> Dict[str, List[Optional[int]]]:
+    """Returns diff_stats() of root, from `aitk watch` when it is running"""
+    stats = read_state(root, "diff_stats")
+    if stats is not None:
+        return stats
+    return diff_stats(root)
+
+
 def stage_hunks(file: str, hunks: List[str]) -> bool:
     """Stages specific hunks from a file"""
     try:
@@ -43,3 +106,68 @@ def stage_hunks(file: str, hunks: List[str]) -> bool:
         return process.returncode == 0
     except (subprocess.SubprocessError, OSError):
         return False
+
+
+def get_file_patches(files: Optional[List[str]] = None) -> Dict[str, FilePatch]:
+    """Parses the unstaged changes of files into hunks with a single git diff"""
+    try:
+        cmd = ["git", "diff", "--no-color", "--no-ext-diff", "--"]
+        if files:
+            cmd.extend(files)
+
+        result = subprocess.run(
+            cmd, capture_output=True, text=True, errors="surrogateescape", check=True
+        )
+        return {patch.path: patch for patch in parse_diff(result.stdout)}
+    except subprocess.CalledProcessError:
+        return {}
+
+
+def stage_selections(
+    selections: Dict[str, Union[Iterable[str], Dict[str, Optional[Iterable[int]]]]],
+    patches: Optional[Dict[str, FilePatch]] = None,
+) -> bool:
+    """Stages selected hunks or lines of many files with one git apply
+
+    `selections` maps each path to the hunk ids to stage, or to a dict of hunk
+    id to the indexes of the hunk lines to stage (None for the whole hunk).
+    Ids come from get_file_patches(), which is called for the selected paths
+    when `patches` is not given.
+    """
+    if not selections:
+        return False
+
+    if patches is None:
+        patches = get_file_patches(list(selections))
+
+    rendered = []
+    for path, chosen in selections.items():
+        patch = patches.get(path)
+        if patch is None or patch.binary:
+            return False
+
+        if not isinstance(chosen, dict):
+            chosen = {hunk_id: None for hunk_id in chosen}
+        known = {hunk.id for hunk in patch.hunks}
+        if not set(chosen) <= known:
+            return False
+
+        text = render_patch(patch, chosen)
+        if text:
+            rendered.append(text)
+
+    if not rendered:
+        return False
+
+    try:
+        subprocess.run(
+            ["git", "apply", "--cached", "-"],
+            input="".join(rendered),
+            capture_output=True,
+            text=True,
+            errors="surrogateescape",
+            check=True,
+        )
+        return True
+    except (subprocess.CalledProcessError, OSError):
+        return False
@@ -0,0 +1,187 @@
+import os
+import subprocess
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Without optional locks status doesn't rewrite the index, which would
+# otherwise make every new snapshot look stale straight away
+STATUS_COMMAND = [
+    "git",
+    "--no-optional-locks",
+    "status",
+    "--porcelain=v2",
+    "-z",
+    "--branch",
+]
+
+# (size, mtime) of each file whose change makes a snapshot stale
+Stamp = Tuple[Optional[Tuple[int, int]], ...]
+
+_snapshots: Dict[str, Tuple[Stamp, "RepoStatus"]] = {}
+
+
+@dataclass
+class RepoStatus:
+    """The branch and changed paths of a working tree, from one git status"""
+
+    # None when HEAD is detached
+    branch: Optional[str] = None
+    # None before the first commit
+    commit: Optional[str] = None
+    upstream: Optional[str] = None
+    ahead: int = 0
+    behind: int = 0
+    staged: List[str] = field(default_factory=list)
+    unstaged: List[str] = field(default_factory=list)
+    conflicted: List[str] = field(default_factory=list)
+    untracked: List[str] = field(default_factory=list)
+    # {new path: old path} of staged renames and copies
+    renamed: Dict[str, str] = field(default_factory=dict)
+
+
+def parse_status(output: str) -> RepoStatus:
+    """Parses `git status --porcelain=v2 -z --branch` output"""
+    status = RepoStatus()
+    records = iter(output.split("\0"))
+    for record in records:
+        kind = record[:1]
+        if kind == "#":
+            _, key, value = (record.split(" ", 2) + ["", ""])[:3]
+            if key == "branch.oid":
+                status.commit = None if value == "(initial)" else value
+            elif key == "branch.head":
+                status.branch = None if value == "(detached)" else value
+            elif key == "branch.upstream":
+                status.upstream = value
+            elif key == "branch.ab":
+                ahead, behind = value.split()
+                status.ahead, status.behind = int(ahead), -int(behind)
+        elif kind in ("1", "2"):
+            fields = record.split(" ", 9 if kind == "2" else 8)
+            xy, path = fields[1], fields[-1]
+            if kind == "2":
+                # The original path follows in its own record
+                status.renamed[path] = next(records, "")
+            if xy[0] != ".":
+                status.staged.append(path)
+            if xy[1] != ".":
+                status.unstaged.append(path)
+        elif kind == "u":
+            status.conflicted.append(record.split(" ", 10)[-1])
+        elif kind == "?":
+            status.untracked.append(record[2:])
+    return status
+
+
+def _git_dirs(root: str) -> Optional[Tuple[str, str]]:
+    """Returns (git dir, common dir) of the repository containing root"""
+    directory = os.path.abspath(root)
+    while True:
+        dot_git = os.path.join(directory, ".git")
+        if os.path.isdir(dot_git):
+            git_dir = dot_git
+            break
+        if os.path.isfile(dot_git):
+            # A linked worktree or submodule: ".git" names the real git dir
+            try:
+                with open(dot_git) as f:
+                    line = f.readline().strip()
+            except OSError:
+                return None
+            if not line.startswith("gitdir: "):
+                return None
+            git_dir = os.path.join(directory, line[len("gitdir: ") :])
+            break
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+    common_dir = git_dir
+    try:
+        with open(os.path.join(git_dir, "commondir")) as f:
+            common_dir = os.path.join(git_dir, f.read().strip())
+    except OSError:
+        pass
+    return git_dir, common_dir
+
+
+def _stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def repo_stamp(root: str) -> Optional[Stamp]:
+    """Returns the state of HEAD, the index and the current branch ref
+
+    It changes whenever git status, or a diff against HEAD, may have.
+    """
+    dirs = _git_dirs(root)
+    if dirs is None:
+        return None
+    git_dir, common_dir = dirs
+    head = os.path.join(git_dir, "HEAD")
+    try:
+        with open(head) as f:
+            target = f.read().strip()
+    except OSError:
+        return None
+    ref = None
+    if target.startswith("ref: "):
+        ref = os.path.join(common_dir, target[len("ref: ") :])
+    return (
+        _stat(head),
+        _stat(os.path.join(git_dir, "index")),
+        _stat(ref) if ref else None,
+        _stat(os.path.join(common_dir, "packed-refs")),
+    )
+
+
+def get_status(root: str = ".", refresh: bool = False) -> Optional[RepoStatus]:
+    """Returns the status of root's working tree, or None outside a repository
+
+    The first call runs git status; later calls reuse its result until HEAD,
+    the index or the current branch moves, so staging, committing, merging
+    and switching branches are all noticed. Edits to files that aren't
+    staged and new untracked files don't touch any of those, so the
+    unstaged and untracked lists of a reused snapshot may be stale: pass
+    refresh=True before reading them.
+    """
+    key = os.path.abspath(root)
+    before = repo_stamp(key)
+    cached = _snapshots.get(key)
+    if not refresh and before is not None and cached and cached[0] == before:
+        return cached[1]
+
+    try:
+        result = subprocess.run(
+            STATUS_COMMAND,
+            cwd=root,
+            capture_output=True,
+            text=True,
+            errors="surrogateescape",
+            check=True,
+        )
+    except (subprocess.CalledProcessError, OSError):
+        _snapshots.pop(key, None)
+        return None
+
+    status = parse_status(result.stdout)
+    # Only trust a stamp that held still while git ran
+    after = repo_stamp(key)
+    if after is not None and after == before:
+        _snapshots[key] = (after, status)
+    else:
+        _snapshots.pop(key, None)
+    return status
+
+
+def invalidate_status(root: Optional[str] = None) -> None:
+    """Forgets the snapshot of root, or of every repository"""
+    if root is None:
+        _snapshots.clear()
+    else:
+        _snapshots.pop(os.path.abspath(root), None)
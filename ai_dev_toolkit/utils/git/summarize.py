@@ -0,0 +1,275 @@
+import asyncio
+import hashlib
+from fnmatch import fnmatch
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from ai_dev_toolkit.utils.ai.tokens import count_tokens
+from ai_dev_toolkit.utils.git.patch import FilePatch, Hunk, parse_diff
+from ai_dev_toolkit.utils.misc.utils import get_cache_dir
+
+DEFAULT_TOKEN_BUDGET = 4000
+MAX_HUNK_LINES = 40
+OMITTED_NOTE_TOKENS = 8
+
+# Files whose contents say little about intent; only their stats are sent
+GENERATED_PATTERNS = [
+    "*.lock",
+    "*-lock.json",
+    "*-lock.yaml",
+    "go.sum",
+    "*.min.js",
+    "*.min.css",
+    "*.map",
+    "*.snap",
+    "*.svg",
+    "*_pb2.py",
+    "*.pb.go",
+    "dist/*",
+    "build/*",
+    "vendor/*",
+    "node_modules/*",
+]
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the number of tokens in text with the local tokenizer"""
+    return count_tokens(text)
+
+
+def is_generated(path: str, patterns: Optional[List[str]] = None) -> bool:
+    """Returns True for lock files, minified bundles and other generated files"""
+    patterns = GENERATED_PATTERNS if patterns is None else patterns
+    name = path.rsplit("/", 1)[-1]
+    return any(
+        fnmatch(path, pattern) or fnmatch(name, pattern) for pattern in patterns
+    )
+
+
+def file_stats(patch: FilePatch) -> Dict:
+    """Returns status, insertions and deletions of a file patch"""
+    insertions = deletions = 0
+    for hunk in patch.hunks:
+        for line in hunk.lines:
+            if line[:1] == "+":
+                insertions += 1
+            elif line[:1] == "-":
+                deletions += 1
+
+    if patch.old_path is None:
+        status = "A"
+    elif patch.new_path is None:
+        status = "D"
+    elif patch.old_path != patch.new_path:
+        status = "R"
+    else:
+        status = "M"
+    return {"status": status, "insertions": insertions, "deletions": deletions}
+
+
+def _trimmed_hunks(patch: FilePatch, max_hunk_lines: int) -> List[str]:
+    """Returns the changed lines of each hunk, capped per hunk"""
+    lines: List[str] = []
+    for hunk in patch.hunks:
+        changed = [line for line in hunk.lines if line[:1] in "+-"]
+        lines.append(f"@@{hunk.section}" if hunk.section.strip() else "@@")
+        lines.extend(changed[:max_hunk_lines])
+        if len(changed) > max_hunk_lines:
+            lines.append(f"... {len(changed) - max_hunk_lines} more changed lines")
+    return lines
+
+
+def summarize_diff(
+    diff: str,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    max_hunk_lines: int = MAX_HUNK_LINES,
+    generated_patterns: Optional[List[str]] = None,
+    include_hunks: bool = True,
+) -> str:
+    """Compresses a diff into per-file stats and trimmed hunks within a budget
+
+    The stats block lists every file (generated and binary files are listed
+    but never expanded). The remaining budget is shared between files,
+    smallest first, so one huge file cannot starve the others. Hunks keep only
+    their changed lines, capped at `max_hunk_lines` each.
+    """
+    patches = parse_diff(diff)
+    if not patches:
+        return ""
+
+    stats_lines = []
+    expandable = []
+    total_insertions = total_deletions = 0
+    for patch in patches:
+        stats = file_stats(patch)
+        total_insertions += stats["insertions"]
+        total_deletions += stats["deletions"]
+
+        note = ""
+        if patch.binary:
+            note = " [binary]"
+        elif is_generated(patch.path, generated_patterns):
+            note = " [generated, skipped]"
+        else:
+            expandable.append(patch)
+        stats_lines.append(
+            f"{stats['status']} {patch.path} "
+            f"(+{stats['insertions']} -{stats['deletions']}){note}"
+        )
+
+    header = (
+        f"Files changed ({len(patches)}, "
+        f"+{total_insertions} -{total_deletions}):"
+    )
+    output = [header]
+    used = estimate_tokens(header)
+    for index, line in enumerate(stats_lines):
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            output.append(f"... and {len(stats_lines) - index} more files")
+            return "\n".join(output)
+        output.append(line)
+        used += cost
+
+    if not include_hunks:
+        return "\n".join(output)
+
+    sections = [
+        (patch.path, _trimmed_hunks(patch, max_hunk_lines)) for patch in expandable
+    ]
+    sections.sort(key=lambda section: sum(len(line) for line in section[1]))
+
+    for index, (path, lines) in enumerate(sections):
+        share = (token_budget - used) // (len(sections) - index)
+        block = ["", path]
+        cost = estimate_tokens(path) + 2
+        line_costs = [estimate_tokens(line) + 1 for line in lines]
+        if cost + sum(line_costs) <= share:
+            block.extend(lines)
+            cost += sum(line_costs)
+        else:
+            # Leave room for the note saying how much was cut
+            limit = share - OMITTED_NOTE_TOKENS
+            if cost > limit:
+                continue
+            for position, line in enumerate(lines):
+                if cost + line_costs[position] > limit:
+                    block.append(f"... {len(lines) - position} more lines omitted")
+                    cost += OMITTED_NOTE_TOKENS
+                    break
+                block.append(line)
+                cost += line_costs[position]
+
+        output.extend(block)
+        used += cost
+
+    return "\n".join(output)
+
+
+def split_diff(
+    diff: str, max_chunk_tokens: int = DEFAULT_TOKEN_BUDGET
+) -> List[Tuple[str, str]]:
+    """Splits a diff into (key, text) chunks of whole files or hunk groups
+
+    Small files become one chunk each; larger ones are split into consecutive
+    groups of hunks under `max_chunk_tokens`. Generated and binary files are
+    left out. Keys are built from content-based hunk ids rather than line
+    numbers, so a chunk keeps its key when edits elsewhere shift it.
+    """
+    chunks: List[Tuple[str, str]] = []
+    for patch in parse_diff(diff):
+        if patch.binary or is_generated(patch.path):
+            continue
+
+        group: List[Hunk] = []
+        cost = 0
+        groups: List[List[Hunk]] = []
+        for hunk in patch.hunks:
+            hunk_cost = sum(estimate_tokens(line) + 1 for line in hunk.lines) + 10
+            if group and cost + hunk_cost > max_chunk_tokens:
+                groups.append(group)
+                group, cost = [], 0
+            group.append(hunk)
+            cost += hunk_cost
+        if group:
+            groups.append(group)
+
+        for hunks in groups:
+            key = hashlib.sha256(
+                "\n".join([patch.path] + [hunk.id for hunk in hunks]).encode()
+            ).hexdigest()
+            lines = list(patch.headers)
+            for hunk in hunks:
+                lines.append(hunk.header())
+                lines.extend(hunk.lines)
+            chunks.append((key, "\n".join(lines) + "\n"))
+    return chunks
+
+
+async def _cached(
+    cache_key: str, text_key: str, run: Callable[[], Awaitable[str]]
+) -> str:
+    """Returns a stored summary, or runs and stores it"""
+    digest = hashlib.sha256(f"{cache_key}\n{text_key}".encode()).hexdigest()
+    cache_file = get_cache_dir("chunk-summaries") / f"{digest}.txt"
+    if cache_file.exists():
+        return cache_file.read_text()
+
+    summary = await run()
+    cache_file.write_text(summary)
+    return summary
+
+
+async def map_reduce_diff(
+    diff: str,
+    summarize_chunk: Callable[[str], Awaitable[str]],
+    combine: Callable[[str], Awaitable[str]],
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    max_concurrency: int = 4,
+    cache_key: str = "",
+) -> str:
+    """Summarizes a diff too large for one model call
+
+    Map: every chunk from split_diff is summarized concurrently, at most
+    `max_concurrency` at a time. Reduce: summaries are merged in groups until
+    they fit `token_budget`, then `combine` produces the final text. Chunk and
+    intermediate summaries are cached by content hash under `cache_key`
+    (e.g. the model and prompt), so re-running after a small amendment only
+    summarizes the chunks that changed.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def summarize(key: str, text: str) -> str:
+        async def run() -> str:
+            async with semaphore:
+                return (await summarize_chunk(text)).strip()
+
+        return await _cached(cache_key, key, run)
+
+    chunks = split_diff(diff, token_budget)
+    summaries = list(
+        await asyncio.gather(*(summarize(key, text) for key, text in chunks))
+    )
+
+    def too_large(parts: List[str]) -> bool:
+        return estimate_tokens("\n\n".join(parts)) > token_budget
+
+    while len(summaries) > 1 and too_large(summaries):
+        groups: List[List[str]] = [[]]
+        for summary in summaries:
+            if groups[-1] and too_large(groups[-1] + [summary]):
+                groups.append([])
+            groups[-1].append(summary)
+        if len(groups) == len(summaries):
+            # Every summary is already as large as the budget; pair them up
+            groups = [summaries[i : i + 2] for i in range(0, len(summaries), 2)]
+
+        texts = ["\n\n".join(group) for group in groups]
+        summaries = list(
+            await asyncio.gather(
+                *(
+                    summarize(hashlib.sha256(text.encode()).hexdigest(), text)
+                    for text in texts
+                )
+            )
+        )
+
+    return (await combine("\n\n".join(summaries))).strip()
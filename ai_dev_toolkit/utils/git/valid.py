@@ -1,26 +1,111 @@
-from typing import Union
-from pydantic import ValidationError
+import io
+import re
+from typing import Iterable, Union
 
+HUNK_NUMBERS = re.compile(r"^-(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))?$")
+BINARY_DATA = re.compile(r"^[A-Za-z][0-9A-Za-z!#$%&()*+\-;<=>?@^_`{|}~]+$")
 
-def is_valid_diff(diff_content: str) -> Union[bool, str]:
-    if not diff_content:
-        return "Diff content cannot be empty"
+# Lines git may write between "diff --git" and the first hunk
+EXTENDED_HEADERS = (
+    "index ",
+    "old mode ",
+    "new mode ",
+    "deleted file mode ",
+    "new file mode ",
+    "similarity index ",
+    "dissimilarity index ",
+    "rename from ",
+    "rename to ",
+    "copy from ",
+    "copy to ",
+    "Binary files ",
+)
 
-    if diff_content.isspace():
-        return "Diff must start with 'diff', '---', or '+++'"
+START_ERROR = "Diff must start with 'diff', '---', or '+++'"
 
-    lines = diff_content.splitlines()
-    first_line = lines[0].strip()
-    if not first_line:
-        return "Diff must start with 'diff', '---', or '+++'"
 
-    if not first_line.startswith(("diff", "---", "+++")):
-        return "Diff must start with 'diff', '---', or '+++'"
+def validate_diff_stream(lines: Iterable[str]) -> Union[bool, str]:
+    """Validates a diff incrementally from any iterable of lines
 
+    Accepts a file object, a pipe or a generator, so large patches are never
+    materialized. Checks file headers, that every hunk has exactly the number
+    of old/new lines its @@ header declares, "\\ No newline" markers and GIT
+    binary patch payloads. Stops at the first error and reports its line.
+    """
     has_hunk = False
+    seen_line = False
+    old_left = new_left = 0
+    hunk_line = 0
+    hunk_header = ""
+    expect_new_header = False
+    binary = binary_file = False
+    last_was_content = hunk_tail = False
+    i = 0
+
     for i, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+
+        if not seen_line:
+            seen_line = True
+            first_line = line.strip()
+            if not first_line or not first_line.startswith(("diff", "---", "+++")):
+                return START_ERROR
+
+        in_hunk = old_left > 0 or new_left > 0
+
+        if binary:
+            if not line:
+                binary = False
+            elif line.startswith(("literal ", "delta ")):
+                if not line.split()[-1].isdigit():
+                    return f"Invalid binary patch size at line {i}: {line}"
+            elif not BINARY_DATA.match(line) or (len(line) - 1) % 5:
+                return f"Invalid binary patch data at line {i}: {line}"
+            continue
+
+        if expect_new_header:
+            if not line.startswith("+++"):
+                return f"Expected '+++' file header at line {i}: {line}"
+            expect_new_header = False
+            continue
+
+        if in_hunk:
+            prefix = line[:1]
+            if prefix == "\\":
+                if not last_was_content:
+                    return f"Misplaced '\\ No newline' marker at line {i}: {line}"
+                last_was_content = False
+                continue
+            if line and prefix not in " +-":
+                if line.startswith(("@@", "diff")):
+                    return (
+                        f"Hunk at line {hunk_line} is shorter than its header "
+                        f"{hunk_header} (ended at line {i})"
+                    )
+                return f"Invalid line prefix at line {i}: {line}"
+
+            # An empty line is a context line whose single space was stripped
+            if prefix in ("", " ", "-"):
+                old_left -= 1
+            if prefix in ("", " ", "+"):
+                new_left -= 1
+            if old_left < 0 or new_left < 0:
+                return (
+                    f"Hunk at line {hunk_line} has more lines than its header "
+                    f"{hunk_header} (line {i})"
+                )
+            last_was_content = hunk_tail = True
+            continue
+
+        if line.startswith("\\"):
+            if not last_was_content:
+                return f"Misplaced '\\ No newline' marker at line {i}: {line}"
+            last_was_content = False
+            continue
+        after_hunk, hunk_tail = hunk_tail, False
+        last_was_content = False
+
         if line.startswith("@@"):
-            has_hunk = True
             parts = line.split("@@")
             if len(parts) < 3:
                 return f"Invalid hunk header format at line {i}: {line}"
@@ -31,10 +116,66 @@ def is_valid_diff(diff_content: str) -> Union[bool, str]:
                     return f"Invalid line numbers in hunk header at line {i}: {line}"
             except (IndexError, ValueError):
                 return f"Invalid hunk header format at line {i}: {line}"
-        elif line and not line.startswith((" ", "+", "-", "\\", "diff", "---", "+++")):
+
+            match = HUNK_NUMBERS.match(parts[1].strip())
+            if not match:
+                return f"Invalid line numbers in hunk header at line {i}: {line}"
+
+            old_count, new_count = match.group(2), match.group(4)
+            old_left = 1 if old_count is None else int(old_count)
+            new_left = 1 if new_count is None else int(new_count)
+            hunk_line = i
+            hunk_header = f"@@{parts[1]}@@"
+            has_hunk = True
+        elif line.startswith("diff"):
+            binary_file = False
+            if line.startswith("diff --git ") and not (" b/" in line or '"' in line):
+                return f"Invalid 'diff --git' header at line {i}: {line}"
+        elif line.startswith("---"):
+            expect_new_header = True
+        elif line.startswith("+++"):
+            continue
+        elif line.startswith("GIT binary patch"):
+            binary = binary_file = True
+            has_hunk = True
+        elif binary_file and line.startswith(("literal ", "delta ")):
+            # The reverse payload of a binary patch follows a blank line
+            binary = True
+            if not line.split()[-1].isdigit():
+                return f"Invalid binary patch size at line {i}: {line}"
+        elif line.startswith(EXTENDED_HEADERS):
+            if line.startswith("Binary files "):
+                has_hunk = True
+        elif line.startswith((" ", "+", "-")):
+            if after_hunk:
+                return (
+                    f"Hunk at line {hunk_line} has more lines than its header "
+                    f"{hunk_header} (line {i})"
+                )
+            return f"Line outside of any hunk at line {i}: {line}"
+        elif line:
             return f"Invalid line prefix at line {i}: {line}"
 
+    if not seen_line:
+        return "Diff content cannot be empty"
+    if expect_new_header:
+        return f"Expected '+++' file header at line {i + 1}: end of diff"
+    if old_left > 0 or new_left > 0:
+        return (
+            f"Hunk at line {hunk_line} is shorter than its header {hunk_header} "
+            f"(missing {max(old_left, 0)} old and {max(new_left, 0)} new lines)"
+        )
     if not has_hunk:
         return "Diff must contain at least one hunk (@@ section)"
 
     return True
+
+
+def is_valid_diff(diff_content: str) -> Union[bool, str]:
+    if not diff_content:
+        return "Diff content cannot be empty"
+
+    if diff_content.isspace():
+        return START_ERROR
+
+    return validate_diff_stream(io.StringIO(diff_content))
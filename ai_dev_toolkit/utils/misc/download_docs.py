@@ -1,71 +1,168 @@
+import hashlib
+import json
 import os
+import posixpath
 import subprocess
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from urllib.parse import urlparse
+from ai_dev_toolkit.utils.misc.file_tree import walk_files
+from ai_dev_toolkit.utils.misc.files import atomic_write, compile_patterns
+from ai_dev_toolkit.utils.misc.utils import get_cache_dir
+
+# Files are unlinked in batches of this size once the walk has found them
+DELETE_BATCH = 1000
+# Repositories fetched at the same time by download_all
+DEFAULT_WORKERS = 8
+
 
 def is_valid_git_url(url: str) -> bool:
     try:
         result = urlparse(url)
+        if result.scheme == "file":
+            return bool(result.path)
         return all([result.scheme, result.netloc, result.path])
     except:
         return False
 
+
+def _dir_prefix(directory: str) -> str:
+    """Returns a directory's path prefix in the repository ("" for the root)"""
+    directory = posixpath.normpath(directory.strip("/") or ".")
+    return "" if directory == "." else directory + "/"
+
+
+def _sparse_checkout(directory: str) -> List[str]:
+    """Returns the sparse-checkout arguments that check out a directory"""
+    if not _dir_prefix(directory):
+        # The whole repository; cone mode would only keep its top-level files
+        return ["sparse-checkout", "disable"]
+    return ["sparse-checkout", "set", directory]
+
+
+def file_filter(
+    include_files: Optional[List[str]] = None,
+    exclude_files: Optional[List[str]] = None,
+) -> Callable[[str], bool]:
+    """Returns whether a path (relative to the docs directory) is kept"""
+    if include_files and exclude_files:
+        raise ValueError("Cannot specify both include_files and exclude_files")
+    if not include_files and not exclude_files:
+        return lambda relative: True
+
+    matches = compile_patterns(include_files or exclude_files)
+    keep_matches = bool(include_files)
+    return lambda relative: (
+        matches(relative, relative.rsplit("/", 1)[-1]) == keep_matches
+    )
+
+
+def prune_files(
+    root: str,
+    include_files: Optional[List[str]] = None,
+    exclude_files: Optional[List[str]] = None,
+) -> Tuple[int, int]:
+    """Deletes the files under root that the filters don't keep
+
+    With include_files only matching files are kept, with exclude_files
+    matching files are deleted. Directories left empty are removed. Returns
+    (kept, deleted).
+    """
+    keep = file_filter(include_files, exclude_files)
+    kept = deleted = 0
+    batch: List[str] = []
+    for entry in walk_files(root, gitignore=False):
+        if keep(entry.path):
+            kept += 1
+            continue
+        batch.append(os.path.join(root, entry.path))
+        if len(batch) >= DELETE_BATCH:
+            deleted += _delete(batch)
+    deleted += _delete(batch)
+    if deleted:
+        _remove_empty_dirs(root)
+    return kept, deleted
+
+
+def _delete(paths: List[str]) -> int:
+    count = len(paths)
+    for path in paths:
+        os.unlink(path)
+    paths.clear()
+    return count
+
+
+def _remove_empty_dirs(root: str) -> None:
+    for directory, dirs, files in os.walk(root, topdown=False):
+        if directory != root and not dirs and not files:
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
+
+
 def download_docs(
-    repo_url: str, 
-    directory: str, 
+    repo_url: str,
+    directory: str,
     include_files: Optional[List[str]] = None,
     exclude_files: Optional[List[str]] = None,
-    cleanup: bool = True
+    cleanup: bool = True,
+    update: bool = False,
 ) -> bool:
+    """Downloads one directory of a repository, keeping only matching files
+
+    With update=True an existing checkout is refreshed in place with
+    update_checkout, which only rewrites the files that changed upstream.
+    """
     if not is_valid_git_url(repo_url):
         raise ValueError(f"Invalid git URL: {repo_url}")
-        
+
     if not directory:
         raise ValueError("Directory cannot be empty")
-        
+
     if include_files and exclude_files:
         raise ValueError("Cannot specify both include_files and exclude_files")
-    
+
     repo_name = repo_url.split("/")[-1].replace(".git", "")
     repo_path = Path(repo_name)
-    
+
     try:
         if include_files is None and exclude_files is None:
             include_files = ["*.md"]
-            
-        find_command = ""
-        if include_files:
-            find_command = " -o ".join(f"-name '{ext}'" for ext in include_files)
-            find_command = f"find . -type f \( {find_command} \)"
-        elif exclude_files:
-            find_command = " -o ".join(f"-name '{ext}'" for ext in exclude_files)
-            find_command = f"find . -type f ! \( {find_command} \)"
-        else:
-            find_command = "find . -type f"
-            
+
+        if update and (repo_path / ".git").exists():
+            changes = update_checkout(
+                repo_path, directory, "origin", include_files, exclude_files, depth=1
+            )
+            for status, path in changes:
+                print(f"{status} {path}")
+            return True
+
         commands = [
-            f"git clone --depth 1 --filter=blob:none --sparse {repo_url}",
-            f"cd {repo_name} && git sparse-checkout set {directory}",
-            f"cd {repo_name}/{directory} && {find_command} > keep_files.txt",
-            f"cd {repo_name}/{directory} && find . -type f ! -exec grep -Fxf keep_files.txt {{}} \; -delete",
-            f"cd {repo_name}/{directory} && rm keep_files.txt"
+            (
+                ["git", "clone", "--depth", "1", "--filter=blob:none", "--sparse"]
+                + [repo_url, repo_name],
+                None,
+            ),
+            (["git", *_sparse_checkout(directory)], repo_path),
         ]
-        
-        for cmd in commands:
+        for cmd, cwd in commands:
             result = subprocess.run(
                 cmd,
-                shell=True,
+                cwd=cwd,
                 capture_output=True,
                 text=True,
                 check=True
             )
             if result.stderr:
                 print(f"Warning: {result.stderr}")
-                
+
+        prune_files(str(repo_path / directory), include_files, exclude_files)
         return True
-        
+
     except subprocess.CalledProcessError as e:
         print(f"Error executing command: {e.cmd}")
         print(f"Error output: {e.stderr}")
@@ -85,8 +182,238 @@ def cleanup_repo(repo_path: Path) -> None:
     except Exception as e:
         print(f"Error during cleanup: {str(e)}")
 
+
+@dataclass
+class DocsSource:
+    """One entry of a docs manifest: a directory of a repository to fetch"""
+
+    url: str
+    directory: str
+    include_files: Optional[List[str]] = None
+    exclude_files: Optional[List[str]] = None
+    name: str = ""
+
+    def __post_init__(self):
+        if not is_valid_git_url(self.url):
+            raise ValueError(f"Invalid git URL: {self.url}")
+        if not self.directory:
+            raise ValueError(f"{self.url}: directory cannot be empty")
+        if self.include_files and self.exclude_files:
+            raise ValueError("Cannot specify both include_files and exclude_files")
+        if self.include_files is None and self.exclude_files is None:
+            self.include_files = ["*.md"]
+        if not self.name:
+            self.name = self.url.rstrip("/").split("/")[-1].replace(".git", "")
+
+
+def load_manifest(path: str) -> List[DocsSource]:
+    """Reads a JSON manifest: a list of DocsSource fields, or {"repos": [...]}
+
+    Raises ValueError for invalid entries and for two entries with the same
+    destination name.
+    """
+    with open(path) as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("repos", [])
+    try:
+        sources = [DocsSource(**entry) for entry in data]
+    except TypeError as e:
+        raise ValueError(f"{path}: invalid manifest entry: {e}")
+
+    names = [source.name for source in sources]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"{path}: duplicate names: {', '.join(duplicates)}")
+    return sources
+
+
+def _run_git(*args: str, cwd: Optional[str] = None, input: str = None) -> str:
+    return subprocess.run(
+        ["git", *args],
+        cwd=cwd,
+        input=input,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+
+def update_mirror(url: str, mirrors_dir: Optional[str] = None) -> Path:
+    """Creates or refreshes the bare mirror of a repository, returning its path
+
+    Mirrors live in the toolkit cache (or mirrors_dir), one per URL, so
+    repeated runs only fetch objects that are new upstream.
+    """
+    base = Path(mirrors_dir) if mirrors_dir else get_cache_dir("mirrors")
+    base.mkdir(parents=True, exist_ok=True)
+    mirror = base / f"{hashlib.sha1(url.encode()).hexdigest()[:16]}.git"
+    if mirror.exists():
+        _run_git("--git-dir", str(mirror), "fetch", "--prune", "--quiet", "origin")
+    else:
+        _run_git("clone", "--mirror", "--quiet", url, str(mirror))
+    return mirror
+
+
+def update_checkout(
+    dest: Path,
+    directory: str,
+    remote: str,
+    include_files: Optional[List[str]] = None,
+    exclude_files: Optional[List[str]] = None,
+    depth: Optional[int] = None,
+) -> List[Tuple[str, str]]:
+    """Brings an existing sparse docs checkout up to date with a remote
+
+    Fetches the remote's HEAD and asks git which files under `directory`
+    changed since the checked out commit; only those are filtered and
+    rewritten. Returns the (status, path) changes to the kept files, with
+    status "A", "M" or "D" and paths relative to the checkout.
+    """
+    cwd = str(dest)
+    fetch = ["fetch", "--quiet"] + (["--depth", str(depth)] if depth else [])
+    _run_git(*fetch, remote, "HEAD", cwd=cwd)
+    old = _run_git("rev-parse", "HEAD", cwd=cwd).strip()
+    new = _run_git("rev-parse", "FETCH_HEAD", cwd=cwd).strip()
+    if old == new:
+        return []
+
+    output = _run_git(
+        "diff", "--name-status", "-z", "--no-renames", old, new, "--", directory,
+        cwd=cwd,
+    )
+    fields = [field for field in output.split("\0") if field]
+    # Only the index moves; the worktree is updated file by file below
+    _run_git("reset", "--quiet", new, cwd=cwd)
+
+    keep = file_filter(include_files, exclude_files)
+    prefix = _dir_prefix(directory)
+    changes: List[Tuple[str, str]] = []
+    restore: List[str] = []
+    for status, path in zip(fields[::2], fields[1::2]):
+        status = status[0]
+        if status == "D" or not keep(path[len(prefix):]):
+            if os.path.lexists(dest / path):
+                os.unlink(dest / path)
+                changes.append(("D", path))
+            continue
+        restore.append(path)
+        changes.append(("A" if status == "A" else "M", path))
+
+    if restore:
+        _run_git(
+            "checkout", "--pathspec-from-file=-", "--pathspec-file-nul",
+            cwd=cwd,
+            input="\0".join(restore),
+        )
+    if any(status == "D" for status, _ in changes):
+        _remove_empty_dirs(str(dest / directory))
+    return changes
+
+
+def checkout_docs(
+    source: DocsSource, mirror: Path, dest_root: str = "."
+) -> List[Tuple[str, str]]:
+    """Checks a source's directory out of its mirror into dest_root/name
+
+    The clone takes its objects from the mirror (--reference), then copies
+    them (--dissociate), so a later fetch --prune and gc of the mirror cannot
+    leave the long-lived checkout with missing objects. An existing checkout
+    is updated in place with update_checkout. Returns the (status, path)
+    changes, where a new checkout adds every kept file.
+    """
+    dest = Path(dest_root) / source.name
+    if (dest / ".git").exists():
+        try:
+            return update_checkout(
+                dest,
+                source.directory,
+                str(mirror.resolve()),
+                source.include_files,
+                source.exclude_files,
+            )
+        except subprocess.CalledProcessError:
+            # Not a checkout we can update (e.g. another repository); redo it
+            pass
+    if dest.exists():
+        shutil.rmtree(dest)
+    _run_git(
+        "clone", "--reference", str(mirror), "--dissociate", "--sparse", "--quiet",
+        str(mirror), str(dest),
+    )
+    _run_git(*_sparse_checkout(source.directory), cwd=str(dest))
+    _run_git("remote", "set-url", "origin", source.url, cwd=str(dest))
+    prune_files(
+        str(dest / source.directory), source.include_files, source.exclude_files
+    )
+    prefix = _dir_prefix(source.directory)
+    return [
+        ("A", prefix + entry.path)
+        for entry in walk_files(str(dest / source.directory), gitignore=False)
+    ]
+
+
+def download_all(
+    sources: List[DocsSource],
+    dest_root: str = ".",
+    max_workers: int = DEFAULT_WORKERS,
+    mirrors_dir: Optional[str] = None,
+    changes_path: Optional[str] = None,
+) -> Dict[str, Optional[str]]:
+    """Fetches many docs sources concurrently through a shared mirror cache
+
+    Each distinct URL is fetched once, even when several sources use it,
+    and existing checkouts are updated in place. Returns {name: None} for
+    sources that are up to date and {name: error message} for the others.
+    With changes_path, the changed files are written there as JSON lines of
+    {"name", "status", "path"} for indexers to pick up.
+    """
+
+    def error_of(e: Exception) -> str:
+        if isinstance(e, subprocess.CalledProcessError):
+            return (e.stderr or "").strip() or str(e)
+        return str(e)
+
+    def mirror(url: str):
+        try:
+            return update_mirror(url, mirrors_dir), None
+        except (subprocess.CalledProcessError, OSError) as e:
+            return None, error_of(e)
+
+    def checkout(source: DocsSource):
+        path, error = mirrors[source.url]
+        if error:
+            return [], error
+        try:
+            return checkout_docs(source, path, dest_root), None
+        except (subprocess.CalledProcessError, OSError, ValueError) as e:
+            return [], error_of(e)
+
+    urls = list(dict.fromkeys(source.url for source in sources))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        mirrors = dict(zip(urls, pool.map(mirror, urls)))
+        results = list(pool.map(checkout, sources))
+
+    if changes_path:
+        with atomic_write(changes_path) as out:
+            for source, (changes, _) in zip(sources, results):
+                for status, path in changes:
+                    line = {"name": source.name, "status": status, "path": path}
+                    out.write((json.dumps(line) + "\n").encode())
+    return {source.name: error for source, (_, error) in zip(sources, results)}
+
+
 if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1:
+        changes_path = sys.argv[2] if len(sys.argv) > 2 else None
+        results = download_all(load_manifest(sys.argv[1]), changes_path=changes_path)
+        for name, error in results.items():
+            print(f"{name}: {error or 'ok'}")
+        sys.exit(1 if any(results.values()) else 0)
+
     repo_url = "https://github.com/run-llama/llama_index.git"
     directory = "docs"
     success = download_docs(repo_url, directory, include_files=["*.md", "*.rst"])
-    print(f"Download {'successful' if success else 'failed'}")
\ No newline at end of file
+    print(f"Download {'successful' if success else 'failed'}")
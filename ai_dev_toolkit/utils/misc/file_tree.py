@@ -0,0 +1,313 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional, Pattern, Tuple
+from ai_dev_toolkit.utils.misc.files import compile_patterns
+
+DEFAULT_PATTERNS = ["*.md", "*.py", "*.ipynb"]
+# Directories the parallel walk scans ahead of its consumer, per worker
+LOOKAHEAD_PER_WORKER = 2
+# Directories that are never walked, ignored or not
+ALWAYS_SKIPPED = {".git"}
+
+# (regex, negated, directories only) for one line of a .gitignore
+Rule = Tuple[Pattern, bool, bool]
+
+
+@dataclass
+class FileEntry:
+    """A file found by walk_files, with its path relative to the root"""
+
+    path: str
+    size: int
+    mtime: float
+
+
+def _translate(pattern: str) -> str:
+    """Translates a gitignore glob into a regex body"""
+    parts = []
+    index = 0
+    while index < len(pattern):
+        if pattern.startswith("**/", index):
+            parts.append("(?:.*/)?")
+            index += 3
+        elif pattern.startswith("/**", index) and index + 3 == len(pattern):
+            parts.append("/.*")
+            index += 3
+        elif pattern.startswith("**", index):
+            parts.append(".*")
+            index += 2
+        else:
+            char = pattern[index]
+            if char == "*":
+                parts.append("[^/]*")
+            elif char == "?":
+                parts.append("[^/]")
+            elif char == "[":
+                end = pattern.find("]", index + 2)
+                if end < 0:
+                    parts.append(re.escape(char))
+                else:
+                    body = pattern[index + 1 : end].replace("\\", "\\\\")
+                    if body.startswith("!"):
+                        body = "^" + body[1:]
+                    parts.append(f"[{body}]")
+                    index = end
+            elif char == "\\" and index + 1 < len(pattern):
+                index += 1
+                parts.append(re.escape(pattern[index]))
+            else:
+                parts.append(re.escape(char))
+            index += 1
+    return "".join(parts)
+
+
+def compile_gitignore(lines: List[str]) -> List[Rule]:
+    """Compiles the lines of a .gitignore into rules, in file order
+
+    Patterns with a slash before their last character are relative to the
+    .gitignore's directory; the others match at any depth.
+    """
+    rules: List[Rule] = []
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line.endswith("\\ "):
+            line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        elif line.startswith("\\"):
+            line = line[1:]
+        directories_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        if "/" in line:
+            regex = "^" + _translate(line.lstrip("/")) + "$"
+        else:
+            regex = "^(?:.*/)?" + _translate(line) + "$"
+        rules.append((re.compile(regex, re.S), negated, directories_only))
+    return rules
+
+
+def _read_rules(path: str) -> List[Rule]:
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return compile_gitignore(f.readlines())
+    except OSError:
+        return []
+
+
+class IgnoreRules:
+    """The .gitignore rules that apply in one directory
+
+    Rules of deeper .gitignore files take precedence, and within a file
+    the last matching rule wins, as in git.
+    """
+
+    def __init__(self, levels: List[Tuple[str, List[Rule], Pattern]]):
+        # (directory relative to the root, with a trailing "/"; its rules;
+        # one regex matching whatever any of them matches)
+        self.levels = levels
+
+    def child(self, root: str, relative_dir: str) -> "IgnoreRules":
+        """Returns the rules for a subdirectory, adding its .gitignore"""
+        prefix = relative_dir + "/" if relative_dir else ""
+        rules = _read_rules(os.path.join(root, prefix, ".gitignore"))
+        return self.extend(prefix, rules)
+
+    def extend(self, prefix: str, rules: List[Rule]) -> "IgnoreRules":
+        if not rules:
+            return self
+        combined = re.compile(
+            "|".join(f"(?:{regex.pattern})" for regex, _, _ in rules), re.S
+        )
+        return IgnoreRules(self.levels + [(prefix, rules, combined)])
+
+    def ignored(self, relative: str, is_dir: bool) -> bool:
+        for prefix, rules, combined in reversed(self.levels):
+            local = relative[len(prefix) :]
+            # Most paths match no rule at all; check that with one regex
+            if not combined.match(local):
+                continue
+            for regex, negated, directories_only in reversed(rules):
+                if directories_only and not is_dir:
+                    continue
+                if regex.match(local):
+                    return not negated
+        return False
+
+
+def root_rules(root: str) -> IgnoreRules:
+    """Returns the rules of root's .gitignore and .git/info/exclude"""
+    rules = _read_rules(os.path.join(root, ".git", "info", "exclude"))
+    return IgnoreRules([]).extend("", rules).child(root, "")
+
+
+def parent_rules(root: str, relative: str) -> IgnoreRules:
+    """Returns the rules in force in the directory that holds a path"""
+    rules = root_rules(os.path.abspath(root))
+    parts = relative.split("/")
+    for depth in range(1, len(parts)):
+        rules = rules.child(root, "/".join(parts[:depth]))
+    return rules
+
+
+def is_ignored(root: str, relative: str, is_dir: bool = False) -> bool:
+    """Returns whether walk_files would leave out a path (relative to root)"""
+    parts = relative.split("/")
+    if any(part in ALWAYS_SKIPPED for part in parts[:-1]):
+        return True
+    rules = root_rules(os.path.abspath(root))
+    for depth in range(1, len(parts)):
+        directory = "/".join(parts[:depth])
+        if rules.ignored(directory, True):
+            return True
+        rules = rules.child(root, directory)
+    return rules.ignored(relative, is_dir)
+
+
+def match_patterns(patterns: List[str]) -> Callable[[str], bool]:
+    """Returns whether a relative path matches walk_files-style patterns
+
+    Bare extensions like ".txt" are taken as "*.txt".
+    """
+    matches = compile_patterns(
+        [
+            "*" + pattern
+            if pattern.startswith(".") and not any(c in pattern for c in "*?[")
+            else pattern
+            for pattern in patterns
+        ]
+    )
+    return lambda relative: matches(relative, relative.rsplit("/", 1)[-1])
+
+
+def _scan_dir(
+    root: str,
+    relative_dir: str,
+    rules: Optional[IgnoreRules],
+    matches: Optional[Callable[[str], bool]],
+) -> Tuple[List[FileEntry], List[str]]:
+    """Returns the matching files and the subdirectories to walk of a directory"""
+    directory = os.path.join(root, relative_dir) if relative_dir else root
+    prefix = relative_dir + "/" if relative_dir else ""
+    try:
+        with os.scandir(directory) as scanned:
+            entries = sorted(scanned, key=lambda entry: entry.name)
+    except OSError:
+        return [], []
+
+    files: List[FileEntry] = []
+    subdirs: List[str] = []
+    for entry in entries:
+        relative = prefix + entry.name
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if is_dir:
+                if entry.name in ALWAYS_SKIPPED:
+                    continue
+            elif matches is not None and not matches(relative):
+                continue
+            if rules is not None and rules.ignored(relative, is_dir):
+                continue
+            if is_dir:
+                subdirs.append(relative)
+            else:
+                stat = entry.stat(follow_symlinks=False)
+                files.append(FileEntry(relative, stat.st_size, stat.st_mtime))
+        except OSError:
+            # Removed while walking
+            continue
+    return files, subdirs
+
+
+def _walk(
+    root: str,
+    relative_dir: str,
+    rules: Optional[IgnoreRules],
+    matches: Optional[Callable[[str], bool]],
+) -> Iterator[FileEntry]:
+    # Directories still to walk, next one last, with their parent's rules
+    stack = [(relative_dir, rules)]
+    while stack:
+        directory, rules = stack.pop()
+        if directory and rules is not None:
+            rules = rules.child(root, directory)
+        files, subdirs = _scan_dir(root, directory, rules, matches)
+        yield from files
+        stack.extend((subdir, rules) for subdir in reversed(subdirs))
+
+
+def _walk_parallel(
+    root: str,
+    relative_dir: str,
+    rules: Optional[IgnoreRules],
+    matches: Optional[Callable[[str], bool]],
+    max_workers: Optional[int],
+) -> Iterator[FileEntry]:
+    """Walks like _walk, scanning the next directories in a thread pool
+
+    Only the directories about to be reached are submitted, so files come
+    out as soon as their directory is scanned and stopping early leaves
+    the rest of the tree alone.
+    """
+
+    def scan(directory: str, rules: Optional[IgnoreRules]):
+        if directory and rules is not None:
+            rules = rules.child(root, directory)
+        files, subdirs = _scan_dir(root, directory, rules, matches)
+        return files, subdirs, rules
+
+    workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+    lookahead = workers * LOOKAHEAD_PER_WORKER
+    # [directory, parent's rules, future once submitted], next one last
+    stack: List[list] = [[relative_dir, rules, None]]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            while stack:
+                for item in stack[-lookahead:]:
+                    if item[2] is None:
+                        item[2] = pool.submit(scan, item[0], item[1])
+                files, subdirs, rules = stack.pop()[2].result()
+                yield from files
+                stack.extend([subdir, rules, None] for subdir in reversed(subdirs))
+        finally:
+            for _, _, future in stack:
+                if future is not None:
+                    future.cancel()
+
+
+def walk_files(
+    root: str = ".",
+    patterns: Optional[List[str]] = None,
+    gitignore: bool = True,
+    parallel: bool = False,
+    max_workers: Optional[int] = None,
+    subdirectory: str = "",
+) -> Iterator[FileEntry]:
+    """Lazily yields the files under root, with their size and mtime
+
+    Files must match one of `patterns` (globs on the file name, or on the
+    relative path if they contain a "/"; bare extensions like ".py" work
+    too); None yields every file. With gitignore, .gitignore files at every
+    level and .git/info/exclude are honoured. With parallel, the next
+    directories to walk are scanned ahead in a thread pool. Either way,
+    each directory's files come before its subdirectories, in name order.
+
+    With subdirectory (relative to root), only the files below it are
+    yielded, still with paths relative to root and with the .gitignore
+    files of its parents applied.
+    """
+    root = os.path.abspath(root)
+    matches = match_patterns(patterns) if patterns else None
+    rules = None
+    if gitignore:
+        rules = parent_rules(root, subdirectory) if subdirectory else root_rules(root)
+    if parallel:
+        yield from _walk_parallel(root, subdirectory, rules, matches, max_workers)
+    else:
+        yield from _walk(root, subdirectory, rules, matches)
@@ -0,0 +1,93 @@
+import fnmatch
+import mmap
+import os
+import re
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, List, Pattern, Union
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def cache_path(name: str) -> Path:
+    """Returns where a toolkit cache directory lives, without creating it
+
+    Defaults to $XDG_CACHE_HOME/aitk (~/.cache/aitk) and can be moved with the
+    AITK_CACHE_DIR environment variable.
+    """
+    base = os.environ.get("AITK_CACHE_DIR") or os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "aitk"
+    )
+    return Path(base) / name
+
+
+@contextmanager
+def map_file(path: str) -> Iterator[Union[mmap.mmap, bytes]]:
+    """Maps a file read-only into memory
+
+    Empty files cannot be mapped, so they are exposed as b"" which supports the
+    same find/slice/regex operations.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+def copy_range(
+    data: Union[mmap.mmap, bytes],
+    out: BinaryIO,
+    start: int,
+    end: int,
+    chunk_size: int = COPY_CHUNK_SIZE,
+) -> None:
+    """Copies data[start:end] to out without materializing the whole range"""
+    while start < end:
+        stop = min(start + chunk_size, end)
+        out.write(data[start:stop])
+        start = stop
+
+
+@contextmanager
+def atomic_write(path: str) -> Iterator[BinaryIO]:
+    """Writes to a temporary sibling file and renames it over path on success
+
+    Readers never see a half-written file, and a failure leaves the original
+    untouched. The original file's permissions are kept.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            yield tmp
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def compile_patterns(patterns: List[str]) -> Callable[[str, str], bool]:
+    """Compiles shell globs into one matcher of (relative path, file name)
+
+    Like `find -name`, patterns match the file name; patterns with a "/"
+    match the path relative to the walked directory instead.
+    """
+
+    def compile_any(globs: List[str]) -> Pattern:
+        return re.compile("|".join(fnmatch.translate(g) for g in globs) or "(?!)")
+
+    names = compile_any([p for p in patterns if "/" not in p]).match
+    paths = compile_any([p for p in patterns if "/" in p]).match
+    return lambda relative, name: bool(names(name) or paths(relative))
@@ -0,0 +1,54 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Optional
+from ai_dev_toolkit.utils.misc.files import cache_path
+
+STATE_VERSION = 3
+# Each key is saved to its own file, so readers only load what they use:
+# "files" is {path: [size, mtime]} as get_file_tree lists them, "versions"
+# is {file: version} of the version files bump_version looks for, and
+# "diff_stats" is {path: [added, deleted]} of the working tree against HEAD
+STATE_KEYS = ("files", "versions", "diff_stats")
+
+
+def state_dir(root: str) -> Path:
+    """Returns where `aitk watch` keeps the state of root (not created here)"""
+    digest = hashlib.sha1(os.path.abspath(root).encode()).hexdigest()[:16]
+    return cache_path("state") / digest
+
+
+def _alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _load(path: Path) -> Any:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def read_state(root: str, key: str) -> Optional[Any]:
+    """Returns one key of the state kept by a running `aitk watch` of root
+
+    It is None when no watcher is running, since the state could then be
+    stale. Nothing is created on disk.
+    """
+    directory = state_dir(root)
+    meta = _load(directory / "meta.json")
+    if not isinstance(meta, dict) or meta.get("version") != STATE_VERSION:
+        return None
+    if not _alive(meta.get("pid")):
+        return None
+    return _load(directory / f"{key}.json")
@@ -1,3 +1,13 @@
+from pathlib import Path
+from ai_dev_toolkit.utils.misc.file_tree import (
+    DEFAULT_PATTERNS,
+    match_patterns,
+    walk_files,
+)
+from ai_dev_toolkit.utils.misc.files import cache_path
+from ai_dev_toolkit.utils.misc.state import read_state
+
+
 def get_operational_system():
     import platform
 
@@ -18,9 +28,26 @@ def get_operational_system():
     return system
 
 def get_file_tree(directory: str, file_extensions: list[str] | None = None):
+    """Returns the paths of matching files under directory, relative to it
+
+    Files ignored by .gitignore are left out; see file_tree.walk_files. When
+    `aitk watch` is running on directory, its listing is used instead of
+    walking the tree.
+    """
     if file_extensions is None:
-        file_extensions = ["*.md", "*.py", "*.ipynb"]
-        
-    find_command = " -o ".join(f"-name '{ext}'" for ext in file_extensions)
-    return find_command
+        file_extensions = DEFAULT_PATTERNS
+    files = read_state(directory, "files")
+    if files is not None:
+        matches = match_patterns(file_extensions)
+        return [path for path in files if matches(path)]
+    return [entry.path for entry in walk_files(directory, file_extensions)]
+
+
+def get_cache_dir(name: str) -> Path:
+    """Returns a toolkit cache directory, creating it if needed
 
+    See files.cache_path for where it is.
+    """
+    path = cache_path(name)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
@@ -0,0 +1,266 @@
+import importlib.util
+import json
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from ai_dev_toolkit.utils.git.release import VERSION_FILES, read_version
+from ai_dev_toolkit.utils.git.stage_files import diff_stats
+from ai_dev_toolkit.utils.git.status import repo_stamp
+from ai_dev_toolkit.utils.misc.file_tree import (
+    ALWAYS_SKIPPED,
+    is_ignored,
+    parent_rules,
+    walk_files,
+)
+from ai_dev_toolkit.utils.misc.files import atomic_write
+from ai_dev_toolkit.utils.misc.state import STATE_KEYS, STATE_VERSION, state_dir
+
+# Quiet time that ends a burst of events, and the longest a burst may delay
+# an update
+DEBOUNCE = 0.2
+MAX_DELAY = 2.0
+POLL_INTERVAL = 1.0
+
+
+def _read_version(root: str, file: str) -> Optional[str]:
+    try:
+        return read_version(os.path.join(root, file))
+    except (OSError, ValueError):
+        return None
+
+
+class WorkspaceState:
+    """What the toolkit knows about a working tree, kept up to date by watch
+
+    rebuild() computes everything; apply() updates it for a set of changed
+    paths, re-reading only those files and directories. Each of STATE_KEYS
+    is an attribute; state.read_state reads them back.
+    """
+
+    def __init__(self, root: str = "."):
+        self.root = os.path.abspath(root)
+        self.directory = state_dir(self.root)
+        self.files: Dict[str, List] = {}
+        self.versions: Dict[str, str] = {}
+        self.diff_stats: Dict[str, List] = {}
+
+    def rebuild(self) -> None:
+        self.files = {
+            entry.path: [entry.size, entry.mtime] for entry in walk_files(self.root)
+        }
+        self.versions = {}
+        for file in VERSION_FILES:
+            self._update_version(file)
+        self.diff_stats = diff_stats(self.root)
+
+    def _update_version(self, file: str) -> None:
+        version = _read_version(self.root, file) if file in self.files else None
+        if version:
+            self.versions[file] = version
+        else:
+            self.versions.pop(file, None)
+
+    def apply(self, changed: Iterable[str], head_moved: bool = False) -> None:
+        """Updates the state for paths (relative to root) that changed
+
+        A changed directory (created, moved in or removed) is re-listed as a
+        whole, which also covers files written into a new directory before
+        the watcher saw it. When HEAD or the index moved (head_moved), every
+        diff stat is recomputed, since the base of the diff changed.
+        """
+        changed = set(changed)
+        if any(os.path.basename(path) == ".gitignore" for path in changed):
+            # Which files are listed at all may have changed
+            self.rebuild()
+            return
+
+        for path in changed:
+            # Whatever was listed at or below the path is re-read
+            prefix = path + "/"
+            for listed in [p for p in self.files if p.startswith(prefix)]:
+                del self.files[listed]
+            self.files.pop(path, None)
+
+            full = os.path.join(self.root, path)
+            if os.path.isdir(full) and not os.path.islink(full):
+                if not is_ignored(self.root, path, True):
+                    for entry in walk_files(self.root, subdirectory=path):
+                        self.files[entry.path] = [entry.size, entry.mtime]
+            elif os.path.isfile(full) and not is_ignored(self.root, path):
+                stat = os.stat(full)
+                self.files[path] = [stat.st_size, stat.st_mtime]
+
+        for file in VERSION_FILES:
+            if file in changed:
+                self._update_version(file)
+
+        if head_moved:
+            self.diff_stats = diff_stats(self.root)
+        elif changed:
+            for path in changed:
+                prefix = path + "/"
+                for listed in [p for p in self.diff_stats if p.startswith(prefix)]:
+                    del self.diff_stats[listed]
+                self.diff_stats.pop(path, None)
+            self.diff_stats.update(diff_stats(self.root, sorted(changed)))
+
+    def save(self, pid: Optional[int] = None) -> None:
+        """Writes every key, then the metadata that makes readers trust them"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for key in STATE_KEYS:
+            with atomic_write(str(self.directory / f"{key}.json")) as out:
+                out.write(json.dumps(getattr(self, key)).encode())
+        meta = {
+            "version": STATE_VERSION,
+            "root": self.root,
+            "pid": pid,
+            "updated": time.time(),
+        }
+        with atomic_write(str(self.directory / "meta.json")) as out:
+            out.write(json.dumps(meta).encode())
+
+
+class PollingWatcher:
+    """Finds changes by comparing snapshots of sizes and mtimes"""
+
+    def __init__(self, root: str, interval: float = POLL_INTERVAL):
+        self.root = os.path.abspath(root)
+        self.interval = interval
+        self.snapshot = self._snapshot()
+
+    def _snapshot(self) -> Dict[str, tuple]:
+        return {
+            entry.path: (entry.size, entry.mtime) for entry in walk_files(self.root)
+        }
+
+    def wait(self, timeout: float) -> Set[str]:
+        """Returns the paths that changed, waiting at least one interval"""
+        time.sleep(max(timeout, self.interval))
+        previous, self.snapshot = self.snapshot, self._snapshot()
+        return {
+            path
+            for path in previous.keys() | self.snapshot.keys()
+            if previous.get(path) != self.snapshot.get(path)
+        }
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Receives changes from Linux inotify (needs the inotify_simple package)
+
+    Every directory walk_files would enter is watched.
+    """
+
+    def __init__(self, root: str):
+        from inotify_simple import INotify, flags
+
+        self.root = os.path.abspath(root)
+        self.flags = flags
+        self.mask = (
+            flags.CREATE
+            | flags.DELETE
+            | flags.CLOSE_WRITE
+            | flags.MOVED_FROM
+            | flags.MOVED_TO
+            | flags.ATTRIB
+        )
+        self.inotify = INotify()
+        self.directories: Dict[int, str] = {}
+        self._watch_tree("")
+
+    def _watch_tree(self, relative: str) -> None:
+        # Each directory adds its own .gitignore to its parents' rules
+        stack = [(relative, parent_rules(self.root, relative))]
+        while stack:
+            directory, rules = stack.pop()
+            if directory:
+                rules = rules.child(self.root, directory)
+            full = os.path.join(self.root, directory)
+            try:
+                wd = self.inotify.add_watch(full, self.mask)
+                entries = list(os.scandir(full))
+            except OSError:
+                continue
+            self.directories[wd] = directory
+            prefix = directory + "/" if directory else ""
+            for entry in entries:
+                child = prefix + entry.name
+                if (
+                    entry.is_dir(follow_symlinks=False)
+                    and entry.name not in ALWAYS_SKIPPED
+                    and not rules.ignored(child, True)
+                ):
+                    stack.append((child, rules))
+
+    def wait(self, timeout: float) -> Set[str]:
+        changed = set()
+        for event in self.inotify.read(timeout=int(timeout * 1000)):
+            directory = self.directories.get(event.wd)
+            if directory is None or not event.name:
+                continue
+            path = f"{directory}/{event.name}" if directory else event.name
+            changed.add(path)
+            is_dir = event.mask & self.flags.ISDIR
+            if is_dir and event.mask & (self.flags.CREATE | self.flags.MOVED_TO):
+                if not is_ignored(self.root, path, True):
+                    self._watch_tree(path)
+        return changed
+
+    def close(self) -> None:
+        self.inotify.close()
+
+
+def make_watcher(root: str):
+    """Returns an inotify watcher when available, else a polling one"""
+    if importlib.util.find_spec("inotify_simple") is not None:
+        try:
+            return InotifyWatcher(root)
+        except OSError:
+            # e.g. the inotify watch limit is reached
+            pass
+    return PollingWatcher(root)
+
+
+def watch(
+    root: str = ".",
+    watcher=None,
+    on_update: Optional[Callable[[Set[str]], None]] = None,
+    stop: Optional[Callable[[], bool]] = None,
+    debounce: float = DEBOUNCE,
+    max_delay: float = MAX_DELAY,
+) -> None:
+    """Keeps root's WorkspaceState up to date until stop() returns True
+
+    Events are batched until `debounce` seconds pass without one (or
+    `max_delay` after the first), then the state is updated and saved.
+    Commits, checkouts and staging are noticed by polling repo_stamp once
+    per wait.
+    """
+    # Started first so nothing that changes during the rebuild is missed
+    watcher = watcher or make_watcher(root)
+    stamp = repo_stamp(root)
+    state = WorkspaceState(root)
+    state.rebuild()
+    pid = os.getpid()
+    state.save(pid)
+    try:
+        while not (stop and stop()):
+            changed = watcher.wait(1.0)
+            previous, stamp = stamp, repo_stamp(root)
+            if not changed and stamp == previous:
+                continue
+            first = time.monotonic()
+            while changed and time.monotonic() - first < max_delay:
+                more = watcher.wait(debounce)
+                if not more:
+                    break
+                changed |= more
+            state.apply(changed, head_moved=stamp != previous)
+            state.save(pid)
+            if on_update:
+                on_update(changed)
+    finally:
+        watcher.close()
+        state.save(None)
@@ -0,0 +1,118 @@
+"""Measures the branch inventory, merge previews and bulk delete
+
+A synthetic repository gets a few thousand branches, half of them merged.
+The per-branch baselines run one git process per branch, as building the
+same view from list_branches and delete_branch would.
+
+Usage: python -m benchmarks.bench_branches [branches]
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from ai_dev_toolkit.utils.git.branch import (
+    delete_branch,
+    delete_branches,
+    get_branches,
+    list_branches,
+    preview_merge,
+    preview_merges,
+)
+
+# Branches checked by the merge preview measurements
+PREVIEWED = 100
+
+GIT = ["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com"]
+
+
+def git(root: str, *args: str) -> str:
+    return subprocess.run(
+        GIT + list(args), cwd=root, capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+
+def build_repo(root: str, branches: int) -> None:
+    git(root, "init", "-q", "-b", "main")
+    git(root, "commit", "-q", "--allow-empty", "-m", "base")
+    base = git(root, "rev-parse", "HEAD")
+    git(root, "commit", "-q", "--allow-empty", "-m", "main")
+    head = git(root, "rev-parse", "HEAD")
+    side = git(root, "commit-tree", "-p", base, "-m", "side", "HEAD^{tree}")
+    # Even branches point at HEAD (merged), odd ones at a commit off main
+    commands = "".join(
+        f"create refs/heads/feature/{number} {side if number % 2 else head}\n"
+        for number in range(branches)
+    )
+    subprocess.run(
+        ["git", "update-ref", "--stdin"],
+        cwd=root,
+        input=commands,
+        text=True,
+        check=True,
+    )
+
+
+def quietly(func):
+    """Runs func with stdout (which delete_branch's git writes to) discarded"""
+    saved = os.dup(1)
+    with open(os.devnull, "w") as devnull:
+        os.dup2(devnull.fileno(), 1)
+    try:
+        return func()
+    finally:
+        os.dup2(saved, 1)
+        os.close(saved)
+
+
+def inventory_per_branch() -> int:
+    names = list_branches()
+    for name in names:
+        subprocess.run(
+            ["git", "log", "-1", "--format=%ct%x00%an", name],
+            capture_output=True,
+            check=True,
+        )
+        subprocess.run(
+            ["git", "merge-base", "--is-ancestor", name, "HEAD"], capture_output=True
+        )
+    return len(names)
+
+
+def measure(label: str, func) -> None:
+    start = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed * 1000:9.1f} ms  {count:6d} branches")
+
+
+if __name__ == "__main__":
+    branches = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    root = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    try:
+        build_repo(root, branches)
+        os.chdir(root)
+        print(f"synthetic repository: {branches} branches")
+        measure("git log + merge-base per branch", inventory_per_branch)
+        measure("get_branches", lambda: len(get_branches()))
+
+        names = [branch.name for branch in get_branches()][:PREVIEWED]
+        measure(
+            "preview_merge one at a time",
+            lambda: len([preview_merge(name) for name in names]),
+        )
+        measure("preview_merges", lambda: len(preview_merges(names)))
+
+        merged = [branch.name for branch in get_branches() if branch.merged]
+        half = len(merged) // 2
+        one_by_one = merged[:half]
+        measure(
+            "delete_branch per branch",
+            lambda: quietly(lambda: sum(delete_branch(name) for name in one_by_one)),
+        )
+        measure("delete_branches", lambda: len(delete_branches(merged[half:])[0]))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(root)
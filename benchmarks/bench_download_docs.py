@@ -0,0 +1,70 @@
+"""Measures download_docs filtering on a synthetic docs tree
+
+Compares the in-process prune_files walk with the find/grep pipeline it
+replaced, which forks one grep per file. The old pipeline is timed on a
+sample of the tree and extrapolated linearly.
+
+Usage: python -m benchmarks.bench_download_docs [files] [legacy sample]
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from ai_dev_toolkit.utils.misc.download_docs import prune_files
+
+EXTENSIONS = [".md", ".rst", ".py", ".png", ".ipynb", ".txt", ".json", ".svg"]
+INCLUDE = ["*.md", "*.rst"]
+
+
+def build_tree(root: str, files: int) -> None:
+    for number in range(files):
+        directory = os.path.join(
+            root, f"section_{number % 50}", f"topic {number % 400 // 50}"
+        )
+        os.makedirs(directory, exist_ok=True)
+        name = f"page_{number}{EXTENSIONS[number % len(EXTENSIONS)]}"
+        with open(os.path.join(directory, name), "w") as f:
+            f.write("x")
+
+
+def legacy_prune(root: str) -> None:
+    names = " -o ".join(f"-name '{pattern}'" for pattern in INCLUDE)
+    for cmd in [
+        f"find . -type f \\( {names} \\) > keep_files.txt",
+        "find . -type f ! -exec grep -Fxf keep_files.txt {} \\; -delete",
+        "rm keep_files.txt",
+    ]:
+        subprocess.run(cmd, shell=True, cwd=root, check=True, capture_output=True)
+
+
+def measure(label: str, func, files: int) -> float:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed * 1000:10.1f} ms  {files / elapsed:10.0f} files/s")
+    return elapsed
+
+
+if __name__ == "__main__":
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    sample = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    base = tempfile.mkdtemp()
+    try:
+        native = os.path.join(base, "native")
+        build_tree(native, files)
+        print(f"synthetic tree: {files} files")
+        measure("prune_files (in-process)", lambda: prune_files(native, INCLUDE), files)
+
+        legacy = os.path.join(base, "legacy")
+        build_tree(legacy, sample)
+        elapsed = measure(
+            f"find + grep ({sample} files)", lambda: legacy_prune(legacy), sample
+        )
+        # grep also reads a keep list that grows with the tree, so this is a
+        # lower bound
+        estimate = elapsed * files / sample * 1000
+        print(f"{'find + grep (extrapolated)':<32} {estimate:10.1f} ms")
+    finally:
+        shutil.rmtree(base)
@@ -0,0 +1,80 @@
+"""Measures walk_files against find and git ls-files on a synthetic tree
+
+The tree has a .gitignore that excludes a build directory and a file type,
+like a typical checkout. find is given the same name patterns but, unlike
+the others, does not know about .gitignore.
+
+Usage: python -m benchmarks.bench_file_tree [files]
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from ai_dev_toolkit.utils.misc.file_tree import DEFAULT_PATTERNS, walk_files
+
+EXTENSIONS = [".py", ".md", ".ipynb", ".json", ".pyc", ".txt"]
+
+
+def build_tree(root: str, files: int) -> None:
+    subprocess.run(["git", "init", "-q", root], check=True)
+    with open(os.path.join(root, ".gitignore"), "w") as f:
+        f.write("build/\n*.pyc\n")
+    for number in range(files):
+        top = "build" if number % 10 == 0 else f"package_{number % 16}"
+        directory = os.path.join(root, top, f"module_{number % 200 // 16}")
+        os.makedirs(directory, exist_ok=True)
+        name = f"file_{number}{EXTENSIONS[number % len(EXTENSIONS)]}"
+        with open(os.path.join(directory, name), "w") as f:
+            f.write("x")
+
+
+def run_find(root: str) -> int:
+    names = []
+    for pattern in DEFAULT_PATTERNS:
+        names += ["-o", "-name", pattern]
+    output = subprocess.run(
+        ["find", ".", "-type", "f", "(", *names[1:], ")"],
+        cwd=root,
+        capture_output=True,
+        check=True,
+    ).stdout
+    return output.count(b"\n")
+
+
+def run_ls_files(root: str) -> int:
+    output = subprocess.run(
+        ["git", "ls-files", "-z", "-co", "--exclude-standard", "--", *DEFAULT_PATTERNS],
+        cwd=root,
+        capture_output=True,
+        check=True,
+    ).stdout
+    return output.count(b"\0")
+
+
+def measure(label: str, func) -> None:
+    start = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<30} {elapsed * 1000:8.1f} ms  {count:8d} files")
+
+
+if __name__ == "__main__":
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    root = tempfile.mkdtemp()
+    try:
+        build_tree(root, files)
+        print(f"synthetic tree: {files} files")
+        measure("find -name (no .gitignore)", lambda: run_find(root))
+        measure("git ls-files -co", lambda: run_ls_files(root))
+        measure(
+            "walk_files",
+            lambda: sum(1 for _ in walk_files(root, DEFAULT_PATTERNS)),
+        )
+        measure(
+            "walk_files (parallel)",
+            lambda: sum(1 for _ in walk_files(root, DEFAULT_PATTERNS, parallel=True)),
+        )
+    finally:
+        shutil.rmtree(root)
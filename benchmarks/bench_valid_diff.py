@@ -0,0 +1,58 @@
+"""Measures is_valid_diff / validate_diff_stream throughput on a synthetic patch
+
+Usage: python -m benchmarks.bench_valid_diff [megabytes]
+"""
+import io
+import sys
+import time
+from ai_dev_toolkit.utils.git.valid import is_valid_diff, validate_diff_stream
+
+
+def build_diff(megabytes: float) -> str:
+    hunk = (
+        "@@ -{start},6 +{start},7 @@ def handler(request):\n"
+        "     context = build_context(request)\n"
+        "-    result = process(context)\n"
+        "+    result = process(context, retries=3)\n"
+        "+    log_result(result)\n"
+        "     if not result:\n"
+        "         return None\n"
+        "     return render(result)\n"
+        "     # end of handler\n"
+    )
+    parts = []
+    size = 0
+    file_number = 0
+    while size < megabytes * 1024 * 1024:
+        header = (
+            f"diff --git a/src/module_{file_number}.py b/src/module_{file_number}.py\n"
+            f"--- a/src/module_{file_number}.py\n"
+            f"+++ b/src/module_{file_number}.py\n"
+        )
+        body = "".join(hunk.format(start=1 + i * 20) for i in range(50))
+        parts.append(header + body)
+        size += len(header) + len(body)
+        file_number += 1
+    return "".join(parts)
+
+
+def measure(label: str, func, size: int) -> None:
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    assert result is True, result
+    print(f"{label:<28} {elapsed * 1000:8.1f} ms  {size / elapsed / 1e6:8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 20
+    diff = build_diff(megabytes)
+    size = len(diff)
+    print(f"synthetic diff: {size / 1e6:.1f} MB, {diff.count(chr(10))} lines")
+
+    measure("is_valid_diff (string)", lambda: is_valid_diff(diff), size)
+    measure(
+        "validate_diff_stream (file)",
+        lambda: validate_diff_stream(io.StringIO(diff)),
+        size,
+    )
@@ -0,0 +1,26 @@
+from ai_dev_toolkit.commands.docs_search import DocsSearchCommand
+
+
+def test_docs_search_command_initialization():
+    cmd = DocsSearchCommand()
+    assert cmd.name == "docs-search"
+
+
+def test_docs_search_prints_matching_sections(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path / "cache"))
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "deploy.md").write_text("# Deploy\n\nUse the release script.")
+    monkeypatch.chdir(tmp_path)
+
+    DocsSearchCommand().execute("release")
+
+    out = capsys.readouterr().out
+    assert "docs/deploy.md:1" in out
+    assert "release script" in out
+
+
+def test_docs_search_reports_no_matches(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+    DocsSearchCommand().execute("anything")
+    assert "No documentation matching" in capsys.readouterr().out
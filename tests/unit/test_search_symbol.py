@@ -0,0 +1,27 @@
+from ai_dev_toolkit.commands.search_symbol import SearchSymbolCommand
+
+
+def test_search_symbol_command_initialization():
+    cmd = SearchSymbolCommand()
+    assert cmd.name == "search-symbol"
+
+
+def test_search_symbol_lists_matching_definitions(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path / "cache"))
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "shop.py").write_text("def checkout():\n    pass\n\ncheckout()\n")
+    monkeypatch.chdir(repo)
+
+    SearchSymbolCommand().execute("check")
+
+    out = capsys.readouterr().out
+    assert "checkout" in out
+    assert "shop.py:1" in out
+
+
+def test_search_symbol_reports_no_matches(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+    SearchSymbolCommand().execute("missing")
+    assert "No symbols matching" in capsys.readouterr().out
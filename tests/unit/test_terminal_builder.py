@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import AsyncMock, patch, MagicMock
 from ai_dev_toolkit.commands.terminal_builder import TerminalBuilderCommand, CliResultType
 
 def test_terminal_builder_initialization():
@@ -7,15 +7,16 @@ def test_terminal_builder_initialization():
     assert cmd.name == "cli-command"
     assert cmd.help == "Build and execute terminal commands using AI"
 
-@patch('ai_dev_toolkit.commands.terminal_builder.Agent')
+@patch('ai_dev_toolkit.utils.ai.routing.get_agent')
 @patch('ai_dev_toolkit.commands.terminal_builder.Confirm.ask')
 @patch('os.system')
-def test_terminal_builder_execute_success(mock_system, mock_confirm, mock_agent):
+def test_terminal_builder_execute_success(mock_system, mock_confirm, mock_agent, tmp_path, monkeypatch):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path))
     # Setup mocks
     mock_result = MagicMock()
     mock_result.data = CliResultType(command="echo test")
     mock_agent_instance = MagicMock()
-    mock_agent_instance.run_sync.return_value = mock_result
+    mock_agent_instance.run = AsyncMock(return_value=mock_result)
     mock_agent.return_value = mock_agent_instance
     mock_confirm.return_value = True
 
@@ -24,19 +25,20 @@ def test_terminal_builder_execute_success(mock_system, mock_confirm, mock_agent)
     cmd.execute("print hello")
 
     # Verify
-    mock_agent_instance.run_sync.assert_called_once_with("print hello")
+    mock_agent_instance.run.assert_awaited_once_with("print hello")
     mock_confirm.assert_called_once()
     mock_system.assert_called_once_with("echo test")
 
-@patch('ai_dev_toolkit.commands.terminal_builder.Agent')
+@patch('ai_dev_toolkit.utils.ai.routing.get_agent')
 @patch('ai_dev_toolkit.commands.terminal_builder.Confirm.ask')
 @patch('os.system')
-def test_terminal_builder_execute_no_confirm(mock_system, mock_confirm, mock_agent):
+def test_terminal_builder_execute_no_confirm(mock_system, mock_confirm, mock_agent, tmp_path, monkeypatch):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path))
     # Setup mocks
     mock_result = MagicMock()
     mock_result.data = CliResultType(command="echo test")
     mock_agent_instance = MagicMock()
-    mock_agent_instance.run_sync.return_value = mock_result
+    mock_agent_instance.run = AsyncMock(return_value=mock_result)
     mock_agent.return_value = mock_agent_instance
     mock_confirm.return_value = False
 
@@ -45,17 +47,38 @@ def test_terminal_builder_execute_no_confirm(mock_system, mock_confirm, mock_age
     cmd.execute("print hello")
 
     # Verify
-    mock_agent_instance.run_sync.assert_called_once_with("print hello")
+    mock_agent_instance.run.assert_awaited_once_with("print hello")
     mock_confirm.assert_called_once()
     mock_system.assert_not_called()
 
-@patch('ai_dev_toolkit.commands.terminal_builder.Agent')
-def test_terminal_builder_execute_error(mock_agent):
+@patch('ai_dev_toolkit.utils.ai.routing.get_agent')
+def test_terminal_builder_execute_error(mock_agent, tmp_path, monkeypatch):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path))
     # Setup mock to raise an exception
     mock_agent_instance = MagicMock()
-    mock_agent_instance.run_sync.side_effect = Exception("Test error")
+    mock_agent_instance.run = AsyncMock(side_effect=Exception("Test error"))
     mock_agent.return_value = mock_agent_instance
 
     # Execute command and verify error handling
     cmd = TerminalBuilderCommand()
-    cmd.execute("print hello")  # Should not raise exception 
\ No newline at end of file
+    cmd.execute("print hello")  # Should not raise exception 
+
+
+@patch('ai_dev_toolkit.utils.ai.routing.get_agent')
+@patch('ai_dev_toolkit.commands.terminal_builder.Confirm.ask')
+@patch('os.system')
+def test_terminal_builder_reuses_accepted_command_for_similar_request(mock_system, mock_confirm, mock_agent, tmp_path, monkeypatch):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path))
+    mock_result = MagicMock()
+    mock_result.data = CliResultType(command="du -ah . | sort -rh | head")
+    mock_agent_instance = MagicMock()
+    mock_agent_instance.run = AsyncMock(return_value=mock_result)
+    mock_agent.return_value = mock_agent_instance
+    mock_confirm.return_value = True
+
+    TerminalBuilderCommand().execute("list big files")
+    TerminalBuilderCommand().execute("show the largest files")
+
+    mock_agent_instance.run.assert_awaited_once()
+    assert mock_system.call_count == 2
+    mock_system.assert_called_with("du -ah . | sort -rh | head")
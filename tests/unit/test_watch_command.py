@@ -0,0 +1,15 @@
+from unittest.mock import patch
+from ai_dev_toolkit.commands.watch import WatchCommand
+
+
+def test_watch_command_initialization():
+    cmd = WatchCommand()
+    assert cmd.name == "watch"
+
+
+def test_watch_command_stops_on_interrupt(tmp_path, capsys):
+    with patch("ai_dev_toolkit.commands.watch.watch", side_effect=KeyboardInterrupt):
+        WatchCommand().execute(str(tmp_path))
+    out = capsys.readouterr().out
+    assert "Watching" in out
+    assert "Stopped watching" in out
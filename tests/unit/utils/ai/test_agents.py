@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+from ai_dev_toolkit.utils.ai import agents
+from ai_dev_toolkit.utils.ai.agents import (
+    close_agents,
+    get_agent,
+    get_http_client,
+    model_for,
+    run_sync,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    agents._agents.clear()
+    agents._http_client = None
+    yield
+    run_sync(close_agents())
+
+
+def test_model_for_prefers_command_then_global_setting(monkeypatch):
+    monkeypatch.delenv("AITK_MODEL", raising=False)
+    monkeypatch.delenv("AITK_CLI_COMMAND_MODEL", raising=False)
+    assert model_for("cli-command") == agents.DEFAULT_MODEL
+
+    monkeypatch.setenv("AITK_MODEL", "openai:gpt-4o")
+    assert model_for("cli-command") == "openai:gpt-4o"
+
+    monkeypatch.setenv("AITK_CLI_COMMAND_MODEL", "groq:llama3-70b-8192")
+    assert model_for("cli-command") == "groq:llama3-70b-8192"
+
+
+def test_get_agent_creates_each_agent_once():
+    first = get_agent("test", "prompt")
+    assert get_agent("test", "prompt") is first
+    assert get_agent("test", "other prompt") is not first
+    assert get_agent("test", "prompt", result_type=int) is not first
+
+
+def test_agents_share_one_http_client(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "key")
+    monkeypatch.setenv("OPENAI_API_KEY", "key")
+
+    groq = get_agent("groq:llama3-8b-8192", "prompt")
+    openai = get_agent("openai:gpt-4o", "prompt")
+
+    client = get_http_client()
+    assert groq.model.client._client is client
+    assert openai.model.client._client is client
+
+
+def test_close_agents_drops_agents_and_client():
+    agent = get_agent("test", "prompt")
+    client = get_http_client()
+
+    run_sync(close_agents())
+
+    assert client.is_closed
+    assert get_agent("test", "prompt") is not agent
+    assert get_http_client() is not client
+
+
+def test_run_sync_reuses_the_thread_event_loop():
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    assert run_sync(current_loop()) is run_sync(current_loop())
+    assert run_sync(get_agent("test", "prompt").run("hi")).data
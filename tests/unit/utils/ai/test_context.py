@@ -0,0 +1,100 @@
+import os
+import subprocess
+from ai_dev_toolkit.utils.ai.context import (
+    ContextIndex,
+    extract_symbols,
+    list_repo_files,
+)
+from ai_dev_toolkit.utils.ai.tokens import count_tokens
+
+
+def make_repo(tmp_path):
+    root = tmp_path / "repo"
+    subprocess.run(["git", "init", "-q", str(root)], check=True)
+    (root / ".gitignore").write_text("build/\n")
+    (root / "src").mkdir()
+    (root / "src" / "payments.py").write_text(
+        "class PaymentGateway:\n    def charge(self):\n        pass\n"
+    )
+    (root / "src" / "users.py").write_text("def create_user():\n    pass\n")
+    (root / "build").mkdir()
+    (root / "build" / "out.py").write_text("def generated():\n    pass\n")
+    return root
+
+
+def test_extract_symbols_finds_definitions_per_language():
+    assert extract_symbols("a.py", b"class A:\n    async def run(self): ...\n") == [
+        "A",
+        "run",
+    ]
+    assert extract_symbols("a.ts", b"export async function load() {}\n") == ["load"]
+    assert extract_symbols("a.go", b"func (s *S) Serve() {}\ntype S struct{}\n") == [
+        "Serve",
+        "S",
+    ]
+    assert extract_symbols("a.bin", b"def x():") == []
+
+
+def test_list_repo_files_respects_gitignore(tmp_path):
+    files = list_repo_files(str(make_repo(tmp_path)))
+    assert sorted(files) == [".gitignore", "src/payments.py", "src/users.py"]
+
+
+def test_update_rescans_only_changed_files(tmp_path):
+    root = make_repo(tmp_path)
+    cache = str(tmp_path / "index.json")
+    index = ContextIndex(str(root), cache_path=cache)
+
+    assert index.update() == 3
+    assert index.files["src/payments.py"]["symbols"] == ["PaymentGateway", "charge"]
+    assert index.update() == 0
+
+    users = root / "src" / "users.py"
+    users.write_text("def create_user():\n    pass\n\ndef delete_user():\n    pass\n")
+    os.utime(users, (1, 1))
+    (root / "src" / "payments.py").unlink()
+
+    reloaded = ContextIndex(str(root), cache_path=cache)
+    assert reloaded.update() == 1
+    assert "src/payments.py" not in reloaded.files
+    assert reloaded.files["src/users.py"]["symbols"] == ["create_user", "delete_user"]
+
+
+def test_update_with_paths_drops_deleted_files(tmp_path):
+    root = make_repo(tmp_path)
+    cache = str(tmp_path / "index.json")
+    index = ContextIndex(str(root), cache_path=cache)
+    index.update()
+
+    (root / "src" / "payments.py").unlink()
+    assert index.update(["src/payments.py", "src/users.py"]) == 0
+    assert "src/payments.py" not in index.files
+    assert "src/users.py" in index.files
+    assert "src/payments.py" not in ContextIndex(str(root), cache_path=cache).files
+
+
+def test_rank_puts_focus_then_query_matches_first(tmp_path):
+    root = make_repo(tmp_path)
+    index = ContextIndex(str(root), cache_path=str(tmp_path / "index.json"))
+    index.update()
+
+    assert index.rank("payment gateway")[0] == "src/payments.py"
+    assert index.rank("payment", focus=["src/users.py"])[:2] == [
+        "src/users.py",
+        "src/payments.py",
+    ]
+
+
+def test_bundle_is_bounded_and_includes_top_file_contents(tmp_path):
+    root = make_repo(tmp_path)
+    for i in range(200):
+        (root / "src" / f"module{i}.py").write_text(f"def function_{i}():\n")
+    index = ContextIndex(str(root), cache_path=str(tmp_path / "index.json"))
+    index.update()
+
+    bundle = index.bundle("payment", max_tokens=300)
+
+    assert count_tokens(bundle) <= 300
+    assert bundle.splitlines()[1] == "src/payments.py (3 lines): PaymentGateway, charge"
+    assert "more files" in bundle
+    assert "--- src/payments.py\nclass PaymentGateway:" in bundle
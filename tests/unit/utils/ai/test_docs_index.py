@@ -0,0 +1,151 @@
+import os
+from ai_dev_toolkit.utils.ai import docs_index
+from ai_dev_toolkit.utils.ai.docs_index import (
+    DocsIndex,
+    chunk_markdown,
+    chunk_rst,
+    retrieve_docs,
+)
+
+GUIDE = """Intro text.
+
+# Guide
+
+## Install {#install}
+
+Run pip install.
+
+```python
+# not a heading
+```
+
+## Usage
+
+### Caching
+
+Results are cached on disk.
+"""
+
+RST = """=====
+Guide
+=====
+
+Setup
+-----
+
+Run the installer.
+
+Options
+~~~~~~~
+
+Pass --fast.
+
+Usage
+-----
+
+Call run().
+"""
+
+
+def make_docs(tmp_path):
+    docs = tmp_path / "docs"
+    (docs / "sub").mkdir(parents=True)
+    (docs / "guide.md").write_text(GUIDE)
+    (docs / "sub" / "api.rst").write_text(RST)
+    (docs / "image.png").write_bytes(b"\x89PNG")
+    return docs
+
+
+def index_for(tmp_path):
+    return DocsIndex(str(tmp_path), db_path=str(tmp_path / "docs.sqlite"))
+
+
+def test_chunk_markdown_splits_by_heading_outside_code_blocks():
+    chunks = chunk_markdown(GUIDE)
+    assert [(chunk.heading, chunk.line) for chunk in chunks] == [
+        ("", 1),
+        ("Guide", 3),
+        ("Guide > Install", 5),
+        ("Guide > Usage", 13),
+        ("Guide > Usage > Caching", 15),
+    ]
+    assert "# not a heading" in chunks[2].text
+    assert chunks[4].text == "Results are cached on disk."
+
+
+def test_chunk_rst_levels_follow_adornment_order():
+    chunks = chunk_rst(RST)
+    assert [chunk.heading for chunk in chunks] == [
+        "Guide",
+        "Guide > Setup",
+        "Guide > Setup > Options",
+        "Guide > Usage",
+    ]
+    assert chunks[2].text == "Pass --fast."
+
+
+def test_long_sections_are_split_at_paragraphs(monkeypatch):
+    monkeypatch.setattr(docs_index, "MAX_CHUNK_TOKENS", 20)
+    paragraphs = [f"paragraph {i} " + "word " * 10 for i in range(4)]
+    text = "# Big\n\n" + "\n\n".join(paragraphs)
+    chunks = chunk_markdown(text)
+    assert len(chunks) == 4
+    assert all(chunk.heading == "Big" for chunk in chunks)
+    assert chunks[1].text.startswith("paragraph 1")
+    assert [chunk.line for chunk in chunks] == [1, 5, 7, 9]
+
+
+def test_search_ranks_chunks_and_updates_by_hash(tmp_path):
+    docs = make_docs(tmp_path)
+    index = index_for(tmp_path)
+    assert index.update(["docs"]) == (2, 0)
+    assert index.update(["docs"]) == (0, 0)
+
+    (hit,) = index.search("cached", limit=1)
+    assert (hit.path, hit.heading, hit.line) == (
+        "docs/guide.md",
+        "Guide > Usage > Caching",
+        15,
+    )
+    assert index.search("options")[0].path == "docs/sub/api.rst"
+
+    # Same content with a new mtime is not re-chunked
+    os.utime(docs / "guide.md", (1, 1))
+    assert index.update(["docs"]) == (0, 0)
+
+    (docs / "guide.md").write_text("# Other\n\nNothing here.\n")
+    os.remove(docs / "sub" / "api.rst")
+    assert index.update(["docs"]) == (1, 1)
+    assert index.search("cached") == []
+    assert index.search("options") == []
+    assert index.search("nothing")[0].heading == "Other"
+
+
+def test_update_of_the_root_directory_removes_deleted_docs(tmp_path, monkeypatch):
+    docs = make_docs(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    index = DocsIndex(".", db_path=str(tmp_path / "docs.sqlite"))
+    assert index.update(["."]) == (2, 0)
+
+    os.remove(docs / "sub" / "api.rst")
+    assert index.update(["."]) == (0, 1)
+    assert index.search("options") == []
+
+
+def test_context_respects_token_budget(tmp_path):
+    make_docs(tmp_path)
+    index = index_for(tmp_path)
+    index.update(["docs"])
+    context = index.context("install", max_tokens=500)
+    assert context.startswith("--- docs/guide.md:5 (Guide > Install)\n")
+    assert "Run pip install." in context
+    assert len(index.context("install", max_tokens=5)) < len(context)
+    assert index.context("!!!") == ""
+
+
+def test_retrieve_docs_uses_the_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path / "cache"))
+    make_docs(tmp_path)
+    context = retrieve_docs("fast", directories=["docs"], root=str(tmp_path))
+    assert "Pass --fast." in context
+    assert os.listdir(tmp_path / "cache" / "docs")
@@ -0,0 +1,131 @@
+import asyncio
+import pytest
+from ai_dev_toolkit.utils.ai.routing import (
+    DEFAULT_HEDGE_DELAY,
+    MIN_SAMPLES,
+    LatencyStats,
+    agent_call,
+    route,
+)
+
+
+def fake_models(behaviour):
+    """Returns a call where each model sleeps, then answers or raises"""
+    calls = []
+
+    async def call(model, prompt):
+        calls.append(model)
+        delay, answer = behaviour[model]
+        await asyncio.sleep(delay)
+        if isinstance(answer, Exception):
+            raise answer
+        return f"{answer}: {prompt}"
+
+    return call, calls
+
+
+@pytest.fixture
+def stats(tmp_path):
+    return LatencyStats(str(tmp_path / "latency.json"))
+
+
+def test_route_returns_first_model_when_it_succeeds(stats):
+    call, calls = fake_models({"a": (0, "A"), "b": (0, "B")})
+    model, result = asyncio.run(route("hi", ["a", "b"], call, stats=stats))
+    assert (model, result) == ("a", "A: hi")
+    assert calls == ["a"]
+
+
+def test_route_falls_back_on_error_timeout_and_invalid_result(stats):
+    call, calls = fake_models(
+        {"a": (0, RuntimeError("down")), "b": (1, "B"), "c": (0, ""), "d": (0, "D")}
+    )
+    model, result = asyncio.run(
+        route(
+            "hi",
+            ["a", "b", "c", "d"],
+            call,
+            timeout=0.05,
+            validate=lambda result: not result.startswith(":"),
+            stats=stats,
+        )
+    )
+    assert model == "d"
+    assert calls == ["a", "b", "c", "d"]
+
+
+def test_route_raises_when_every_model_fails(stats):
+    call, _ = fake_models({"a": (0, RuntimeError("down")), "b": (1, "B")})
+    with pytest.raises(RuntimeError, match="a: down; b: timed out"):
+        asyncio.run(route("hi", ["a", "b"], call, timeout=0.05, stats=stats))
+
+
+def test_route_hedges_slow_primary_and_takes_first_result(stats):
+    for _ in range(MIN_SAMPLES):
+        stats.record("slow", 0.05)
+    call, calls = fake_models({"slow": (1, "S"), "fast": (0, "F")})
+
+    model, result = asyncio.run(
+        route("hi", ["slow", "fast"], call, hedge=True, stats=stats)
+    )
+
+    assert model == "fast"
+    assert calls == ["slow", "fast"]
+
+
+def test_route_waits_for_cancelled_hedges_to_finish(stats):
+    for _ in range(MIN_SAMPLES):
+        stats.record("slow", 0.05)
+    finished = []
+
+    async def call(model, prompt):
+        try:
+            await asyncio.sleep(1 if model == "slow" else 0)
+            return model
+        finally:
+            finished.append(model)
+
+    async def main():
+        model, _ = await route("hi", ["slow", "fast"], call, hedge=True, stats=stats)
+        return model, list(finished)
+
+    assert asyncio.run(main()) == ("fast", ["fast", "slow"])
+
+
+def test_route_does_not_hedge_fast_primary(stats):
+    call, calls = fake_models({"a": (0.01, "A"), "b": (0, "B")})
+    model, _ = asyncio.run(route("hi", ["a", "b"], call, hedge=True, stats=stats))
+    assert model == "a"
+    assert calls == ["a"]
+
+
+def test_latency_stats_persist_and_estimate_quantiles(tmp_path):
+    path = str(tmp_path / "latency.json")
+    stats = LatencyStats(path)
+    assert stats.hedge_delay("a") == DEFAULT_HEDGE_DELAY
+
+    for _ in range(19):
+        stats.record("a", 0.2)
+    stats.record("a", 4)
+    stats.save()
+
+    loaded = LatencyStats(path)
+    assert loaded.count("a") == 20
+    assert loaded.quantile("a", 0.5) == 0.25
+    assert loaded.quantile("a", 1.0) == 5
+    assert loaded.hedge_delay("a") == 0.25
+
+
+def test_route_records_latency_to_the_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path))
+    call, _ = fake_models({"a": (0, "A")})
+    asyncio.run(route("hi", ["a"], call))
+    assert LatencyStats().count("a") == 1
+
+
+def test_agent_call_runs_agent_for_each_model(tmp_path, monkeypatch):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path))
+    call = agent_call("Answer briefly.")
+    model, result = asyncio.run(route("hi", ["test"], call))
+    assert model == "test"
+    assert isinstance(result, str)
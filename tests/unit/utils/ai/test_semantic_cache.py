@@ -0,0 +1,55 @@
+import numpy as np
+from ai_dev_toolkit.utils.ai.semantic_cache import SemanticCache, embed, normalize
+
+
+def test_normalize_drops_filler_and_maps_synonyms():
+    assert normalize("Show me the BIGGEST files!") == "list large files"
+
+
+def test_embed_returns_unit_vectors_that_rank_related_requests_higher():
+    request = embed("find large files in this directory")
+    related = embed("find the largest files in the current directory")
+    unrelated = embed("show recent git commits")
+
+    assert np.isclose(np.linalg.norm(request), 1.0)
+    assert request @ related > 0.8
+    assert request @ unrelated < 0.3
+
+
+def test_lookup_matches_similar_requests(tmp_path):
+    cache = SemanticCache("cli", directory=str(tmp_path))
+    cache.store("list big files", "du -ah | sort -rh | head")
+
+    assert cache.lookup("show largest files") == "du -ah | sort -rh | head"
+    assert cache.lookup("delete temporary files") is None
+
+
+def test_lookup_requires_identical_literals(tmp_path):
+    cache = SemanticCache("cli", threshold=0.5, directory=str(tmp_path))
+    cache.store("kill the process on port 8080", "fuser -k 8080/tcp")
+
+    assert cache.lookup("kill process on port 8080") == "fuser -k 8080/tcp"
+    assert cache.lookup("kill process on port 3000") is None
+
+
+def test_threshold_is_configurable(tmp_path):
+    cache = SemanticCache("cli", threshold=0.99, directory=str(tmp_path))
+    cache.store("find large files in this directory", "find . -size +100M")
+    assert cache.lookup("find the largest files in the current directory") is None
+
+    cache.threshold = 0.8
+    assert cache.lookup("find the largest files in the current directory")
+
+
+def test_cache_persists_and_evicts_least_recently_used(tmp_path):
+    cache = SemanticCache("cli", max_entries=2, directory=str(tmp_path))
+    cache.store("list files", "ls")
+    cache.store("show disk usage", "df -h")
+    cache.lookup("list files")
+    cache.store("show git status", "git status")
+
+    reloaded = SemanticCache("cli", max_entries=2, directory=str(tmp_path))
+    assert reloaded.lookup("list files") == "ls"
+    assert reloaded.lookup("show git status") == "git status"
+    assert reloaded.lookup("show disk usage") is None
+    assert len(reloaded.vectors) == 2
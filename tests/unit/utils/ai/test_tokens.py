@@ -0,0 +1,113 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+import pytest
+from ai_dev_toolkit.utils.ai.tokens import (
+    check_context,
+    context_limit,
+    count_tokens,
+    fit_to_budget,
+    prompt_budget,
+    record_usage,
+    run_tracked,
+    run_tracked_sync,
+    truncate_to_tokens,
+    usage_report,
+)
+
+
+def test_count_tokens_approximates_bpe_pieces():
+    assert count_tokens("") == 0
+    assert count_tokens("hello world") == 2
+    assert count_tokens("internationalization") == 4
+    assert count_tokens("123456") == 2
+    assert count_tokens("        return x") == 3
+
+
+def test_count_tokens_charges_more_for_non_ascii_text():
+    assert count_tokens("日本語のテキスト") > count_tokens("japanese")
+
+
+def test_context_limit_uses_longest_matching_prefix():
+    assert context_limit("groq:llama3-8b-8192") == 8192
+    assert context_limit("openai:gpt-4o-mini") == 128000
+    assert context_limit("openai:gpt-4") == 8192
+    assert context_limit("unknown:model") == 8192
+
+
+def test_prompt_budget_reserves_system_prompt_and_output():
+    system_prompt = " word" * 100
+    assert prompt_budget("groq:llama3-8b-8192", system_prompt, 1000) == 8192 - 1100
+
+
+def test_truncate_to_tokens_cuts_at_line_boundary():
+    text = "\n".join(f"line {i}" for i in range(100))
+    truncated = truncate_to_tokens(text, 30)
+
+    assert count_tokens(truncated) <= 30
+    assert truncated.startswith("line 0\nline 1\n")
+    assert truncated.endswith("... [truncated]")
+    assert truncate_to_tokens("short", 30) == "short"
+
+
+def test_fit_to_budget_truncates_lowest_priority_first():
+    system = "keep me"
+    context = "\n".join(f"context line {i}" for i in range(200))
+    diff = "\n".join(f"+diff line {i}" for i in range(50))
+
+    texts = fit_to_budget([(system, 3), (diff, 2), (context, 1)], 300)
+
+    assert texts[0] == system
+    assert texts[1] == diff
+    assert texts[2].endswith("... [truncated]")
+    assert sum(count_tokens(text) for text in texts) <= 300
+
+
+def test_check_context_rejects_oversize_prompts():
+    assert check_context("groq:llama3-8b-8192", "small prompt") == 2
+    with pytest.raises(ValueError, match="exceeds"):
+        check_context("groq:llama3-8b-8192", "word " * 9000)
+
+
+def test_run_tracked_sync_records_reported_usage(tmp_path, monkeypatch):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path))
+    agent = MagicMock()
+    agent.run_sync.return_value.usage.return_value = MagicMock(
+        request_tokens=120, response_tokens=30
+    )
+
+    run_tracked_sync(agent, "prompt", "groq:llama3-8b-8192", "commit")
+
+    report = usage_report()["groq:llama3-8b-8192"]
+    assert report["calls"] == 1
+    assert report["prompt_tokens"] == 120
+    assert report["completion_tokens"] == 30
+
+
+def test_run_tracked_estimates_usage_and_records_failures(tmp_path, monkeypatch):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path))
+    agent = MagicMock()
+    agent.run = AsyncMock(return_value=MagicMock(data="hello world"))
+
+    asyncio.run(run_tracked(agent, "hello world", "model-a"))
+    agent.run.side_effect = RuntimeError("down")
+    with pytest.raises(RuntimeError):
+        asyncio.run(run_tracked(agent, "hello world", "model-a"))
+
+    report = usage_report()["model-a"]
+    assert report["calls"] == 2
+    assert report["errors"] == 1
+    assert report["prompt_tokens"] == 4
+    assert report["completion_tokens"] == 2
+
+
+def test_usage_report_aggregates_latency_per_model(tmp_path, monkeypatch):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path))
+    for latency in (0.1, 0.2, 0.3):
+        record_usage("model-a", "commit", 10, 5, latency)
+    record_usage("model-b", "review", 1, 1, 2.0)
+
+    report = usage_report()
+    assert report["model-a"]["calls"] == 3
+    assert report["model-a"]["mean_latency"] == pytest.approx(0.2)
+    assert report["model-a"]["max_latency"] == 0.3
+    assert report["model-b"]["p95_latency"] == 2.0
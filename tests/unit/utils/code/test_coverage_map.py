@@ -0,0 +1,187 @@
+import json
+import sqlite3
+import pytest
+from ai_dev_toolkit.utils.code.coverage_map import (
+    CoverageMap,
+    changed_lines,
+    numbits_to_nums,
+    nums_to_numbits,
+)
+from ai_dev_toolkit.utils.git.patch import parse_diff
+from ai_dev_toolkit.utils.git.review import impact_analysis
+
+DIFF = (
+    "diff --git a/app/cart.py b/app/cart.py\n"
+    "--- a/app/cart.py\n"
+    "+++ b/app/cart.py\n"
+    "@@ -10,3 +10,3 @@\n"
+    " def total(items):\n"
+    "-    return sum(items)\n"
+    "+    return sum(items) * 1.2\n"
+    " \n"
+    "diff --git a/app/new.py b/app/new.py\n"
+    "--- /dev/null\n"
+    "+++ b/app/new.py\n"
+    "@@ -0,0 +1 @@\n"
+    "+x = 1\n"
+)
+
+
+def write_coverage_db(path, root, data, arcs=False):
+    """Writes {file: {context: lines}} in coverage.py's data file layout"""
+    db = sqlite3.connect(path)
+    db.executescript(
+        "CREATE TABLE file (id INTEGER PRIMARY KEY, path TEXT);"
+        "CREATE TABLE context (id INTEGER PRIMARY KEY, context TEXT);"
+        "CREATE TABLE line_bits (file_id INTEGER, context_id INTEGER, numbits BLOB);"
+        "CREATE TABLE arc (file_id INTEGER, context_id INTEGER,"
+        " fromno INTEGER, tono INTEGER);"
+    )
+    contexts = {}
+    for file_id, (file, by_context) in enumerate(data.items(), 1):
+        db.execute("INSERT INTO file VALUES (?, ?)", (file_id, f"{root}/{file}"))
+        for context, lines in by_context.items():
+            if context not in contexts:
+                contexts[context] = len(contexts) + 1
+                db.execute(
+                    "INSERT INTO context VALUES (?, ?)", (contexts[context], context)
+                )
+            if arcs:
+                for start, end in zip([-1] + lines, lines + [-1]):
+                    db.execute(
+                        "INSERT INTO arc VALUES (?, ?, ?, ?)",
+                        (file_id, contexts[context], start, end),
+                    )
+            else:
+                db.execute(
+                    "INSERT INTO line_bits VALUES (?, ?, ?)",
+                    (file_id, contexts[context], nums_to_numbits(lines)),
+                )
+    db.commit()
+    db.close()
+
+
+@pytest.fixture
+def coverage_map(tmp_path):
+    return CoverageMap(str(tmp_path), db_path=str(tmp_path / "map.sqlite"))
+
+
+def test_numbits_round_trip():
+    assert numbits_to_nums(nums_to_numbits([1, 8, 9, 300])) == [1, 8, 9, 300]
+    assert nums_to_numbits([]) == b""
+
+
+def test_changed_lines_reports_modified_lines_and_insertion_points():
+    cart, new = parse_diff(DIFF)
+    assert changed_lines(cart) == ({11}, set())
+    assert changed_lines(new) == (set(), {1})
+
+
+def test_load_sqlite_and_select_tests_for_a_diff(tmp_path, coverage_map):
+    data_file = str(tmp_path / ".coverage")
+    write_coverage_db(
+        data_file,
+        tmp_path,
+        {
+            "app/cart.py": {
+                "tests/test_cart.py::test_total|run": [10, 11],
+                "tests/test_cart.py::test_empty|run": [10, 20],
+                "tests/test_other.py::test_import|run": [1, 2],
+                "": [1, 2, 10],
+            }
+        },
+    )
+
+    assert coverage_map.load(data_file) == 3
+
+    tests, unmapped = coverage_map.tests_for_patches(parse_diff(DIFF))
+    assert tests == ["tests/test_cart.py::test_total"]
+    assert unmapped == ["app/new.py"]
+
+
+def test_changing_an_import_time_line_selects_every_test_of_the_file(
+    tmp_path, coverage_map
+):
+    data_file = str(tmp_path / ".coverage")
+    write_coverage_db(
+        data_file,
+        tmp_path,
+        {
+            "app/cart.py": {
+                "tests/test_cart.py::test_total|run": [11],
+                "tests/test_cart.py::test_empty|run": [20],
+                "": [1, 10, 19],
+            },
+            "app/other.py": {"tests/test_other.py::test_other|run": [5]},
+        },
+    )
+    coverage_map.load(data_file)
+    diff = DIFF.replace(
+        " def total(items):\n-    return sum(items)\n+    return sum(items) * 1.2\n",
+        "-def total(items):\n+def total(items, tax):\n     return sum(items)\n",
+    )
+
+    tests, unmapped = coverage_map.tests_for_patches(parse_diff(diff))
+    assert tests == [
+        "tests/test_cart.py::test_empty",
+        "tests/test_cart.py::test_total",
+    ]
+    assert unmapped == ["app/new.py"]
+    assert coverage_map.static_lines("app/cart.py") == {1, 10, 19}
+
+
+def test_insertions_select_tests_of_the_surrounding_lines(tmp_path, coverage_map):
+    data_file = str(tmp_path / ".coverage")
+    write_coverage_db(
+        data_file,
+        tmp_path,
+        {
+            "app/cart.py": {
+                "t::before|run": [3],
+                "t::after|run": [9],
+                "t::far|run": [20],
+            }
+        },
+        arcs=True,
+    )
+    coverage_map.load(data_file)
+    assert coverage_map.tests_for("app/cart.py", [], inserted=[5]) == {
+        "t::before",
+        "t::after",
+    }
+
+
+def test_load_json_report_replaces_only_the_tests_it_contains(tmp_path, coverage_map):
+    def report(contexts):
+        path = tmp_path / "coverage.json"
+        path.write_text(
+            json.dumps({"files": {"app/cart.py": {"contexts": contexts}}})
+        )
+        return str(path)
+
+    coverage_map.load(report({"11": ["t::a|run", "t::b|run"], "30": ["t::b|run"]}))
+    coverage_map.load(report({"30": ["t::a|run"]}))
+
+    assert coverage_map.tests() == ["t::a", "t::b"]
+    assert coverage_map.coverage("app/cart.py") == {"t::a": {30}, "t::b": {11, 30}}
+
+
+def test_load_rejects_data_without_test_contexts(tmp_path, coverage_map):
+    path = tmp_path / "coverage.json"
+    path.write_text(json.dumps({"files": {"a.py": {"contexts": {"1": [""]}}}}))
+    with pytest.raises(ValueError, match="--cov-context=test"):
+        coverage_map.load(str(path))
+
+
+def test_impact_analysis_lists_tests_to_run(tmp_path, coverage_map):
+    path = tmp_path / "coverage.json"
+    path.write_text(
+        json.dumps({"files": {"app/cart.py": {"contexts": {"11": ["t::total|run"]}}}})
+    )
+    coverage_map.load(str(path))
+
+    impact = impact_analysis(DIFF, coverage_map=coverage_map)
+
+    assert impact["test_coverage"]["tests_to_run"] == ["t::total"]
+    assert impact["test_coverage"]["unmapped_files"] == ["app/new.py"]
+    assert "tests_to_run" not in impact_analysis(DIFF)["test_coverage"]
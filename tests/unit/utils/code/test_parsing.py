@@ -0,0 +1,124 @@
+import pytest
+from ai_dev_toolkit.utils.code.parsing import ParseService, patch_edits
+from ai_dev_toolkit.utils.git.patch import parse_diff
+
+pytest.importorskip("tree_sitter_python")
+
+SOURCE = b"""class Cart:
+    def add(self, item):
+        self.items.append(item)
+
+
+def total(cart):
+    return sum(cart.items)
+"""
+
+DIFF = """diff --git a/cart.py b/cart.py
+--- a/cart.py
++++ b/cart.py
+@@ -5,3 +5,7 @@
+ 
+ def total(cart):
+-    return sum(cart.items)
++    return sum(item.price for item in cart.items)
++
++
++def empty(cart):
++    return not cart.items
+"""
+
+
+def write(tmp_path, source=SOURCE):
+    path = tmp_path / "cart.py"
+    path.write_bytes(source)
+    return str(path)
+
+
+def test_definitions_lists_classes_methods_and_functions(tmp_path):
+    service = ParseService()
+    definitions = service.definitions(write(tmp_path))
+    assert [(d.name, d.kind, d.start_line, d.end_line) for d in definitions] == [
+        ("Cart", "class", 1, 3),
+        ("add", "function", 2, 3),
+        ("total", "function", 6, 7),
+    ]
+
+
+def test_parse_caches_trees_by_content_hash(tmp_path):
+    service = ParseService()
+    path = write(tmp_path)
+    tree = service.parse(path)
+
+    assert service.parse(path) is tree
+    assert service.parse("copy.py", SOURCE) is tree
+    assert service.parses == 1
+
+
+def test_parse_reuses_previous_tree_for_changed_file(tmp_path):
+    service = ParseService()
+    path = write(tmp_path)
+    service.parse(path)
+
+    changed = SOURCE.replace(b"def total", b"def grand_total")
+    tree = service.parse(path, changed)
+
+    assert service.parses == 2
+    assert not tree.root_node.has_error
+    assert [d.name for d in service.definitions(path, changed)][-1] == "grand_total"
+
+
+def test_patch_edits_applies_hunks_at_their_positions():
+    patch = parse_diff(DIFF)[0]
+    source, edits = patch_edits(SOURCE, patch)
+
+    assert source.endswith(b"def empty(cart):\n    return not cart.items\n")
+    assert [(start, old_count) for start, old_count, _ in edits] == [(4, 3)]
+    with pytest.raises(ValueError):
+        patch_edits(b"something else\n", patch)
+
+
+def test_apply_patch_reparses_incrementally_and_matches_full_parse(tmp_path):
+    service = ParseService()
+    path = write(tmp_path)
+    service.parse(path)
+
+    tree = service.apply_patch(path, parse_diff(DIFF)[0])
+    patched, _ = patch_edits(SOURCE, parse_diff(DIFF)[0])
+    fresh = ParseService().parse("fresh.py", patched)
+
+    assert str(tree.root_node) == str(fresh.root_node)
+
+
+def test_changed_definitions_returns_touched_symbols(tmp_path):
+    service = ParseService()
+    path = write(tmp_path)
+    service.parse(path)
+
+    changed = service.changed_definitions(path, parse_diff(DIFF)[0])
+    assert [d.name for d in changed] == ["total", "empty"]
+
+
+def test_changed_definitions_includes_lines_removed_from_a_body(tmp_path):
+    source = SOURCE.replace(
+        b"        self.items", b"        self.check(item)\n        self.items"
+    )
+    diff = """--- a/cart.py
++++ b/cart.py
+@@ -2,4 +2,3 @@
+     def add(self, item):
+         self.check(item)
+-        self.items.append(item)
+ 
+"""
+    service = ParseService()
+    path = write(tmp_path, source)
+    service.parse(path)
+
+    changed = service.changed_definitions(path, parse_diff(diff)[0])
+    assert [d.name for d in changed] == ["Cart", "add"]
+
+
+def test_query_returns_captures_by_name(tmp_path):
+    service = ParseService()
+    captures = service.query(write(tmp_path), "(call function: (attribute) @call)")
+    assert [node.text for node in captures["call"]] == [b"self.items.append"]
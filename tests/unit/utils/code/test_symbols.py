@@ -0,0 +1,160 @@
+import os
+import subprocess
+import pytest
+import ai_dev_toolkit.utils.code.symbols as symbols
+from ai_dev_toolkit.utils.code.symbols import SymbolIndex, extract_python_symbols
+from ai_dev_toolkit.utils.git.review import impact_analysis
+
+
+def git(root, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+        cwd=root,
+        check=True,
+        capture_output=True,
+    )
+
+
+def make_repo(tmp_path):
+    root = tmp_path / "repo"
+    root.mkdir()
+    git(root, "init", "-q")
+    (root / "billing.py").write_text(
+        "class Invoice:\n"
+        "    def total(self):\n"
+        "        return 1\n"
+        "\n"
+        "def charge(invoice):\n"
+        "    return invoice.total()\n"
+    )
+    (root / "app.py").write_text(
+        "from billing import Invoice, charge\n\ncharge(Invoice())\n"
+    )
+    git(root, "add", ".")
+    git(root, "commit", "-q", "-m", "init")
+    return root
+
+
+def index_for(tmp_path, root):
+    return SymbolIndex(str(root), db_path=str(tmp_path / "symbols.sqlite"))
+
+
+def test_extract_python_symbols_finds_definitions_and_references():
+    definitions, references = extract_python_symbols(
+        b"class A:\n    async def run(self):\n        helper(self.x)\n"
+    )
+    assert definitions == [
+        ("A", "A", "class", 1, 3),
+        ("run", "A.run", "method", 2, 3),
+    ]
+    assert ("helper", 3) in references
+    assert ("x", 3) in references
+    assert extract_python_symbols(b"def broken(:\n") == ([], [])
+
+
+def test_symbol_index_search_definitions_and_callers(tmp_path):
+    root = make_repo(tmp_path)
+    index = index_for(tmp_path, root)
+    assert index.update() == 2
+
+    assert [s.qualname for s in index.search("*oice*")] == ["Invoice"]
+    assert [(s.path, s.line) for s in index.definitions("Invoice.total")] == [
+        ("billing.py", 2)
+    ]
+    assert index.callers("charge") == {"app.py": [1, 3]}
+    assert index.callers("total") == {"billing.py": [6]}
+    assert index.callers("charge", exclude=["app.py"]) == {}
+
+
+def test_symbol_index_updates_only_changed_files(tmp_path):
+    root = make_repo(tmp_path)
+    index = index_for(tmp_path, root)
+    index.update()
+    assert index.update() == 0
+
+    (root / "app.py").write_text("def main():\n    pass\n")
+    assert index.update() == 1
+    assert index.callers("charge") == {}
+    git(root, "commit", "-q", "-am", "main")
+    assert index.update() == 0
+    assert [s.path for s in index.definitions("main")] == ["app.py"]
+
+    (root / "extra.py").write_text("def extra():\n    pass\n")
+    os.remove(root / "billing.py")
+    assert index.update() == 1
+    assert index.definitions("charge") == []
+    assert [s.path for s in index.search("extra")] == ["extra.py"]
+
+
+def test_symbol_index_persists_between_instances(tmp_path):
+    root = make_repo(tmp_path)
+    index_for(tmp_path, root).update()
+    index = index_for(tmp_path, root)
+    assert index.update() == 0
+    assert [s.name for s in index.search("charge")] == ["charge"]
+
+
+def test_symbol_index_parses_large_trees_in_parallel(tmp_path, monkeypatch):
+    monkeypatch.setattr(symbols, "PARALLEL_THRESHOLD", 2)
+    root = make_repo(tmp_path)
+    index = index_for(tmp_path, root)
+    assert index.update(max_workers=2) == 2
+    assert index.callers("Invoice") == {"app.py": [1, 3]}
+
+
+def test_impact_analysis_lists_callers_of_changed_definitions(tmp_path):
+    pytest.importorskip("tree_sitter_python")
+    root = make_repo(tmp_path)
+    index = index_for(tmp_path, root)
+    index.update()
+    diff = (
+        "diff --git a/billing.py b/billing.py\n"
+        "--- a/billing.py\n"
+        "+++ b/billing.py\n"
+        "@@ -5,2 +5,2 @@ class Invoice:\n"
+        " def charge(invoice):\n"
+        "-    return invoice.total()\n"
+        "+    return invoice.total() * 2\n"
+    )
+
+    impact = impact_analysis(diff, symbol_index=index)
+
+    assert impact["callers"] == {"billing.py": {"charge": ["app.py:1", "app.py:3"]}}
+    assert "callers" not in impact_analysis(diff)
+
+
+def test_impact_analysis_keeps_same_named_symbols_of_different_files_apart(
+    tmp_path,
+):
+    pytest.importorskip("tree_sitter_python")
+    root = make_repo(tmp_path)
+    (root / "shipping.py").write_text("def total(parcel):\n    return 2\n")
+    (root / "app.py").write_text(
+        "from shipping import total\n\ntotal(None)\n"
+    )
+    index = index_for(tmp_path, root)
+    index.update()
+    diff = (
+        "diff --git a/billing.py b/billing.py\n"
+        "--- a/billing.py\n"
+        "+++ b/billing.py\n"
+        "@@ -2,2 +2,2 @@ class Invoice:\n"
+        "     def total(self):\n"
+        "-        return 0\n"
+        "+        return 1\n"
+        "diff --git a/shipping.py b/shipping.py\n"
+        "--- a/shipping.py\n"
+        "+++ b/shipping.py\n"
+        "@@ -1,2 +1,2 @@\n"
+        " def total(parcel):\n"
+        "-    return 1\n"
+        "+    return 2\n"
+    )
+
+    impact = impact_analysis(diff, symbol_index=index)
+
+    assert impact["callers"] == {
+        "billing.py": {"Invoice.total": ["app.py:1", "app.py:3"]},
+        # References are matched by name, so Invoice.total's call counts too
+        "shipping.py": {"total": ["app.py:1", "app.py:3", "billing.py:6"]},
+    }
@@ -0,0 +1,148 @@
+import subprocess
+from unittest.mock import patch
+from ai_dev_toolkit.utils.git.apply_diff import apply_diff, patch_text
+from ai_dev_toolkit.utils.git.patch import parse_diff
+
+
+ORIGINAL = "".join(f"line {i}\n" for i in range(1, 21))
+
+DIFF = """--- a/file.txt
++++ b/file.txt
+@@ -3,3 +3,3 @@
+ line 3
+-line 4
++line four
+ line 5
+"""
+
+
+def test_patch_text_applies_hunk_at_stated_position():
+    result = patch_text(ORIGINAL, parse_diff(DIFF)[0])
+    assert result == ORIGINAL.replace("line 4\n", "line four\n")
+
+
+def test_patch_text_finds_hunk_at_an_offset():
+    shifted = "header\nheader\n" + ORIGINAL
+    result = patch_text(shifted, parse_diff(DIFF)[0])
+    assert result == shifted.replace("line 4\n", "line four\n")
+
+
+def test_patch_text_ignores_whitespace_differences_in_context():
+    content = ORIGINAL.replace("line 3\n", "line 3   \n").replace("line 5", "  line 5")
+    result = patch_text(content, parse_diff(DIFF)[0])
+    assert "line four\n" in result
+    assert "line 3   \n" in result
+    assert "  line 5\n" in result
+
+
+def test_patch_text_uses_fuzz_for_wrong_outer_context():
+    diff = DIFF.replace(" line 3\n", " line three\n")
+    result = patch_text(ORIGINAL, parse_diff(diff)[0])
+    assert result == ORIGINAL.replace("line 4\n", "line four\n")
+
+
+def test_patch_text_does_not_fuzz_away_all_context_of_an_insertion():
+    diff = """--- a/file.txt
++++ b/file.txt
+@@ -3,2 +3,3 @@
+ no such line
++inserted
+ nor this one
+"""
+    try:
+        patch_text(ORIGINAL, parse_diff(diff)[0])
+        assert False, "expected ValueError"
+    except ValueError as e:
+        assert "file.txt" in str(e)
+
+
+def test_patch_text_raises_when_hunk_does_not_apply():
+    diff = DIFF.replace("-line 4", "-missing line")
+    try:
+        patch_text(ORIGINAL, parse_diff(diff)[0], fuzz=0)
+        assert False, "expected ValueError"
+    except ValueError as e:
+        assert "file.txt" in str(e)
+
+
+def test_patch_text_keeps_crlf_and_handles_missing_final_newline():
+    content = "a\r\nb"
+    diff = "--- a/f\n+++ b/f\n@@ -2 +2,2 @@\n-b\n\\ No newline at end of file\n+b\n+c\n\\ No newline at end of file\n"
+    assert patch_text(content, parse_diff(diff)[0]) == "a\r\nb\r\nc"
+
+
+def test_apply_diff_patches_creates_and_deletes_files(tmp_path):
+    (tmp_path / "file.txt").write_text(ORIGINAL)
+    (tmp_path / "old.txt").write_text("bye\n")
+    diff = DIFF + (
+        "--- /dev/null\n+++ b/new/created.txt\n@@ -0,0 +1,2 @@\n+hello\n+world\n"
+        "--- a/old.txt\n+++ /dev/null\n@@ -1 +0,0 @@\n-bye\n"
+    )
+
+    success, _ = apply_diff(diff, str(tmp_path), fallback=False)
+    assert success is True
+    assert "line four\n" in (tmp_path / "file.txt").read_text()
+    assert (tmp_path / "new" / "created.txt").read_text() == "hello\nworld\n"
+    assert not (tmp_path / "old.txt").exists()
+
+
+def test_apply_diff_applies_split_sections_of_one_file_on_top_of_each_other(
+    tmp_path,
+):
+    (tmp_path / "file.txt").write_text(ORIGINAL)
+    diff = DIFF + (
+        "--- a/file.txt\n+++ b/file.txt\n@@ -15,3 +15,3 @@\n"
+        " line 15\n-line 16\n+line sixteen\n line 17\n"
+        "--- /dev/null\n+++ b/new.txt\n@@ -0,0 +1 @@\n+first\n"
+        "--- a/new.txt\n+++ b/new.txt\n@@ -1 +1,2 @@\n first\n+second\n"
+    )
+
+    success, message = apply_diff(diff, str(tmp_path), fallback=False)
+    assert success is True, message
+    assert message == "Applied changes to 2 file(s)"
+    assert (tmp_path / "file.txt").read_text() == ORIGINAL.replace(
+        "line 4\n", "line four\n"
+    ).replace("line 16\n", "line sixteen\n")
+    assert (tmp_path / "new.txt").read_text() == "first\nsecond\n"
+
+
+def test_apply_diff_is_transactional_across_files(tmp_path):
+    (tmp_path / "file.txt").write_text(ORIGINAL)
+    (tmp_path / "other.txt").write_text("nothing matches\n")
+    diff = DIFF + "--- a/other.txt\n+++ b/other.txt\n@@ -1 +1 @@\n-absent\n+present\n"
+
+    success, message = apply_diff(diff, str(tmp_path), fallback=False)
+    assert success is False
+    assert "other.txt" in message
+    assert (tmp_path / "file.txt").read_text() == ORIGINAL
+
+
+@patch("subprocess.run")
+def test_apply_diff_falls_back_to_git_apply_when_hunks_do_not_apply(mock_run, tmp_path):
+    (tmp_path / "file.txt").write_text("unrelated\n")
+    mock_run.return_value.stdout = ""
+
+    success, _ = apply_diff(DIFF, str(tmp_path), fuzz=0)
+    assert success is True
+    mock_run.assert_called_once_with(
+        ["git", "apply", "--recount", "--whitespace=nowarn", "-"],
+        input=DIFF,
+        cwd=str(tmp_path),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+@patch("subprocess.run")
+def test_apply_diff_sends_binary_patches_to_git(mock_run, tmp_path):
+    diff = (
+        "diff --git a/logo.png b/logo.png\nindex 1..2 100644\n"
+        "Binary files a/logo.png and b/logo.png differ\n"
+    )
+    mock_run.side_effect = subprocess.CalledProcessError(1, "git", stderr="bad")
+    assert apply_diff(diff, str(tmp_path)) == (False, "bad")
+
+
+def test_apply_diff_rejects_text_without_file_patches():
+    assert apply_diff("not a diff") == (False, "No file patches found in diff")
@@ -1,14 +1,57 @@
+import os
 import subprocess
 from unittest.mock import patch
+import pytest
+from ai_dev_toolkit.utils.git import branch as branch_module
 from ai_dev_toolkit.utils.git.branch import (
     create_branch,
     switch_branch,
     merge_branch,
     list_branches,
     delete_branch,
+    delete_branches,
+    get_branches,
+    preview_merge,
+    preview_merges,
+    prune_branches,
 )
 
 
+def git(root, *args, date=None):
+    env = None
+    if date is not None:
+        env = {**os.environ, "GIT_COMMITTER_DATE": f"{date} +0000"}
+    subprocess.run(
+        ["git", "-c", "user.name=Ann", "-c", "user.email=a@t", *args],
+        cwd=root,
+        check=True,
+        capture_output=True,
+        env=env,
+    )
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """main with a merged, an unmerged and an old merged branch"""
+    upstream = tmp_path / "upstream"
+    upstream.mkdir()
+    git(upstream, "init", "-q", "-b", "main")
+    git(upstream, "commit", "-q", "--allow-empty", "-m", "init")
+    git(tmp_path, "clone", "-q", str(upstream), "work")
+    root = tmp_path / "work"
+
+    git(root, "branch", "merged")
+    git(root, "checkout", "-q", "-b", "old")
+    git(root, "commit", "-q", "--allow-empty", "-m", "old", date=1_000_000_000)
+    git(root, "checkout", "-q", "main")
+    git(root, "merge", "-q", "old")
+    git(root, "checkout", "-q", "-b", "unmerged")
+    git(root, "commit", "-q", "--allow-empty", "-m", "wip")
+    git(root, "checkout", "-q", "main")
+    monkeypatch.chdir(root)
+    return root
+
+
 @patch("subprocess.run")
 def test_create_branch_creates_new_branch_from_current_head(mock_run):
     mock_run.return_value.returncode = 0
@@ -130,3 +173,149 @@ def test_delete_branch_force_removes_unmerged_branch(mock_run):
 def test_delete_branch_returns_false_when_git_command_fails(mock_run):
     mock_run.side_effect = subprocess.CalledProcessError(1, "git")
     assert delete_branch("feature-branch") is False
+
+
+def test_get_branches_lists_metadata_of_every_branch(repo):
+    branches = {branch.name: branch for branch in get_branches()}
+    assert sorted(branches) == ["main", "merged", "old", "unmerged"]
+
+    main = branches["main"]
+    assert main.current is True
+    assert (main.upstream, main.ahead, main.behind) == ("origin/main", 1, 0)
+    assert main.author == "Ann"
+    assert len(main.commit) == 40
+    assert branches["old"].date == 1_000_000_000
+    assert branches["old"].merged is True
+    assert branches["unmerged"].merged is False
+    assert branches["unmerged"].upstream is None
+
+
+def test_get_branches_lists_remote_branches_without_symrefs(repo):
+    assert [branch.name for branch in get_branches(remote=True)] == ["origin/main"]
+
+
+def test_get_branches_reports_merged_status_against_another_base(repo):
+    merged = {branch.name for branch in get_branches(base="unmerged") if branch.merged}
+    assert merged == {"main", "merged", "old", "unmerged"}
+
+
+@patch("subprocess.run")
+def test_get_branches_returns_empty_list_when_git_command_fails(mock_run):
+    mock_run.side_effect = subprocess.CalledProcessError(1, "git")
+    assert get_branches() == []
+
+
+def test_delete_branches_deletes_in_batches_and_reports_deleted(repo, monkeypatch):
+    monkeypatch.setattr(branch_module, "DELETE_BATCH", 1)
+    deleted, failed = delete_branches(
+        ["merged", "unmerged", "missing", "main", "old", "merged"]
+    )
+    assert deleted == ["merged", "old"]
+    assert failed == ["unmerged", "missing", "main"]
+    assert {branch.name for branch in get_branches()} == {"main", "unmerged"}
+
+    assert delete_branches(["unmerged"], force=True) == (["unmerged"], [])
+    assert delete_branches([]) == ([], [])
+
+
+def test_prune_branches_selects_merged_and_stale_branches(repo):
+    assert prune_branches(dry_run=True) == ["merged", "old"]
+    assert prune_branches(older_than_days=30, dry_run=True) == ["old"]
+    assert prune_branches(keep=["main", "merged"]) == ["old"]
+
+    git(repo, "commit", "-q", "--allow-empty", "-m", "old wip", date=1_000_000_000)
+    git(repo, "branch", "stale", "HEAD")
+    git(repo, "reset", "-q", "--hard", "HEAD~1")
+    assert prune_branches(merged=False, older_than_days=30) == ["stale"]
+    assert {branch.name for branch in get_branches()} == {
+        "main",
+        "merged",
+        "unmerged",
+    }
+
+
+def test_prune_branches_needs_a_selection():
+    with pytest.raises(ValueError):
+        prune_branches(merged=False)
+
+
+@pytest.fixture
+def diverged(repo):
+    """main and two branches off it: "clean" and "clash" (conflicts on a.txt)"""
+    (repo / "a.txt").write_text("base\n")
+    git(repo, "add", "a.txt")
+    git(repo, "commit", "-q", "-m", "a")
+    git(repo, "branch", "clean")
+    git(repo, "branch", "clash")
+    (repo / "a.txt").write_text("main\n")
+    git(repo, "commit", "-q", "-am", "main")
+    git(repo, "checkout", "-q", "clean")
+    (repo / "b.txt").write_text("b\n")
+    git(repo, "add", "b.txt")
+    git(repo, "commit", "-q", "-m", "b")
+    git(repo, "checkout", "-q", "clash")
+    (repo / "a.txt").write_text("clash\n")
+    git(repo, "commit", "-q", "-am", "clash")
+    git(repo, "checkout", "-q", "main")
+    return repo
+
+
+def test_preview_merge_predicts_conflicts_without_touching_the_tree(diverged):
+    head = subprocess.run(
+        ["git", "rev-parse", "HEAD"], capture_output=True, text=True
+    ).stdout
+
+    clean = preview_merge("clean", "main")
+    assert clean.clean is True
+    assert clean.conflicts == []
+    assert len(clean.tree) == 40
+
+    clash = preview_merge("clash")
+    assert clash.clean is False
+    assert clash.conflicts == ["a.txt"]
+    assert clash.error is None
+
+    assert (diverged / "a.txt").read_text() == "main\n"
+    assert not (diverged / "b.txt").exists()
+    status = subprocess.run(
+        ["git", "status", "--porcelain"], capture_output=True, text=True
+    ).stdout
+    assert status == ""
+    assert (
+        subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True)
+        .stdout
+        == head
+    )
+
+
+def test_preview_merge_reports_unknown_branches(diverged):
+    preview = preview_merge("missing")
+    assert preview.clean is False
+    assert preview.error
+
+
+def test_preview_merges_checks_every_source_against_one_target(diverged):
+    previews = preview_merges(["clean", "clash", "missing", "clean"], "main")
+    assert list(previews) == ["clean", "clash", "missing"]
+    assert previews["clean"].clean is True
+    assert previews["clash"].conflicts == ["a.txt"]
+    assert previews["missing"].error
+    assert all(preview.target == "main" for preview in previews.values())
+
+    unknown = preview_merges(["clean"], "nowhere")
+    assert unknown["clean"].error == "Unknown merge target: nowhere"
+    assert preview_merges([]) == {}
+
+
+def test_merge_branch_preflight_refuses_conflicting_merges(diverged, monkeypatch):
+    for variable in ("GIT_AUTHOR", "GIT_COMMITTER"):
+        monkeypatch.setenv(f"{variable}_NAME", "Ann")
+        monkeypatch.setenv(f"{variable}_EMAIL", "a@t")
+    success, message = merge_branch("clash", preflight=True)
+    assert success is False
+    assert message == "Merge would conflict in: a.txt"
+    assert (diverged / "a.txt").read_text() == "main\n"
+
+    success, _ = merge_branch("clean", "main", preflight=True)
+    assert success is True
+    assert (diverged / "b.txt").exists()
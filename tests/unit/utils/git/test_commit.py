@@ -1,13 +1,19 @@
 import subprocess
-from unittest.mock import patch
-from ai_dev_toolkit.utils.git.commit import generate_smart_commit_message, commit_changes, amend_commit
+from unittest.mock import patch, MagicMock
+from ai_dev_toolkit.utils.git.commit import (
+    generate_smart_commit_message,
+    generate_staged_commit_message,
+    commit_changes,
+    amend_commit,
+)
 
 
 def test_generate_smart_commit_message_empty():
     assert generate_smart_commit_message("") == "Empty commit"
 
 
-def test_generate_smart_commit_message_with_files():
+@patch("ai_dev_toolkit.utils.git.commit._commit_agent", side_effect=Exception("offline"))
+def test_generate_smart_commit_message_with_files(mock_agent):
     diff = """diff --git a/file1 b/file1
 --- a/file1
 +++ b/file1
@@ -22,6 +28,74 @@ diff --git a/file2 b/file2
     assert generate_smart_commit_message(diff) == "Update 2 files"
 
 
+DIFF = """diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -1 +1 @@
+-old
++new
+"""
+
+
+@patch("ai_dev_toolkit.utils.git.commit._commit_agent")
+def test_generate_smart_commit_message_sends_summary_to_model(
+    mock_agent, tmp_path, monkeypatch
+):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path))
+    mock_agent.return_value.run_sync.return_value = MagicMock(data="fix: use new\n")
+
+    message = generate_smart_commit_message(DIFF, token_budget=500, model="test")
+
+    assert message == "fix: use new"
+    mock_agent.assert_called_once_with("test")
+    prompt = mock_agent.return_value.run_sync.call_args.args[0]
+    assert prompt.startswith("Files changed (1, +1 -1):\nM app.py (+1 -1)")
+    assert "+new" in prompt
+
+
+@patch("ai_dev_toolkit.utils.git.commit._commit_agent")
+def test_generate_smart_commit_message_can_skip_ai(mock_agent):
+    assert generate_smart_commit_message(DIFF, use_ai=False) == "Update 1 files"
+    mock_agent.assert_not_called()
+
+
+@patch("ai_dev_toolkit.utils.git.commit._commit_agent")
+@patch("subprocess.run")
+def test_generate_staged_commit_message_caches_by_tree_sha(
+    mock_run, mock_agent, tmp_path, monkeypatch
+):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path))
+    mock_run.side_effect = [
+        MagicMock(stdout="abc123\n"),
+        MagicMock(stdout=DIFF),
+        MagicMock(stdout="abc123\n"),
+        MagicMock(stdout=DIFF),
+    ]
+    mock_agent.return_value.run_sync.return_value = MagicMock(data="feat: cached")
+
+    assert generate_staged_commit_message(model="test") == "feat: cached"
+    assert generate_staged_commit_message(model="test") == "feat: cached"
+    assert mock_agent.return_value.run_sync.call_count == 1
+
+
+@patch("ai_dev_toolkit.utils.git.commit._commit_agent", side_effect=Exception("offline"))
+@patch("subprocess.run")
+def test_generate_staged_commit_message_does_not_cache_fallback(
+    mock_run, mock_agent, tmp_path, monkeypatch
+):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path))
+    mock_run.side_effect = [MagicMock(stdout="abc123\n"), MagicMock(stdout=DIFF)]
+
+    assert generate_staged_commit_message(model="test") == "Update 1 files"
+    assert list((tmp_path / "commit-messages").iterdir()) == []
+
+
+@patch("subprocess.run")
+def test_generate_staged_commit_message_returns_empty_string_outside_repo(mock_run):
+    mock_run.side_effect = subprocess.CalledProcessError(128, "git")
+    assert generate_staged_commit_message() == ""
+
+
 @patch("subprocess.run")
 def test_commit_changes_with_files(mock_run):
     mock_run.return_value.returncode = 0
@@ -1,6 +1,15 @@
 import subprocess
 from unittest.mock import patch, mock_open, MagicMock
-from ai_dev_toolkit.utils.git.conflict import get_conflicts, resolve_conflict, abort_merge
+from ai_dev_toolkit.utils.git.conflict import (
+    get_conflicts,
+    resolve_conflict,
+    abort_merge,
+    scan_conflicts,
+    resolve_lines,
+    resolve_all_conflicts,
+)
+from ai_dev_toolkit.utils.git.status import invalidate_status
+import pytest
 
 
 class MockFileWithWriteFailure:
@@ -22,17 +31,31 @@ class MockFileWithWriteFailure:
         raise IOError("Write failed")
 
 
+@pytest.fixture(autouse=True)
+def fresh_status():
+    invalidate_status()
+    yield
+    invalidate_status()
+
+
 @patch("subprocess.run")
 def test_get_conflicts_returns_list_of_files_with_merge_conflicts(mock_run):
-    mock_run.return_value.stdout = "file1.txt\nfile2.txt\n"
+    mock_run.return_value.stdout = (
+        "# branch.head main\0"
+        "u UU N... 100644 100644 100644 100644 a b c file1.txt\0"
+        "1 M. N... 100644 100644 100644 a b staged.txt\0"
+        "u AA N... 000000 100644 100644 100644 a b c file2.txt\0"
+    )
     mock_run.return_value.returncode = 0
 
     conflicts = get_conflicts()
     assert conflicts == ["file1.txt", "file2.txt"]
     mock_run.assert_called_once_with(
-        ["git", "diff", "--name-only", "--diff-filter=U"],
+        ["git", "--no-optional-locks", "status", "--porcelain=v2", "-z", "--branch"],
+        cwd=".",
         capture_output=True,
         text=True,
+        errors="surrogateescape",
         check=True,
     )
 
@@ -44,41 +67,37 @@ def test_get_conflicts_returns_empty_list_when_git_command_fails(mock_run):
 
 
 @patch("subprocess.run")
-def test_resolve_conflict_keeps_our_changes_and_stages_file(mock_run):
+def test_resolve_conflict_keeps_our_changes_and_stages_file(mock_run, tmp_path):
     conflict_content = "before\n<<<<<<< HEAD\nour changes\n=======\ntheir changes\n>>>>>>> branch\nafter"
+    file = tmp_path / "file.txt"
+    file.write_text(conflict_content)
 
-    mock_file = mock_open(read_data=conflict_content)
-    with patch("builtins.open", mock_file):
-        assert resolve_conflict("file.txt", "ours") is True
+    assert resolve_conflict(str(file), "ours") is True
 
-        # Check if the file was written with correct content
-        handle = mock_file()
-        written_content = "".join(call.args[0] for call in handle.write.call_args_list)
-        assert written_content == "before\nour changes\nafter"
+    # Check if the file was written with correct content
+    assert file.read_text() == "before\nour changes\nafter"
 
-        # Check if git add was called
-        mock_run.assert_called_once_with(["git", "add", "file.txt"], check=True)
+    # Check if git add was called
+    mock_run.assert_called_once_with(["git", "add", str(file)], check=True)
 
 
 @patch("subprocess.run")
-def test_resolve_conflict_keeps_their_changes_and_stages_file(mock_run):
+def test_resolve_conflict_keeps_their_changes_and_stages_file(mock_run, tmp_path):
     conflict_content = "before\n<<<<<<< HEAD\nour changes\n=======\ntheir changes\n>>>>>>> branch\nafter"
+    file = tmp_path / "file.txt"
+    file.write_text(conflict_content)
 
-    mock_file = mock_open(read_data=conflict_content)
-    with patch("builtins.open", mock_file):
-        assert resolve_conflict("file.txt", "theirs") is True
+    assert resolve_conflict(str(file), "theirs") is True
 
-        # Check if the file was written with correct content
-        handle = mock_file()
-        written_content = "".join(call.args[0] for call in handle.write.call_args_list)
-        assert written_content == "before\ntheir changes\nafter"
+    # Check if the file was written with correct content
+    assert file.read_text() == "before\ntheir changes\nafter"
 
-        # Check if git add was called
-        mock_run.assert_called_once_with(["git", "add", "file.txt"], check=True)
+    # Check if git add was called
+    mock_run.assert_called_once_with(["git", "add", str(file)], check=True)
 
 
 @patch("subprocess.run")
-def test_resolve_conflict_with_multiple_conflicts(mock_run):
+def test_resolve_conflict_with_multiple_conflicts(mock_run, tmp_path):
     conflict_content = (
         "before\n"
         "<<<<<<< HEAD\nour first\n=======\ntheir first\n>>>>>>> branch\n"
@@ -86,31 +105,59 @@ def test_resolve_conflict_with_multiple_conflicts(mock_run):
         "<<<<<<< HEAD\nour second\n=======\ntheir second\n>>>>>>> branch\n"
         "after"
     )
+    file = tmp_path / "file.txt"
+    file.write_text(conflict_content)
 
-    mock_file = mock_open(read_data=conflict_content)
-    with patch("builtins.open", mock_file):
-        assert resolve_conflict("file.txt", "ours") is True
+    assert resolve_conflict(str(file), "ours") is True
 
-        # Check if the file was written with correct content
-        handle = mock_file()
-        written_content = "".join(call.args[0] for call in handle.write.call_args_list)
-        expected_content = "before\nour first\nmiddle\nour second\nafter"
-        assert written_content == expected_content, f"Expected:\n{expected_content}\nGot:\n{written_content}"
+    # Check if the file was written with correct content
+    expected_content = "before\nour first\nmiddle\nour second\nafter"
+    written_content = file.read_text()
+    assert written_content == expected_content, f"Expected:\n{expected_content}\nGot:\n{written_content}"
 
-        # Check if git add was called
-        mock_run.assert_called_once_with(["git", "add", "file.txt"], check=True)
+    # Check if git add was called
+    mock_run.assert_called_once_with(["git", "add", str(file)], check=True)
 
 
-def test_resolve_conflict_returns_false_for_invalid_resolution_strategy():
-    mock_file = mock_open(read_data="some content")
-    with patch("builtins.open", mock_file):
-        assert resolve_conflict("file.txt", "invalid") is False
+@patch("subprocess.run")
+def test_resolve_conflict_preserves_crlf_and_non_utf8_bytes(mock_run, tmp_path):
+    file = tmp_path / "file.bin"
+    file.write_bytes(
+        b"\xff\r\n<<<<<<< HEAD\r\nours \xfe\r\n=======\r\ntheirs\r\n>>>>>>> b\r\nend"
+    )
 
+    assert resolve_conflict(str(file), "ours") is True
+    assert file.read_bytes() == b"\xff\r\nours \xfe\r\nend"
+
+
+@patch("subprocess.run")
+def test_resolve_conflict_detects_marker_at_start_of_file(mock_run, tmp_path):
+    file = tmp_path / "file.txt"
+    file.write_text("<<<<<<<< not a marker\n<<<<<<< HEAD\na\n=======\nb\n>>>>>>> x\n")
+
+    assert resolve_conflict(str(file), "theirs") is True
+    assert file.read_text() == "<<<<<<<< not a marker\nb\n"
 
-def test_resolve_conflict_returns_false_when_no_conflicts_found():
-    mock_file = mock_open(read_data="no conflicts here")
-    with patch("builtins.open", mock_file):
-        assert resolve_conflict("file.txt", "ours") is False
+
+def test_resolve_conflict_returns_false_for_invalid_resolution_strategy(tmp_path):
+    file = tmp_path / "file.txt"
+    file.write_text("<<<<<<< HEAD\nours\n=======\ntheirs\n>>>>>>> branch\n")
+    assert resolve_conflict(str(file), "invalid") is False
+
+
+@patch("subprocess.run")
+def test_resolve_conflict_returns_false_when_no_conflicts_found(mock_run, tmp_path):
+    file = tmp_path / "file.txt"
+    file.write_text("no conflicts here")
+    assert resolve_conflict(str(file), "ours") is False
+    mock_run.assert_not_called()
+
+
+@patch("subprocess.run")
+def test_resolve_conflict_returns_false_for_empty_file(mock_run, tmp_path):
+    file = tmp_path / "file.txt"
+    file.write_text("")
+    assert resolve_conflict(str(file), "ours") is False
 
 
 @patch("subprocess.run")
@@ -122,36 +169,178 @@ def test_resolve_conflict_returns_false_when_file_operations_fail(mock_run):
 
 
 @patch("subprocess.run")
-def test_resolve_conflict_git_command_fails(mock_run):
+def test_resolve_conflict_git_command_fails(mock_run, tmp_path):
     conflict_content = "before\n<<<<<<< HEAD\nour changes\n=======\ntheir changes\n>>>>>>> branch\nafter"
     mock_run.side_effect = subprocess.CalledProcessError(1, "git")
-    
-    mock_file = mock_open(read_data=conflict_content)
-    with patch("builtins.open", mock_file):
-        assert resolve_conflict("file.txt", "ours") is False
+    file = tmp_path / "file.txt"
+    file.write_text(conflict_content)
+
+    assert resolve_conflict(str(file), "ours") is False
 
 
 @patch("subprocess.run")
-def test_resolve_conflict_write_fails(mock_run):
+def test_resolve_conflict_write_fails(mock_run, tmp_path):
     conflict_content = "before\n<<<<<<< HEAD\nour changes\n=======\ntheir changes\n>>>>>>> branch\nafter"
-    
-    # Create a mock file object that succeeds on read but fails on write
-    mock_file = mock_open(read_data=conflict_content)
-    mock_file.return_value.__enter__.return_value.write.side_effect = IOError()
-    
-    with patch("builtins.open", mock_file):
-        assert resolve_conflict("file.txt", "ours") is False
+    file = tmp_path / "file.txt"
+    file.write_text(conflict_content)
+
+    # Fail the atomic rename; the original file and directory must be untouched
+    with patch("os.replace", side_effect=IOError()):
+        assert resolve_conflict(str(file), "ours") is False
+
+    assert file.read_text() == conflict_content
+    assert [path.name for path in tmp_path.iterdir()] == ["file.txt"]
+    mock_run.assert_not_called()
 
 
 @patch("subprocess.run")
-def test_resolve_conflict_read_fails(mock_run):
-    mock_file = MagicMock()
-    mock_file_context = MagicMock()
-    mock_file_context.__enter__.return_value.read.side_effect = IOError()
-    mock_file.return_value = mock_file_context
-    
-    with patch("builtins.open", mock_file):
-        assert resolve_conflict("file.txt", "ours") is False
+def test_resolve_conflict_read_fails(mock_run, tmp_path):
+    assert resolve_conflict(str(tmp_path / "missing.txt"), "ours") is False
+    mock_run.assert_not_called()
+
+
+def test_scan_conflicts_yields_plain_lines_and_diff3_hunks():
+    lines = [
+        "before\n",
+        "<<<<<<< HEAD\n",
+        "ours\n",
+        "||||||| base\n",
+        "base\n",
+        "=======\n",
+        "theirs\n",
+        ">>>>>>> branch\n",
+        "after\n",
+    ]
+    items = list(scan_conflicts(lines))
+    assert items[0] == "before\n"
+    assert items[1] == {
+        "ours": ["ours\n"],
+        "base": ["base\n"],
+        "theirs": ["theirs\n"],
+        "line": 2,
+    }
+    assert items[2] == "after\n"
+
+
+def test_scan_conflicts_ignores_marker_like_lines_outside_conflicts():
+    lines = ["Title\n", "=======\n", ">>>>>>>> not a marker\n"]
+    assert list(scan_conflicts(lines)) == lines
+
+
+def test_scan_conflicts_raises_on_unterminated_conflict():
+    with pytest.raises(ValueError, match="line 1"):
+        list(scan_conflicts(["<<<<<<< HEAD\n", "ours\n", "=======\n"]))
+
+
+def test_resolve_lines_supports_union_and_base_strategies():
+    lines = [
+        "<<<<<<< HEAD\n",
+        "ours\n",
+        "||||||| base\n",
+        "base\n",
+        "=======\n",
+        "theirs\n",
+        ">>>>>>> branch\n",
+    ]
+    assert resolve_lines(lines, "union") == (["ours\n", "theirs\n"], 1)
+    assert resolve_lines(lines, "base") == (["base\n"], 1)
+
+
+def test_resolve_lines_base_requires_diff3_markers():
+    lines = ["<<<<<<< HEAD\n", "ours\n", "=======\n", "theirs\n", ">>>>>>> b\n"]
+    with pytest.raises(ValueError, match="no base section"):
+        resolve_lines(lines, "base")
+
+
+def test_resolve_lines_resolves_nested_conflicts_with_enclosing_strategy():
+    lines = [
+        "<<<<<<< HEAD\n",
+        "<<<<<<< inner\n",
+        "inner ours\n",
+        "=======\n",
+        "inner theirs\n",
+        ">>>>>>> inner\n",
+        "=======\n",
+        "outer theirs\n",
+        ">>>>>>> branch\n",
+    ]
+    assert resolve_lines(lines, "ours") == (["inner ours\n"], 1)
+    assert resolve_lines(lines, "theirs") == (["outer theirs\n"], 1)
+
+
+@patch("subprocess.run")
+def test_resolve_conflict_applies_per_hunk_resolutions(mock_run, tmp_path):
+    conflict_content = (
+        "<<<<<<< HEAD\nour first\n=======\ntheir first\n>>>>>>> branch\n"
+        "middle\n"
+        "<<<<<<< HEAD\nour second\n=======\ntheir second\n>>>>>>> branch\n"
+    )
+    file = tmp_path / "file.txt"
+    file.write_text(conflict_content)
+
+    assert resolve_conflict(str(file), ["theirs", "union"]) is True
+    assert file.read_text() == "their first\nmiddle\nour second\ntheir second\n"
+
+
+@patch("subprocess.run")
+def test_resolve_conflict_returns_false_when_hunk_count_does_not_match(
+    mock_run, tmp_path
+):
+    conflict_content = "<<<<<<< HEAD\nours\n=======\ntheirs\n>>>>>>> branch\n"
+    file = tmp_path / "file.txt"
+    file.write_text(conflict_content)
+
+    assert resolve_conflict(str(file), ["ours", "theirs"]) is False
+    assert file.read_text() == conflict_content
+    mock_run.assert_not_called()
+
+
+@patch("subprocess.run")
+def test_resolve_all_conflicts_applies_glob_rules_and_stages_once(mock_run, tmp_path):
+    conflict_content = "<<<<<<< HEAD\nours\n=======\ntheirs\n>>>>>>> branch\n"
+    lock_file = tmp_path / "poetry.lock"
+    source_file = tmp_path / "main.py"
+    clean_file = tmp_path / "clean.py"
+    lock_file.write_text(conflict_content)
+    source_file.write_text(conflict_content)
+    clean_file.write_text("no conflicts here\n")
+    paths = [str(lock_file), str(source_file), str(clean_file)]
+
+    results = resolve_all_conflicts("ours", paths, rules={"*.lock": "theirs"})
+
+    assert lock_file.read_text() == "theirs\n"
+    assert source_file.read_text() == "ours\n"
+    assert results[str(lock_file)] == {
+        "strategy": "theirs",
+        "resolved": True,
+        "staged": True,
+    }
+    assert results[str(clean_file)]["resolved"] is False
+    assert results[str(clean_file)]["staged"] is False
+    mock_run.assert_called_once_with(
+        ["git", "add", "--pathspec-from-file=-", "--pathspec-file-nul"],
+        input=f"{lock_file}\0{source_file}",
+        text=True,
+        check=True,
+    )
+
+
+@patch("subprocess.run")
+def test_resolve_all_conflicts_uses_get_conflicts_by_default(mock_run):
+    mock_run.return_value.stdout = ""
+    assert resolve_all_conflicts("ours") == {}
+    mock_run.assert_called_once()
+
+
+@patch("subprocess.run")
+def test_resolve_all_conflicts_reports_unstaged_when_git_add_fails(mock_run, tmp_path):
+    conflicted = tmp_path / "file.txt"
+    conflicted.write_text("<<<<<<< HEAD\nours\n=======\ntheirs\n>>>>>>> b\n")
+    mock_run.side_effect = subprocess.CalledProcessError(1, "git")
+
+    results = resolve_all_conflicts("theirs", [str(conflicted)])
+    assert results[str(conflicted)]["resolved"] is True
+    assert results[str(conflicted)]["staged"] is False
 
 
 @patch("subprocess.run")
@@ -0,0 +1,79 @@
+from ai_dev_toolkit.utils.git.patch import parse_diff, render_patch, Hunk
+
+DIFF = """diff --git a/app.py b/app.py
+index 1111111..2222222 100644
+--- a/app.py
++++ b/app.py
+@@ -1,3 +1,4 @@ def main():
+ first
+--- removed comment
++added one
++added two
+ third
+@@ -10,2 +11,2 @@
+-old ten
++new ten
+ eleven
+diff --git a/logo.png b/logo.png
+index 3333333..4444444 100644
+Binary files a/logo.png and b/logo.png differ
+"""
+
+
+def test_parse_diff_splits_files_and_hunks_using_header_counts():
+    patches = parse_diff(DIFF)
+    assert [patch.path for patch in patches] == ["app.py", "logo.png"]
+
+    app = patches[0]
+    assert app.headers[-2:] == ["--- a/app.py", "+++ b/app.py"]
+    assert len(app.hunks) == 2
+    assert app.hunks[0].section == " def main():"
+    assert app.hunks[0].lines[1] == "--- removed comment"
+    assert (app.hunks[1].old_start, app.hunks[1].new_count) == (10, 2)
+    assert patches[1].binary is True
+    assert patches[1].hunks == []
+
+
+def test_parse_diff_gives_stable_hunk_ids():
+    first = parse_diff(DIFF)[0].hunks
+    shifted = parse_diff(DIFF.replace("@@ -10,2 +11,2 @@", "@@ -20,2 +21,2 @@"))
+    assert first[1].id == shifted[0].hunks[1].id
+    assert first[0].id != first[1].id
+
+
+def test_parse_diff_handles_plain_unified_diff_and_new_files():
+    diff = "--- /dev/null\n+++ b/new.txt\n@@ -0,0 +1 @@\n+hello\n"
+    patch = parse_diff(diff)[0]
+    assert patch.old_path is None
+    assert patch.new_path == "new.txt"
+    assert patch.hunks[0].new_count == 1
+
+
+def test_hunk_select_keeps_chosen_lines_and_turns_other_removals_into_context():
+    hunk = parse_diff(DIFF)[0].hunks[0]
+    partial = hunk.select([2])
+    assert partial.lines == [" first", " -- removed comment", "+added one", " third"]
+    assert (partial.old_count, partial.new_count) == (3, 4)
+    assert hunk.select([0]) is None
+
+
+def test_hunk_select_drops_no_newline_marker_of_dropped_addition():
+    hunk = Hunk(1, 1, 1, 1, lines=["-a", "+b", "\\ No newline at end of file"])
+    assert hunk.select([0]).lines == ["-a"]
+
+
+def test_render_patch_recalculates_new_starts_for_selected_hunks():
+    patch = parse_diff(DIFF)[0]
+    second = patch.hunks[1]
+    text = render_patch(patch, {second.id: None})
+    assert "@@ -10,2 +10,2 @@" in text
+    assert text.startswith("diff --git a/app.py b/app.py\n")
+
+    both = render_patch(patch, {patch.hunks[0].id: [2], second.id: None})
+    assert "@@ -1,3 +1,4 @@ def main():" in both
+    assert "@@ -10,2 +11,2 @@" in both
+
+
+def test_render_patch_returns_empty_string_without_selection():
+    patch = parse_diff(DIFF)[0]
+    assert render_patch(patch, {}) == ""
@@ -1,5 +1,5 @@
 import subprocess
-from unittest.mock import patch, mock_open
+from unittest.mock import patch
 from ai_dev_toolkit.utils.git.release import (
     bump_version,
     generate_changelog,
@@ -9,28 +9,36 @@ from ai_dev_toolkit.utils.git.release import (
 from pathlib import Path
 
 
-@patch("pathlib.Path.exists")
-@patch("builtins.open", new_callable=mock_open)
-def test_bump_version_major(mock_file, mock_exists):
-    mock_exists.return_value = True
-    mock_file.return_value.read.return_value = 'version = "1.2.3"'
+def test_bump_version_major(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("setup.py").write_text('version = "1.2.3"')
     assert bump_version("major") == "2.0.0"
+    assert Path("setup.py").read_text() == 'version = "2.0.0"'
 
 
-@patch("pathlib.Path.exists")
-@patch("builtins.open", new_callable=mock_open)
-def test_bump_version_minor(mock_file, mock_exists):
-    mock_exists.return_value = True
-    mock_file.return_value.read.return_value = 'version = "1.2.3"'
+def test_bump_version_minor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("setup.py").write_text('version = "1.2.3"')
     assert bump_version("minor") == "1.3.0"
+    assert Path("setup.py").read_text() == 'version = "1.3.0"'
 
 
-@patch("pathlib.Path.exists")
-@patch("builtins.open", new_callable=mock_open)
-def test_bump_version_patch(mock_file, mock_exists):
-    mock_exists.return_value = True
-    mock_file.return_value.read.return_value = 'version = "1.2.3"'
+def test_bump_version_patch(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("VERSION").write_text("1.2.3\n")
     assert bump_version("patch") == "1.2.4"
+    assert Path("VERSION").read_text() == "1.2.4\n"
+
+
+def test_bump_version_streams_large_files_and_replaces_every_match(
+    tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    padding = "x" * (3 * 1024 * 1024)
+    Path("VERSION").write_text(f"1.2.3\n{padding}\nalso 1.2.3\n")
+    assert bump_version("patch") == "1.2.4"
+    assert Path("VERSION").read_text() == f"1.2.4\n{padding}\nalso 1.2.4\n"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["VERSION"]
 
 
 @patch("pathlib.Path.exists")
@@ -39,14 +47,19 @@ def test_bump_version_no_version_file(mock_exists):
     assert bump_version("patch") == ""
 
 
-@patch("pathlib.Path.exists")
-@patch("builtins.open", new_callable=mock_open)
-def test_bump_version_no_version_found(mock_file, mock_exists):
-    mock_exists.return_value = True
-    mock_file.return_value.read.return_value = 'no version here'
+def test_bump_version_no_version_found(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("VERSION").write_text("no version here")
     assert bump_version("patch") == ""
 
 
+def test_bump_version_skips_empty_version_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("setup.py").write_text("")
+    Path("VERSION").write_text("0.1.0")
+    assert bump_version("minor") == "0.2.0"
+
+
 @patch("pathlib.Path.exists")
 @patch("builtins.open")
 def test_bump_version_io_error(mock_file, mock_exists):
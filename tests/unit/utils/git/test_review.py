@@ -1,5 +1,10 @@
-from unittest.mock import patch
-from ai_dev_toolkit.utils.git.review import analyze_changes, suggest_reviewers, impact_analysis
+from unittest.mock import AsyncMock, MagicMock, patch
+from ai_dev_toolkit.utils.git.review import (
+    analyze_changes,
+    impact_analysis,
+    suggest_reviewers,
+    summarize_review,
+)
 import subprocess
 from pathlib import Path
 
@@ -77,3 +82,28 @@ def test_impact_analysis_returns_empty_analysis_for_empty_diff():
         "api_changes": [],
         "test_coverage": {"modified_tests": [], "needs_tests": []},
     }
+
+
+def test_summarize_review_sends_stats_and_diff_to_the_model(tmp_path, monkeypatch):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path))
+    diff = (
+        "diff --git a/app.py b/app.py\n--- a/app.py\n+++ b/app.py\n"
+        "@@ -1,1 +1,2 @@\n x = 1\n+print(x)\n"
+    )
+    agent = MagicMock()
+    agent.run = AsyncMock(return_value=MagicMock(data=" Looks fine. "))
+
+    with patch("ai_dev_toolkit.utils.git.review.get_agent", return_value=agent):
+        assert summarize_review(diff) == "Looks fine."
+
+    prompt = agent.run.call_args[0][0]
+    assert prompt.startswith("1 files changed, +1 -0")
+    assert "+print(x)" in prompt
+
+
+def test_summarize_review_returns_empty_string_when_model_fails():
+    diff = "diff --git a/a b/a\n--- a/a\n+++ b/a\n@@ -1,1 +1,1 @@\n-a\n+b\n"
+    with patch(
+        "ai_dev_toolkit.utils.git.review.get_agent", side_effect=Exception("down")
+    ):
+        assert summarize_review(diff) == ""
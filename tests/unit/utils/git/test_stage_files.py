@@ -1,7 +1,14 @@
 from unittest.mock import patch, Mock, MagicMock
-from ai_dev_toolkit.utils.git.stage_files import stage_files, unstage_files, stage_hunks
+from ai_dev_toolkit.utils.git.stage_files import (
+    stage_files,
+    unstage_files,
+    stage_hunks,
+    get_file_patches,
+    stage_selections,
+)
 import subprocess
 import pytest
+from pathlib import Path
 
 
 def test_stage_files_returns_false_for_empty_file_list():
@@ -145,3 +152,97 @@ def test_stage_hunks_subprocess_error(mock_popen):
 def test_stage_hunks_os_error(mock_popen):
     mock_popen.side_effect = OSError()
     assert stage_hunks('file.txt', ['hunk']) is False
+
+
+DIFF = """diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -1,2 +1,2 @@
+-one
++ONE
+ two
+@@ -9,2 +9,2 @@
+ nine
+-ten
++TEN
+"""
+
+
+@patch("subprocess.run")
+def test_get_file_patches_parses_one_git_diff_for_many_files(mock_run):
+    mock_run.return_value.stdout = DIFF
+    patches = get_file_patches(["app.py", "other.py"])
+    assert list(patches) == ["app.py"]
+    assert len(patches["app.py"].hunks) == 2
+    mock_run.assert_called_once_with(
+        ["git", "diff", "--no-color", "--no-ext-diff", "--", "app.py", "other.py"],
+        capture_output=True,
+        text=True,
+        errors="surrogateescape",
+        check=True,
+    )
+
+
+@patch("subprocess.run")
+def test_get_file_patches_returns_empty_dict_when_git_fails(mock_run):
+    mock_run.side_effect = subprocess.CalledProcessError(1, "git")
+    assert get_file_patches() == {}
+
+
+@patch("subprocess.run")
+def test_stage_selections_applies_synthesized_patch_in_one_call(mock_run):
+    mock_run.return_value.stdout = DIFF
+    patches = get_file_patches()
+    second = patches["app.py"].hunks[1]
+    mock_run.reset_mock()
+
+    assert stage_selections({"app.py": [second.id]}, patches) is True
+    mock_run.assert_called_once()
+    assert mock_run.call_args.args[0] == ["git", "apply", "--cached", "-"]
+    assert "@@ -9,2 +9,2 @@\n nine\n-ten\n+TEN\n" in mock_run.call_args.kwargs["input"]
+    assert "-one" not in mock_run.call_args.kwargs["input"]
+
+
+@patch("subprocess.run")
+def test_stage_selections_rejects_unknown_files_and_hunks(mock_run):
+    mock_run.return_value.stdout = DIFF
+    patches = get_file_patches()
+    assert stage_selections({"missing.py": ["abc"]}, patches) is False
+    assert stage_selections({"app.py": ["unknown"]}, patches) is False
+    assert stage_selections({}, patches) is False
+
+
+def test_stage_selections_stages_lines_in_a_real_repository(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    subprocess.run(["git", "init", "-q"], check=True)
+    Path("a.txt").write_text("".join(f"line {i}\n" for i in range(1, 31)))
+    Path("b.txt").write_text("keep\nold\n")
+    subprocess.run(["git", "add", "."], check=True)
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "init"],
+        check=True,
+    )
+
+    Path("a.txt").write_text(
+        "".join(f"line {i}\n" for i in range(1, 31))
+        .replace("line 2\n", "line 2\ninserted\n")
+        .replace("line 25\n", "changed 25\n")
+    )
+    Path("b.txt").write_text("keep\nnew\nextra\n")
+
+    patches = get_file_patches()
+    first, second = patches["a.txt"].hunks
+    b_hunk = patches["b.txt"].hunks[0]
+    b_added = [i for i, line in enumerate(b_hunk.lines) if line == "+new"]
+
+    assert stage_selections(
+        {"a.txt": [second.id], "b.txt": {b_hunk.id: b_added + [1]}}, patches
+    ) is True
+
+    staged = subprocess.run(
+        ["git", "diff", "--cached"], capture_output=True, text=True, check=True
+    ).stdout
+    assert "+changed 25" in staged
+    assert "+inserted" not in staged
+    assert "+new" in staged and "-old" in staged
+    assert "+extra" not in staged
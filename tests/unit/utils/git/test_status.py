@@ -0,0 +1,124 @@
+import subprocess
+from unittest.mock import patch
+import pytest
+from ai_dev_toolkit.utils.git.branch import get_current_branch, get_tracking_status
+from ai_dev_toolkit.utils.git.conflict import get_conflicts
+from ai_dev_toolkit.utils.git.stage_files import get_staged_files, get_unstaged_files
+from ai_dev_toolkit.utils.git.status import get_status, invalidate_status, parse_status
+
+
+def git(root, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+        cwd=root,
+        check=True,
+        capture_output=True,
+    )
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    invalidate_status()
+    git(tmp_path, "init", "-q", "-b", "main")
+    (tmp_path / "a.txt").write_text("a\n")
+    (tmp_path / "b.txt").write_text("b\n")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "init")
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    invalidate_status()
+
+
+def test_parse_status_reads_branch_and_every_entry_kind():
+    output = "\0".join(
+        [
+            "# branch.oid 1234abcd",
+            "# branch.head feature",
+            "# branch.upstream origin/feature",
+            "# branch.ab +2 -3",
+            "1 .M N... 100644 100644 100644 aa bb with space.txt",
+            "1 A. N... 000000 100644 100644 00 bb added.txt",
+            "2 R. N... 100644 100644 100644 aa bb R100 new.txt",
+            "old.txt",
+            "u UU N... 100644 100644 100644 100644 aa bb cc conflict.txt",
+            "? untracked.txt",
+            "",
+        ]
+    )
+    status = parse_status(output)
+    assert status.branch == "feature"
+    assert status.commit == "1234abcd"
+    assert (status.upstream, status.ahead, status.behind) == ("origin/feature", 2, 3)
+    assert status.unstaged == ["with space.txt"]
+    assert status.staged == ["added.txt", "new.txt"]
+    assert status.renamed == {"new.txt": "old.txt"}
+    assert status.conflicted == ["conflict.txt"]
+    assert status.untracked == ["untracked.txt"]
+
+
+def test_parse_status_handles_detached_head_and_no_commits():
+    status = parse_status("# branch.oid (initial)\0# branch.head (detached)\0")
+    assert status.branch is None
+    assert status.commit is None
+
+
+def test_get_status_reuses_snapshot_until_index_changes(repo):
+    (repo / "a.txt").write_text("changed\n")
+    (repo / "new.txt").write_text("new\n")
+    get_status()
+
+    with patch("subprocess.run", wraps=subprocess.run) as run:
+        assert get_unstaged_files(refresh=False) == ["a.txt"]
+        assert get_unstaged_files(untracked=True, refresh=False) == [
+            "a.txt",
+            "new.txt",
+        ]
+        assert get_staged_files() == []
+        assert get_current_branch() == "main"
+        assert get_tracking_status() == (None, 0, 0)
+        assert get_conflicts() == []
+        assert run.call_count == 0
+
+    git(repo, "add", "a.txt")
+    assert get_staged_files() == ["a.txt"]
+    git(repo, "commit", "-q", "-m", "change")
+    assert get_staged_files() == []
+
+    git(repo, "checkout", "-q", "-b", "other")
+    assert get_current_branch() == "other"
+
+
+def test_get_status_refresh_sees_working_tree_edits(repo):
+    assert get_status().unstaged == []
+    (repo / "b.txt").write_text("edited\n")
+    assert get_status(refresh=True).unstaged == ["b.txt"]
+
+
+def test_get_unstaged_files_sees_edits_and_new_files_after_a_snapshot(repo):
+    assert get_unstaged_files(untracked=True) == []
+    assert get_current_branch() == "main"
+    (repo / "b.txt").write_text("edited\n")
+    (repo / "new.txt").write_text("new\n")
+    assert get_unstaged_files() == ["b.txt"]
+    assert get_unstaged_files(untracked=True) == ["b.txt", "new.txt"]
+
+
+def test_get_status_reports_merge_conflicts(repo):
+    git(repo, "checkout", "-q", "-b", "theirs")
+    (repo / "a.txt").write_text("theirs\n")
+    git(repo, "commit", "-q", "-am", "theirs")
+    git(repo, "checkout", "-q", "main")
+    (repo / "a.txt").write_text("ours\n")
+    git(repo, "commit", "-q", "-am", "ours")
+    assert get_conflicts() == []
+
+    with pytest.raises(subprocess.CalledProcessError):
+        git(repo, "merge", "theirs")
+    assert get_conflicts() == ["a.txt"]
+
+
+def test_get_status_returns_none_outside_a_repository(tmp_path):
+    outside = tmp_path / "plain"
+    outside.mkdir()
+    with patch.dict("os.environ", {"GIT_CEILING_DIRECTORIES": str(tmp_path)}):
+        assert get_status(str(outside)) is None
@@ -0,0 +1,164 @@
+import asyncio
+from ai_dev_toolkit.utils.git.summarize import (
+    estimate_tokens,
+    is_generated,
+    map_reduce_diff,
+    split_diff,
+    summarize_diff,
+)
+
+
+def make_diff(path: str, changed_lines: int) -> str:
+    body = "".join(f"+added line {i}\n" for i in range(changed_lines))
+    return (
+        f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n"
+        f"@@ -0,0 +1,{changed_lines} @@ def handler():\n{body}"
+    )
+
+
+def test_estimate_tokens_uses_local_tokenizer():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("hello world") == 2
+    assert estimate_tokens("abcdefghijkl") == 2
+
+
+def test_is_generated_matches_lock_files_and_build_output():
+    assert is_generated("poetry.lock")
+    assert is_generated("frontend/package-lock.json")
+    assert is_generated("dist/bundle.js")
+    assert not is_generated("src/app.py")
+
+
+def test_summarize_diff_lists_stats_and_skips_generated_files():
+    diff = make_diff("src/app.py", 2) + make_diff("poetry.lock", 500)
+    summary = summarize_diff(diff)
+
+    assert summary.splitlines()[:3] == [
+        "Files changed (2, +502 -0):",
+        "M src/app.py (+2 -0)",
+        "M poetry.lock (+500 -0) [generated, skipped]",
+    ]
+    assert "@@ def handler():" in summary
+    assert "+added line 1" in summary
+    assert "poetry.lock\n" not in summary
+
+
+def test_summarize_diff_caps_lines_per_hunk():
+    summary = summarize_diff(make_diff("app.py", 50), max_hunk_lines=10)
+    assert "+added line 9" in summary
+    assert "+added line 10" not in summary
+    assert "... 40 more changed lines" in summary
+
+
+def test_summarize_diff_fits_budget_and_shares_it_between_files():
+    diff = make_diff("big.py", 2000) + make_diff("small.py", 3)
+    summary = summarize_diff(diff, token_budget=300, max_hunk_lines=2000)
+
+    assert estimate_tokens(summary) <= 300
+    assert "\nsmall.py\n" in summary
+    assert "+added line 2" in summary.split("\nsmall.py\n")[1]
+    assert "more lines omitted" in summary
+
+
+def test_summarize_diff_truncates_file_list_when_budget_is_tiny():
+    diff = "".join(make_diff(f"file{i}.py", 1) for i in range(100))
+    summary = summarize_diff(diff, token_budget=50)
+    assert summary.splitlines()[-1].endswith("more files")
+
+
+def test_summarize_diff_returns_empty_string_for_non_diff():
+    assert summarize_diff("") == ""
+
+
+def make_multi_hunk_diff(path: str, hunks: int, start: int = 1) -> str:
+    lines = [f"diff --git a/{path} b/{path}", f"--- a/{path}", f"+++ b/{path}"]
+    for i in range(hunks):
+        old = start + i * 20
+        lines.append(f"@@ -{old},1 +{old + i},2 @@")
+        lines.extend([f" context {i}", f"+change {i}"])
+    return "\n".join(lines) + "\n"
+
+
+def test_split_diff_groups_hunks_and_skips_generated_files():
+    diff = make_multi_hunk_diff("app.py", 10) + make_diff("poetry.lock", 50)
+    chunks = split_diff(diff, max_chunk_tokens=40)
+
+    assert len(chunks) > 1
+    assert all("poetry.lock" not in text for _, text in chunks)
+    assert all(text.startswith("diff --git a/app.py") for _, text in chunks)
+    assert sum(text.count("+change") for _, text in chunks) == 10
+
+
+def test_split_diff_keys_survive_shifted_line_numbers():
+    original = dict(split_diff(make_multi_hunk_diff("app.py", 4)))
+    shifted = dict(split_diff(make_multi_hunk_diff("app.py", 4, start=30)))
+    assert original.keys() == shifted.keys()
+
+
+def test_map_reduce_diff_summarizes_chunks_with_bounded_concurrency(
+    tmp_path, monkeypatch
+):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path))
+    diff = "".join(make_diff(f"file{i}.py", 20) for i in range(8))
+    running = peak = 0
+    calls = []
+
+    async def summarize_chunk(text):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        calls.append(text)
+        return "summary of " + text.splitlines()[0].split()[-1]
+
+    async def combine(summaries):
+        return f"combined:\n{summaries}"
+
+    result = asyncio.run(
+        map_reduce_diff(diff, summarize_chunk, combine, 1000, max_concurrency=2)
+    )
+
+    assert peak == 2
+    assert len(calls) == 8
+    assert result.startswith("combined:")
+    assert "summary of b/file7.py" in result
+
+
+def test_map_reduce_diff_reuses_cached_chunk_summaries(tmp_path, monkeypatch):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path))
+    calls = []
+
+    async def summarize_chunk(text):
+        calls.append(text)
+        return f"summary {len(calls)}"
+
+    async def combine(summaries):
+        return summaries
+
+    files = [make_diff(f"file{i}.py", 5) for i in range(3)]
+    asyncio.run(map_reduce_diff("".join(files), summarize_chunk, combine, 1000))
+    assert len(calls) == 3
+
+    files[1] = make_diff("file1.py", 6)
+    asyncio.run(map_reduce_diff("".join(files), summarize_chunk, combine, 1000))
+    assert len(calls) == 4
+    assert "file1.py" in calls[-1]
+
+
+def test_map_reduce_diff_reduces_until_summaries_fit_budget(tmp_path, monkeypatch):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path))
+    diff = "".join(make_diff(f"file{i}.py", 5) for i in range(16))
+    combined = []
+
+    async def summarize_chunk(text):
+        return "x" * 120
+
+    async def combine(summaries):
+        combined.append(summaries)
+        return "done"
+
+    result = asyncio.run(map_reduce_diff(diff, summarize_chunk, combine, 100))
+
+    assert result == "done"
+    assert estimate_tokens(combined[0]) <= 100
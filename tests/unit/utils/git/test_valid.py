@@ -1,6 +1,6 @@
 import pytest
 from pathlib import Path
-from ai_dev_toolkit.utils.git.valid import is_valid_diff
+from ai_dev_toolkit.utils.git.valid import is_valid_diff, validate_diff_stream
 
 
 def test_empty_diff():
@@ -69,3 +69,107 @@ def test_invalid_hunk_header_missing_parts():
 @@ -1,3 @@"""
     result = is_valid_diff(invalid_diff)
     assert result.startswith("Invalid hunk header format")
+
+
+def test_hunk_with_fewer_lines_than_header_is_rejected():
+    diff = """--- a/file
++++ b/file
+@@ -1,3 +1,3 @@
+ context
+-removed
++added
+"""
+    result = is_valid_diff(diff)
+    assert result.startswith("Hunk at line 3 is shorter than its header")
+
+
+def test_hunk_with_more_lines_than_header_is_rejected():
+    diff = """--- a/file
++++ b/file
+@@ -1 +1 @@
+-removed
++added
++extra
+"""
+    assert is_valid_diff(diff) == (
+        "Hunk at line 3 has more lines than its header @@ -1 +1 @@ (line 6)"
+    )
+
+
+def test_truncated_hunk_followed_by_next_hunk_is_rejected():
+    diff = """--- a/file
++++ b/file
+@@ -1,2 +1,2 @@
+-removed
++added
+@@ -10 +10 @@
+-a
++b
+"""
+    result = is_valid_diff(diff)
+    assert result == "Hunk at line 3 is shorter than its header @@ -1,2 +1,2 @@ (ended at line 6)"
+
+
+def test_removed_lines_that_look_like_file_headers_are_counted_as_content():
+    diff = """--- a/file
++++ b/file
+@@ -1,2 +1,1 @@
+--- a removed sql comment
+ kept
+"""
+    assert is_valid_diff(diff) is True
+
+
+def test_missing_new_file_header_is_rejected():
+    diff = """--- a/file
+@@ -1 +1 @@
+-a
++b
+"""
+    assert is_valid_diff(diff) == "Expected '+++' file header at line 2: @@ -1 +1 @@"
+
+
+def test_misplaced_no_newline_marker_is_rejected():
+    diff = """--- a/file
++++ b/file
+\\ No newline at end of file
+@@ -1 +1 @@
+-a
++b
+"""
+    assert is_valid_diff(diff).startswith("Misplaced '\\ No newline' marker at line 3")
+
+
+def test_git_binary_patch_is_accepted_and_validated():
+    diff = """diff --git a/logo.png b/logo.png
+index 2f80ba2..e312d3e 100644
+GIT binary patch
+literal 10
+RcmZQzWG>Gy%1KdF1ON+v0&f5S
+
+literal 8
+PcmZQzWXed*$;k%*20{WD
+
+"""
+    assert is_valid_diff(diff) is True
+    assert is_valid_diff(diff.replace("RcmZQzWG>Gy%1KdF1ON+v0&f5S", "R bad data")).startswith(
+        "Invalid binary patch data at line 5"
+    )
+
+
+def test_validate_diff_stream_reads_file_objects_incrementally(tmp_path):
+    diff_file = Path(__file__).parent / "diffs" / "test_valid_complex_diff.diff"
+    with open(diff_file) as f:
+        assert validate_diff_stream(f) is True
+
+    def lines():
+        yield "diff --git a/file b/file\n"
+        yield "@@ -1 +1 @@\n"
+        yield "garbage\n"
+        raise AssertionError("validation should stop at the first error")
+
+    assert validate_diff_stream(lines()) == "Invalid line prefix at line 3: garbage"
+
+
+def test_validate_diff_stream_rejects_empty_input():
+    assert validate_diff_stream(iter([])) == "Diff content cannot be empty"
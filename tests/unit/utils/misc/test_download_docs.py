@@ -0,0 +1,230 @@
+import json
+import os
+import shutil
+import subprocess
+import pytest
+from ai_dev_toolkit.utils.misc import download_docs as module
+from ai_dev_toolkit.utils.misc.download_docs import (
+    DocsSource,
+    download_all,
+    download_docs,
+    load_manifest,
+    prune_files,
+)
+
+
+def make_tree(root, paths):
+    for path in paths:
+        full = root / path
+        full.parent.mkdir(parents=True, exist_ok=True)
+        full.write_text(path)
+
+
+def listing(root):
+    return sorted(
+        os.path.relpath(os.path.join(directory, name), root).replace(os.sep, "/")
+        for directory, _, names in os.walk(root)
+        for name in names
+    )
+
+
+def test_prune_files_keeps_included_files_and_removes_empty_dirs(tmp_path):
+    make_tree(
+        tmp_path,
+        ["read me.md", "guide/setup.md", "guide/setup.py", "img/logo.png"],
+    )
+    assert prune_files(str(tmp_path), include_files=["*.md"]) == (2, 2)
+    assert listing(tmp_path) == ["guide/setup.md", "read me.md"]
+    assert not (tmp_path / "img").exists()
+
+
+def test_prune_files_deletes_excluded_files_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(module, "DELETE_BATCH", 2)
+    make_tree(tmp_path, [f"f{i}.tmp" for i in range(5)] + ["keep.md"])
+    assert prune_files(str(tmp_path), exclude_files=["*.tmp"]) == (1, 5)
+    assert listing(tmp_path) == ["keep.md"]
+
+
+def test_prune_files_rejects_both_filters(tmp_path):
+    with pytest.raises(ValueError):
+        prune_files(str(tmp_path), ["*.md"], ["*.py"])
+
+
+def test_download_docs_runs_git_without_a_shell(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    calls = []
+
+    class Result:
+        stderr = ""
+
+    def fake_run(cmd, cwd=None, **kwargs):
+        calls.append((cmd, cwd))
+        if cmd[1] == "sparse-checkout":
+            make_tree(tmp_path / "repo", ["my docs/a.md", "my docs/b.py"])
+        return Result()
+
+    monkeypatch.setattr(module.subprocess, "run", fake_run)
+
+    assert download_docs("https://example.com/org/repo.git", "my docs")
+
+    sparse = (["git", "sparse-checkout", "set", "my docs"], module.Path("repo"))
+    assert calls[1] == sparse
+    assert listing(tmp_path / "repo") == ["my docs/a.md"]
+
+
+def make_origin(tmp_path, name, files):
+    root = tmp_path / "origins" / name
+    root.mkdir(parents=True)
+    git = ["git", "-c", "user.name=t", "-c", "user.email=t@t"]
+    subprocess.run(["git", "init", "-q", str(root)], check=True)
+    make_tree(root, files)
+    subprocess.run(git + ["add", "."], cwd=root, check=True)
+    subprocess.run(git + ["commit", "-q", "-m", "docs"], cwd=root, check=True)
+    return root
+
+
+def commit(root, files, removed=()):
+    git = ["git", "-c", "user.name=t", "-c", "user.email=t@t"]
+    make_tree(root, files)
+    for path in removed:
+        os.remove(root / path)
+    subprocess.run(git + ["add", "-A"], cwd=root, check=True)
+    subprocess.run(git + ["commit", "-q", "-m", "more"], cwd=root, check=True)
+
+
+def test_load_manifest_fills_defaults_and_rejects_duplicates(tmp_path):
+    path = tmp_path / "manifest.json"
+    path.write_text(
+        json.dumps({"repos": [{"url": "https://x.org/a/docs.git", "directory": "d"}]})
+    )
+    (source,) = load_manifest(str(path))
+    assert (source.name, source.include_files) == ("docs", ["*.md"])
+
+    entry = {"url": "file:///srv/docs", "directory": "d"}
+    path.write_text(json.dumps([entry, entry]))
+    with pytest.raises(ValueError, match="duplicate names: docs"):
+        load_manifest(str(path))
+
+
+def test_download_all_checks_out_many_repos_from_local_mirrors(tmp_path):
+    alpha = make_origin(tmp_path, "alpha", ["docs/a.md", "docs/a.py", "src/x.py"])
+    beta = make_origin(tmp_path, "beta", ["guide/b.rst", "guide/b.md"])
+    sources = [
+        DocsSource(alpha.as_uri(), "docs"),
+        DocsSource(beta.as_uri(), "guide", include_files=["*.rst"]),
+        DocsSource(beta.as_uri(), "guide", exclude_files=["*.rst"], name="beta-md"),
+        DocsSource((tmp_path / "missing").as_uri(), "docs"),
+    ]
+    dest = tmp_path / "out"
+    mirrors = tmp_path / "mirrors"
+
+    results = download_all(
+        sources, str(dest), max_workers=4, mirrors_dir=str(mirrors)
+    )
+
+    assert [name for name, error in results.items() if error] == ["missing"]
+    assert listing(dest / "alpha" / "docs") == ["a.md"]
+    assert listing(dest / "beta" / "guide") == ["b.rst"]
+    assert listing(dest / "beta-md" / "guide") == ["b.md"]
+    assert len(os.listdir(mirrors)) == 2
+
+    commit(alpha, ["docs/new.md"])
+    results = download_all(sources[:1], str(dest), mirrors_dir=str(mirrors))
+
+    assert results == {"alpha": None}
+    assert listing(dest / "alpha" / "docs") == ["a.md", "new.md"]
+    assert len(os.listdir(mirrors)) == 2
+
+
+def test_download_all_checkouts_survive_losing_the_mirror(tmp_path):
+    origin = make_origin(tmp_path, "docs", ["docs/a.md"])
+    dest = tmp_path / "out"
+    mirrors = tmp_path / "mirrors"
+    sources = [DocsSource(origin.as_uri(), "docs")]
+    download_all(sources, str(dest), mirrors_dir=str(mirrors))
+
+    shutil.rmtree(mirrors)
+    checkout = dest / "docs"
+    assert not (checkout / ".git" / "objects" / "info" / "alternates").exists()
+    subprocess.run(["git", "fsck"], cwd=checkout, check=True, capture_output=True)
+
+
+def test_download_all_updates_checkouts_in_place(tmp_path):
+    origin = make_origin(
+        tmp_path, "docs", ["docs/keep.md", "docs/edit.md", "docs/gone.md", "x.py"]
+    )
+    sources = [DocsSource(origin.as_uri(), "docs")]
+    dest = tmp_path / "out"
+    changes = tmp_path / "changes.jsonl"
+
+    def refresh():
+        results = download_all(
+            sources,
+            str(dest),
+            mirrors_dir=str(tmp_path / "mirrors"),
+            changes_path=str(changes),
+        )
+        assert results == {"docs": None}
+        return [json.loads(line) for line in changes.read_text().splitlines()]
+
+    assert {entry["path"] for entry in refresh()} == {
+        "docs/keep.md",
+        "docs/edit.md",
+        "docs/gone.md",
+    }
+    untouched = os.stat(dest / "docs" / "docs" / "keep.md").st_ino
+
+    (origin / "docs" / "edit.md").write_text("edited")
+    commit(
+        origin,
+        ["docs/sub/new.md", "docs/new.py", "src/other.md"],
+        removed=["docs/gone.md"],
+    )
+
+    assert sorted((entry["status"], entry["path"]) for entry in refresh()) == [
+        ("A", "docs/sub/new.md"),
+        ("D", "docs/gone.md"),
+        ("M", "docs/edit.md"),
+    ]
+    checkout = dest / "docs" / "docs"
+    assert listing(checkout) == ["edit.md", "keep.md", "sub/new.md"]
+    assert (checkout / "edit.md").read_text() == "edited"
+    assert os.stat(checkout / "keep.md").st_ino == untouched
+    assert refresh() == []
+
+
+def test_download_all_updates_a_checkout_of_the_repository_root(tmp_path):
+    origin = make_origin(tmp_path, "docs", ["a.md", "x.py", "guide/b.md"])
+    sources = [DocsSource(origin.as_uri(), "./", include_files=["*.md"])]
+    dest = tmp_path / "out"
+    changes = tmp_path / "changes.jsonl"
+
+    def refresh():
+        download_all(
+            sources,
+            str(dest),
+            mirrors_dir=str(tmp_path / "mirrors"),
+            changes_path=str(changes),
+        )
+        return sorted(
+            (entry["status"], entry["path"])
+            for entry in map(json.loads, changes.read_text().splitlines())
+        )
+
+    assert refresh() == [("A", "a.md"), ("A", "guide/b.md")]
+    commit(origin, ["n.md", "guide/c.md", "y.py"])
+    assert refresh() == [("A", "guide/c.md"), ("A", "n.md")]
+    checkout = [path for path in listing(dest / "docs") if not path.startswith(".git/")]
+    assert checkout == ["a.md", "guide/b.md", "guide/c.md", "n.md"]
+
+
+def test_download_docs_update_refreshes_existing_checkout(tmp_path, monkeypatch):
+    origin = make_origin(tmp_path, "guide", ["docs/a.md", "docs/a.py"])
+    monkeypatch.chdir(tmp_path)
+    assert download_docs(origin.as_uri(), "docs")
+    assert listing(tmp_path / "guide" / "docs") == ["a.md"]
+
+    commit(origin, ["docs/b.md", "docs/b.py"], removed=["docs/a.md"])
+    assert download_docs(origin.as_uri(), "docs", update=True)
+
+    assert listing(tmp_path / "guide" / "docs") == ["b.md"]
@@ -0,0 +1,112 @@
+import os
+from ai_dev_toolkit.utils.misc import file_tree
+from ai_dev_toolkit.utils.misc.file_tree import compile_gitignore, walk_files
+
+
+def make_tree(root, paths):
+    for path in paths:
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text(path)
+
+
+def ignored(rules, path, is_dir=False):
+    result = False
+    for regex, negated, directories_only in rules:
+        if (not directories_only or is_dir) and regex.match(path):
+            result = not negated
+    return result
+
+
+def test_compile_gitignore_follows_git_matching_rules():
+    rules = compile_gitignore(
+        [
+            "# comment",
+            "*.log",
+            "!keep.log",
+            "/root-only.txt",
+            "build/",
+            "docs/**/draft-*.md",
+            "a?c",
+        ]
+    )
+    assert ignored(rules, "x/y/debug.log")
+    assert not ignored(rules, "x/keep.log")
+    assert ignored(rules, "root-only.txt")
+    assert not ignored(rules, "sub/root-only.txt")
+    assert ignored(rules, "src/build", is_dir=True)
+    assert not ignored(rules, "src/build")
+    assert ignored(rules, "docs/draft-1.md")
+    assert ignored(rules, "docs/a/b/draft-2.md")
+    assert not ignored(rules, "other/draft-3.md")
+    assert ignored(rules, "abc") and not ignored(rules, "a/c")
+
+
+def test_walk_files_honours_nested_gitignores_and_patterns(tmp_path):
+    make_tree(
+        tmp_path,
+        [
+            "README.md",
+            "notes.txt",
+            "src/app.py",
+            "src/app.pyc",
+            "src/gen/out.py",
+            "src/gen/keep.py",
+            "build/lib.py",
+            "nb/analysis.ipynb",
+            ".git/config.py",
+        ],
+    )
+    (tmp_path / ".gitignore").write_text("build/\n*.pyc\n")
+    (tmp_path / "src" / ".gitignore").write_text("gen/*\n!gen/keep.py\n")
+
+    entries = list(walk_files(str(tmp_path), ["*.md", "*.py", "*.ipynb"]))
+
+    assert [entry.path for entry in entries] == [
+        "README.md",
+        "nb/analysis.ipynb",
+        "src/app.py",
+        "src/gen/keep.py",
+    ]
+    stat = os.stat(tmp_path / "src" / "app.py")
+    assert (entries[2].size, entries[2].mtime) == (stat.st_size, stat.st_mtime)
+
+    everything = [entry.path for entry in walk_files(str(tmp_path), gitignore=False)]
+    assert "build/lib.py" in everything and ".git/config.py" not in everything
+
+
+def test_walk_files_in_parallel_gives_the_same_order(tmp_path):
+    make_tree(tmp_path, [f"d{i}/sub/f{j}.py" for i in range(5) for j in range(3)])
+    make_tree(tmp_path, ["top.py"])
+    serial = [entry.path for entry in walk_files(str(tmp_path), ["*.py"])]
+    parallel = [
+        entry.path
+        for entry in walk_files(str(tmp_path), ["*.py"], parallel=True, max_workers=3)
+    ]
+    assert parallel == serial
+    assert serial[0] == "top.py" and len(serial) == 16
+
+
+def test_walk_files_is_lazy(tmp_path):
+    make_tree(tmp_path, ["a.py", "b/c.py"])
+    walker = walk_files(str(tmp_path))
+    assert next(walker).path == "a.py"
+    os.remove(tmp_path / "b" / "c.py")
+    assert list(walker) == []
+
+
+def test_walk_files_in_parallel_only_scans_ahead_of_the_consumer(
+    tmp_path, monkeypatch
+):
+    make_tree(tmp_path, ["a.py"] + [f"d{i:02}/f.py" for i in range(40)])
+    scanned = []
+    scan_dir = file_tree._scan_dir
+
+    def counting_scan_dir(root, relative_dir, rules, matches):
+        scanned.append(relative_dir)
+        return scan_dir(root, relative_dir, rules, matches)
+
+    monkeypatch.setattr(file_tree, "_scan_dir", counting_scan_dir)
+    walker = walk_files(str(tmp_path), parallel=True, max_workers=2)
+    assert next(walker).path == "a.py"
+    assert len(scanned) <= 1 + 2 * file_tree.LOOKAHEAD_PER_WORKER
+    assert len(list(walker)) == 40
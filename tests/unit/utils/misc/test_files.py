@@ -0,0 +1,63 @@
+import io
+import pytest
+from ai_dev_toolkit.utils.misc.files import (
+    atomic_write,
+    compile_patterns,
+    copy_range,
+    map_file,
+)
+
+
+def test_map_file_exposes_file_bytes(tmp_path):
+    file = tmp_path / "data.txt"
+    file.write_bytes(b"hello world")
+    with map_file(str(file)) as data:
+        assert data.find(b"world") == 6
+        assert data[:5] == b"hello"
+
+
+def test_map_file_returns_empty_bytes_for_empty_file(tmp_path):
+    file = tmp_path / "empty.txt"
+    file.write_bytes(b"")
+    with map_file(str(file)) as data:
+        assert data == b""
+
+
+def test_copy_range_copies_in_chunks():
+    out = io.BytesIO()
+    copy_range(b"0123456789", out, 2, 9, chunk_size=3)
+    assert out.getvalue() == b"2345678"
+
+
+def test_atomic_write_replaces_file_and_keeps_mode(tmp_path):
+    file = tmp_path / "script.sh"
+    file.write_bytes(b"old")
+    file.chmod(0o755)
+
+    with atomic_write(str(file)) as out:
+        out.write(b"new")
+
+    assert file.read_bytes() == b"new"
+    assert file.stat().st_mode & 0o777 == 0o755
+    assert [path.name for path in tmp_path.iterdir()] == ["script.sh"]
+
+
+def test_atomic_write_leaves_original_untouched_on_error(tmp_path):
+    file = tmp_path / "data.txt"
+    file.write_bytes(b"original")
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(file)) as out:
+            out.write(b"partial")
+            raise RuntimeError("boom")
+
+    assert file.read_bytes() == b"original"
+    assert [path.name for path in tmp_path.iterdir()] == ["data.txt"]
+
+
+def test_compile_patterns_matches_names_and_relative_paths():
+    matches = compile_patterns(["*.md", "api/*.rst"])
+    assert matches("guide/intro.md", "intro.md")
+    assert matches("api/index.rst", "index.rst")
+    assert not matches("guide/index.rst", "index.rst")
+    assert not compile_patterns([])("a.md", "a.md")
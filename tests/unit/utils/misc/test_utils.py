@@ -57,15 +57,25 @@ def test_get_operational_system_unknown(mock_system):
     mock_system.return_value = 'Unknown'
     assert get_operational_system() == 'Unknown'
 
-def test_get_file_tree_default():
-    result = get_file_tree("/some/path")
-    assert "-name '*.md' -o -name '*.py' -o -name '*.ipynb'" in result
+def make_tree(root):
+    for path in ["a.md", "b.txt", "src/c.py", "src/d.json", "build/e.py"]:
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text(path)
+    (root / ".gitignore").write_text("build/\n")
 
-def test_get_file_tree_custom_extensions():
-    result = get_file_tree("/some/path", [".txt", ".json"])
-    assert "-name '.txt' -o -name '.json'" in result
 
-def test_get_file_tree_single_extension():
-    result = get_file_tree("/some/path", [".txt"])
-    assert "-name '.txt'" in result
-    assert "-o" not in result 
\ No newline at end of file
+def test_get_file_tree_default(tmp_path, monkeypatch):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path / "cache"))
+    make_tree(tmp_path)
+    assert get_file_tree(str(tmp_path)) == ["a.md", "src/c.py"]
+
+def test_get_file_tree_custom_extensions(tmp_path, monkeypatch):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path / "cache"))
+    make_tree(tmp_path)
+    result = get_file_tree(str(tmp_path), [".txt", ".json"])
+    assert result == ["b.txt", "src/d.json"]
+
+def test_get_file_tree_single_extension(tmp_path, monkeypatch):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path / "cache"))
+    make_tree(tmp_path)
+    assert get_file_tree(str(tmp_path), [".txt"]) == ["b.txt"]
@@ -0,0 +1,220 @@
+import os
+import subprocess
+import pytest
+from ai_dev_toolkit.utils.git.release import bump_version
+from ai_dev_toolkit.utils.misc import watch as watch_module
+from ai_dev_toolkit.utils.git.stage_files import get_diff_stats
+from ai_dev_toolkit.utils.misc.state import read_state, state_dir
+from ai_dev_toolkit.utils.misc.utils import get_file_tree
+from ai_dev_toolkit.utils.misc.watch import PollingWatcher, WorkspaceState, watch
+
+
+def git(root, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+        cwd=root,
+        check=True,
+        capture_output=True,
+    )
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.setenv("AITK_CACHE_DIR", str(tmp_path / "cache"))
+    root = tmp_path / "repo"
+    (root / "pkg").mkdir(parents=True)
+    (root / ".gitignore").write_text("build/\n")
+    (root / "pkg" / "__init__.py").write_text('__version__ = "1.2.3"\n')
+    (root / "pkg" / "core.py").write_text("a = 1\n")
+    git(root, "init", "-q")
+    git(root, "add", ".")
+    git(root, "commit", "-q", "-m", "init")
+    return root
+
+
+class FakeWatcher:
+    """Returns prepared batches of changes, one per wait()"""
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.closed = False
+
+    def wait(self, timeout):
+        return self.batches.pop(0) if self.batches else set()
+
+    def close(self):
+        self.closed = True
+
+
+def test_rebuild_collects_files_and_versions(repo):
+    (repo / "VERSION").write_text("0.4.0\n")
+    (repo / "build").mkdir()
+    (repo / "build" / "out.py").write_text("")
+
+    state = WorkspaceState(str(repo))
+    state.rebuild()
+
+    assert sorted(state.files) == [
+        ".gitignore",
+        "VERSION",
+        "pkg/__init__.py",
+        "pkg/core.py",
+    ]
+    assert state.versions == {"VERSION": "0.4.0"}
+    assert state.diff_stats == {}
+
+
+def test_apply_updates_only_changed_paths(repo):
+    state = WorkspaceState(str(repo))
+    state.rebuild()
+
+    (repo / "VERSION").write_text("2.0.0\n")
+    (repo / "pkg" / "new.py").write_text("x = 1\n")
+    os.remove(repo / "pkg" / "core.py")
+    state.apply(["VERSION", "pkg/new.py", "pkg/core.py"])
+
+    assert sorted(state.files) == [
+        ".gitignore",
+        "VERSION",
+        "pkg/__init__.py",
+        "pkg/new.py",
+    ]
+    assert state.versions == {"VERSION": "2.0.0"}
+    assert state.diff_stats == {"pkg/core.py": [0, 1]}
+
+    os.remove(repo / "VERSION")
+    state.apply(["VERSION"])
+    assert state.versions == {}
+
+
+def test_apply_recomputes_diff_stats_when_head_moves(repo):
+    state = WorkspaceState(str(repo))
+    (repo / "pkg" / "core.py").write_text("a = 2\nb = 3\n")
+    state.rebuild()
+    assert state.diff_stats == {"pkg/core.py": [2, 1]}
+
+    git(repo, "commit", "-q", "-am", "change")
+    state.apply([], head_moved=True)
+    assert state.diff_stats == {}
+
+
+def test_apply_lists_directories_created_or_moved_in(repo, tmp_path):
+    state = WorkspaceState(str(repo))
+    state.rebuild()
+
+    outside = tmp_path / "outside"
+    (outside / "deep").mkdir(parents=True)
+    (outside / "a.py").write_text("")
+    (outside / "deep" / "b.py").write_text("")
+    (outside / "deep" / ".gitignore").write_text("skip.py\n")
+    (outside / "deep" / "skip.py").write_text("")
+    os.rename(outside, repo / "pkg" / "moved")
+    state.apply(["pkg/moved"])
+
+    assert sorted(path for path in state.files if path.startswith("pkg/moved")) == [
+        "pkg/moved/a.py",
+        "pkg/moved/deep/.gitignore",
+        "pkg/moved/deep/b.py",
+    ]
+
+    (repo / "build").mkdir()
+    (repo / "build" / "ignored.py").write_text("")
+    os.rename(repo / "pkg" / "moved", repo / "build" / "moved")
+    state.apply(["pkg/moved", "build"])
+    assert not [path for path in state.files if "moved" in path]
+
+
+def test_apply_rebuilds_when_gitignore_changes(repo):
+    state = WorkspaceState(str(repo))
+    state.rebuild()
+    (repo / ".gitignore").write_text("pkg/core.py\n")
+    state.apply([".gitignore"])
+    assert "pkg/core.py" not in state.files
+
+
+def test_polling_watcher_reports_changed_paths(repo):
+    watcher = PollingWatcher(str(repo), interval=0)
+    assert watcher.wait(0) == set()
+    (repo / "pkg" / "core.py").write_text("changed = True\n")
+    (repo / "build").mkdir()
+    (repo / "build" / "ignored.py").write_text("")
+    assert watcher.wait(0) == {"pkg/core.py"}
+
+
+def test_watch_batches_events_and_publishes_state(repo):
+    updates = []
+    (repo / "pkg" / "new.py").write_text("")
+    watcher = FakeWatcher([{"pkg/new.py"}, {"pkg/new.py"}, set()])
+
+    def stop():
+        if updates:
+            assert get_file_tree(str(repo), ["*.py"]) == [
+                "pkg/__init__.py",
+                "pkg/core.py",
+                "pkg/new.py",
+            ]
+            assert read_state(str(repo), "files")["pkg/new.py"][0] == 0
+        return bool(updates)
+
+    watch(str(repo), watcher=watcher, on_update=updates.append, stop=stop)
+
+    assert updates == [{"pkg/new.py"}]
+    assert watcher.closed
+    assert read_state(str(repo), "files") is None
+
+
+def test_get_diff_stats_reads_state_while_watch_runs(repo):
+    (repo / "pkg" / "core.py").write_text("a = 2\n")
+    state = WorkspaceState(str(repo))
+    state.rebuild()
+    state.diff_stats = {"from/state.py": [1, 0]}
+    state.save(os.getpid())
+    assert get_diff_stats(str(repo)) == {"from/state.py": [1, 0]}
+
+    state.save(None)
+    assert get_diff_stats(str(repo)) == {"pkg/core.py": [1, 1]}
+
+
+def test_read_state_creates_nothing(repo, tmp_path):
+    assert read_state(str(repo), "versions") is None
+    assert not (tmp_path / "cache").exists()
+    assert not state_dir(str(repo)).exists()
+
+
+def test_make_watcher_falls_back_to_polling(repo, monkeypatch):
+    monkeypatch.setattr(watch_module.importlib.util, "find_spec", lambda name: None)
+    assert isinstance(watch_module.make_watcher(str(repo)), PollingWatcher)
+
+
+def test_inotify_watcher_reports_changes(repo):
+    pytest.importorskip("inotify_simple")
+    watcher = watch_module.InotifyWatcher(str(repo))
+    try:
+        (repo / "pkg" / "sub").mkdir()
+        (repo / "pkg" / "sub" / "early.py").write_text("")
+        assert "pkg/sub" in watcher.wait(1)
+        (repo / "pkg" / "sub" / "mod.py").write_text("")
+        assert "pkg/sub/mod.py" in watcher.wait(1)
+
+        state = WorkspaceState(str(repo))
+        state.rebuild()
+        del state.files["pkg/sub/early.py"]
+        state.apply({"pkg/sub"})
+        assert "pkg/sub/early.py" in state.files
+    finally:
+        watcher.close()
+
+
+def test_bump_version_reads_the_version_file_from_state(repo, monkeypatch):
+    (repo / "setup.py").write_text('version = "1.0.0"\n')
+    (repo / "VERSION").write_text("3.1.4\n")
+    monkeypatch.chdir(repo)
+    state = WorkspaceState(".")
+    state.rebuild()
+    # As if setup.py lost its version since the last full scan
+    del state.versions["setup.py"]
+    state.save(os.getpid())
+
+    assert bump_version("patch") == "3.1.5"
+    assert (repo / "VERSION").read_text() == "3.1.5\n"
+    assert (repo / "setup.py").read_text() == 'version = "1.0.0"\n'